@@ -0,0 +1,464 @@
+import os
+import csv
+import time
+import shutil
+import argparse
+import configparser
+import tempfile
+from datetime import datetime
+
+import h5py
+import netCDF4 as nc
+import numpy as np
+
+import setup
+from setup import apply_spatial_window
+
+
+# 合成数据的时间与位置
+HY_GRANULE_TAG = '20231011T022500_20231011T023000_26671_10'
+MODIS_GRANULE_TIME = '20231011T020501'
+HY_LAT_RANGE = (30.0, 35.0)
+HY_LON_RANGE = (122.0, 124.0)
+XC_STATION = (32.0, 123.0)
+
+
+def apply_spatial_window_loop(flag_array, window_size, rows, cols):
+    """逐像元循环实现的空间窗口判断（原实现，用于结果对比）"""
+    flag_2d = flag_array.reshape(rows, cols)
+    half_window = (window_size - 1) // 2
+
+    flag_2d[:half_window, :] = 1
+    flag_2d[-half_window:, :] = 1
+    flag_2d[:, :half_window] = 1
+    flag_2d[:, -half_window:] = 1
+
+    temp_flag = flag_2d.copy()
+    for i in range(half_window, rows-half_window):
+        for j in range(half_window, cols-half_window):
+            if flag_2d[i, j] == 0:
+                window = flag_2d[i-half_window:i+half_window+1,
+                               j-half_window:j+half_window+1]
+                if np.mean(window) > 0.5:
+                    temp_flag[i, j] = 1
+
+    flag_2d = temp_flag
+
+    temp_flag = flag_2d.copy()
+    for i in range(half_window, rows-half_window):
+        for j in range(half_window, cols-half_window):
+            if flag_2d[i, j] == 0:
+                window = flag_2d[i-half_window:i+half_window+1,
+                               j-half_window:j+half_window+1]
+                valid_values = window[window == 0]
+                if len(valid_values) > 0:
+                    cv = np.std(valid_values) / np.mean(valid_values) if np.mean(valid_values) != 0 else 0
+                    if cv > 0.15:
+                        temp_flag[i, j] = 1
+
+    return temp_flag.reshape(-1)
+
+
+def write_hy_txt_loop(f, data):
+    """逐值判断写入的HY3A文本格式（原save_data_to_txt实现，用于结果对比）"""
+    flattened_data = data.flatten()
+    for value in flattened_data:
+        if abs(value + 9.9) < 0.0001:
+            f.write('-999.000000\n')
+        elif abs(value) < 0.000001:
+            f.write('0.000000\n')
+        elif abs(value) >= 1000000:
+            f.write(f'{value:.0f}\n')
+        else:
+            f.write(f'{value:.6f}\n')
+
+
+def hy_txt_cases(size, rng):
+    """覆盖HY3A文本格式各分支及其边界的合成数组"""
+    edges = np.array([
+        -9.9, -9.9 + 9e-5, -9.9 - 9e-5, -9.9 + 1e-4, -9.9 - 1e-4, -9.9 + 1.1e-4, -9.9 - 1.1e-4,
+        0.0, -0.0, 1e-7, -1e-7, 9.99e-7, -9.99e-7, 1e-6, -1e-6, 1.01e-6,
+        1e6, -1e6, 999999.999, -999999.999, 1e6 + 0.5, 2.5e6, -2.5e6, 1e12,
+        np.nan, np.inf, -np.inf, 0.5, -0.5, 123.4567895, 0.0000015,
+    ])
+    magnitudes = 10.0 ** rng.uniform(-8, 8, size)
+    values = magnitudes * rng.choice([-1.0, 1.0], size)
+    special = rng.random(size)
+    values[special < 0.05] = -9.9 + rng.uniform(-2e-4, 2e-4, np.sum(special < 0.05))
+    values[(special >= 0.05) & (special < 0.08)] = 0.0
+    values[(special >= 0.08) & (special < 0.09)] = np.nan
+    values = np.concatenate([edges, values])
+    integers = np.concatenate([np.array([0, -10, 9, 999999, 1000000, -1000000, 2 ** 31 - 1]),
+                               rng.integers(-3000000, 3000000, size)])
+    return [
+        ('float64', values),
+        ('float32', values.astype(np.float32)),
+        ('float32二维', values[:len(values) // 8 * 8].astype(np.float32).reshape(-1, 8)),
+        ('int32', integers.astype(np.int32)),
+        ('int64', integers.astype(np.int64)),
+        ('int16', rng.integers(-32768, 32767, size).astype(np.int16)),
+    ]
+
+
+def benchmark_hy_txt(size=200000, seed=0):
+    """对比HY3A文本写入的逐值实现与批量格式化实现（输出字节与耗时），返回是否全部一致"""
+    rng = np.random.default_rng(seed)
+    print(f"\nHY3A文本写入: 每组{size}个随机值及边界值")
+    print(f"{'数据':<12} {'逐值(s)':>10} {'批量(s)':>10} {'加速比':>8} 字节一致")
+    all_same = True
+    with tempfile.TemporaryDirectory() as work_dir:
+        loop_path = os.path.join(work_dir, 'loop.txt')
+        fast_path = os.path.join(work_dir, 'fast.txt')
+        for name, data in hy_txt_cases(size, rng):
+            start = time.perf_counter()
+            # int16最小值取绝对值溢出，与原实现一致，不提示
+            with open(loop_path, 'w') as f, np.errstate(over='ignore'):
+                write_hy_txt_loop(f, data)
+            loop_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with open(fast_path, 'w') as f:
+                # 块长度取非整除值，同时检验分块边界
+                setup.write_hy_txt(f, data, chunk_size=size // 3 + 7)
+            fast_time = time.perf_counter() - start
+
+            with open(loop_path, 'rb') as f1, open(fast_path, 'rb') as f2:
+                same = f1.read() == f2.read()
+            all_same = all_same and same
+            print(f"{name:<12} {loop_time:>10.3f} {fast_time:>10.4f} "
+                  f"{loop_time / max(fast_time, 1e-9):>8.1f} {same}")
+    return all_same
+
+
+def benchmark_spatial_window(rows=1000, cols=300, window_sizes=(1, 3, 5, 7), ratios=(0.1, 0.5, 0.9), seed=0):
+    """对比空间窗口判断的循环实现与向量化实现（结果与耗时）"""
+    rng = np.random.default_rng(seed)
+    print(f"\n空间窗口判断: {rows}x{cols}")
+    print(f"{'窗口':>4} {'标记比例':>8} {'循环(s)':>10} {'向量化(s)':>10} {'加速比':>8} 结果一致")
+    for window_size in window_sizes:
+        for ratio in ratios:
+            flag = (rng.random(rows * cols) < ratio).astype(np.int32)
+
+            start = time.perf_counter()
+            expected = apply_spatial_window_loop(flag.copy(), window_size, rows, cols)
+            loop_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = apply_spatial_window(flag.copy(), window_size, rows, cols)
+            fast_time = time.perf_counter() - start
+
+            same = result.dtype == expected.dtype and np.array_equal(result, expected)
+            print(f"{window_size:>4} {ratio:>8.1f} {loop_time:>10.3f} {fast_time:>10.4f} "
+                  f"{loop_time / max(fast_time, 1e-9):>8.0f} {same}")
+
+
+def benchmark_spacematch(rows=1000, cols=200, source_rows=800, source_cols=160,
+                         clouds=(0.0, 0.3, 0.6, 0.9), seed=0):
+    """
+    空间匹配插值：整景插值后按标识置NaN（原实现）与只插值未标识像元对比（结果与耗时），
+    检验源三角剖分与目标像元无关，两种方式共用，单独计时
+    """
+    rng = np.random.default_rng(seed)
+    target_lat = np.linspace(*HY_LAT_RANGE, rows)[:, None] + np.zeros((1, cols))
+    target_lon = np.linspace(*HY_LON_RANGE, cols)[None, :] + np.zeros((rows, 1))
+    target_lat, target_lon = target_lat.reshape(-1), target_lon.reshape(-1)
+    source_lat = (HY_LAT_RANGE[0] - 0.5 + np.linspace(0, HY_LAT_RANGE[1] - HY_LAT_RANGE[0] + 1, source_rows)[:, None] +
+                  np.zeros((1, source_cols))).reshape(-1)
+    source_lon = (HY_LON_RANGE[0] - 0.3 + np.linspace(0, HY_LON_RANGE[1] - HY_LON_RANGE[0] + 0.6, source_cols)[None, :] +
+                  np.zeros((source_rows, 1))).reshape(-1)
+    # 规则网格的四点共圆会使三角剖分不唯一，加入微小扰动
+    source_lat = source_lat + rng.normal(0, 1e-4, source_lat.shape)
+    source_lon = source_lon + rng.normal(0, 1e-4, source_lon.shape)
+    source_data = rng.random(source_lat.shape)
+    source_data[rng.random(source_lat.shape) < 0.1] = np.nan
+    valid = ~np.isnan(source_data)
+
+    start = time.perf_counter()
+    tri = setup.Delaunay(np.column_stack((source_lon[valid], source_lat[valid])))
+    tri.transform
+    triangulation_time = time.perf_counter() - start
+
+    print(f"\n空间匹配插值: HY3A {rows}x{cols}, 检验源 {source_rows}x{source_cols}, "
+          f"三角剖分 {triangulation_time:.3f}s")
+    print(f"{'标记比例':>8} {'插值像元':>10} {'整景(s)':>10} {'未标识像元(s)':>14} {'加速比':>8} 结果一致")
+    for cloud in clouds:
+        target_flag = (rng.random(target_lat.shape) < cloud).astype(np.int32)
+
+        start = time.perf_counter()
+        interpolator = setup.LinearInterpolationWeights.from_triangulation(tri, valid, target_lon, target_lat)
+        expected = interpolator(source_data)
+        expected[target_flag == 1] = np.nan
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        query = target_flag == 0
+        interpolator = setup.LinearInterpolationWeights.from_triangulation(tri, valid,
+                                                                         target_lon[query], target_lat[query])
+        result = np.full(target_lat.shape, np.nan)
+        result[query] = interpolator(source_data)
+        fast_time = time.perf_counter() - start
+
+        same = np.array_equal(result, expected, equal_nan=True)
+        print(f"{cloud:>8.1f} {int(query.sum()):>10} {full_time:>10.3f} {fast_time:>14.3f} "
+              f"{full_time / max(fast_time, 1e-9):>8.2f} {same}")
+
+
+def write_hy_granules(input_dir, rows, cols, rng, cloud=0.1):
+    """写出合成的HY3A L2A/L2B/L2C HDF5文件，数据集路径与process_hy_data一致"""
+    lat = np.linspace(*HY_LAT_RANGE, rows)[:, None] + np.zeros((1, cols))
+    lon = np.linspace(*HY_LON_RANGE, cols)[None, :] + np.zeros((rows, 1))
+    files = {key: f'H3A_OPER_OCT_{level}_{HY_GRANULE_TAG}.h5'
+             for key, level in [('l2a_file', 'L2A'), ('l2b_file', 'L2B'), ('l2c_file', 'L2C')]}
+
+    with h5py.File(os.path.join(input_dir, files['l2a_file']), 'w') as f:
+        f['Scan Line Attributes/Year'] = np.full(rows, 2023, dtype=np.int16)
+        f['Scan Line Attributes/Day'] = np.full(rows, 284, dtype=np.int16)
+        f['Scan Line Attributes/Millisecond'] = np.full(rows, 9000000, dtype=np.int32)
+        f['Navigation Data/Latitude'] = lat.astype(np.float32)
+        f['Navigation Data/Longitude'] = lon.astype(np.float32)
+        flags = np.zeros((rows, cols), dtype=np.int32)
+        flags[rng.random((rows, cols)) < cloud] |= (1 << 8)
+        flags[rng.random((rows, cols)) < 0.05] |= (1 << 3)
+        f['Geophysical Data/l2_flags'] = flags
+        for band in ['412', '443', '490', '520', '565', '670', '750']:
+            data = (0.002 + 0.01 * rng.random((rows, cols))).astype(np.float32)
+            data[rng.random((rows, cols)) < 0.02] = -9.9
+            data[rng.random((rows, cols)) < 0.01] = 0
+            f[f'Geophysical Data/Rrs{band}'] = data
+
+    with h5py.File(os.path.join(input_dir, files['l2b_file']), 'w') as f:
+        for name, scale in [('chl_a', 5), ('TSM', 50), ('CDOM', 1), ('SST', 25),
+                            ('taua865', 0.5), ('nLw565', 2), ('Kd490', 0.3)]:
+            data = (scale * (0.2 + rng.random((rows, cols)))).astype(np.float32)
+            data[rng.random((rows, cols)) < 0.02] = -9.9
+            f[f'Geophysical Data/{name}'] = data
+
+    with h5py.File(os.path.join(input_dir, files['l2c_file']), 'w') as f:
+        data = (30 * (0.5 + rng.random((rows, cols)))).astype(np.float32)
+        data[rng.random((rows, cols)) < 0.02] = -717.002197265625
+        f['Geophysical Data/IPAR'] = data
+    return files
+
+def write_modis_granules(input_dir, rows, cols, rng, cloud=0.1, sensor='TERRA'):
+    """写出合成的MODIS OC/SST netCDF文件（覆盖范围略大于HY3A景）"""
+    lat = HY_LAT_RANGE[0] - 0.5 + np.linspace(0, HY_LAT_RANGE[1] - HY_LAT_RANGE[0] + 1, rows)[:, None] + np.zeros((1, cols))
+    lon = HY_LON_RANGE[0] - 0.3 + np.linspace(0, HY_LON_RANGE[1] - HY_LON_RANGE[0] + 0.6, cols)[None, :] + np.zeros((rows, 1))
+    dims = ('number_of_lines', 'pixels_per_line')
+    files = {'oc_file': f'{sensor}_MODIS.{MODIS_GRANULE_TIME}.L2.OC.NRT.nc',
+             'sst_file': f'{sensor}_MODIS.{MODIS_GRANULE_TIME}.L2.SST.nc'}
+
+    with nc.Dataset(os.path.join(input_dir, files['oc_file']), 'w') as ds:
+        ds.createDimension(dims[0], rows)
+        ds.createDimension(dims[1], cols)
+        navigation = ds.createGroup('navigation_data')
+        geophysical = ds.createGroup('geophysical_data')
+        navigation.createVariable('latitude', 'f4', dims)[:] = lat
+        navigation.createVariable('longitude', 'f4', dims)[:] = lon
+        flags = np.zeros((rows, cols), dtype=np.int32)
+        flags[rng.random((rows, cols)) < cloud] |= 1 << 3
+        geophysical.createVariable('l2_flags', 'i4', dims)[:] = flags
+        for band in ['412', '443', '469', '488', '531', '547', '555', '645', '667', '678']:
+            variable = geophysical.createVariable(f'Rrs_{band}', 'i2', dims, fill_value=-32767)
+            variable.scale_factor = 2e-6
+            variable.add_offset = 0.05
+            variable[:] = np.ma.masked_array(0.002 + 0.01 * rng.random((rows, cols)),
+                                             rng.random((rows, cols)) < 0.03)
+        for name, scale in [('chlor_a', 5), ('Kd_490', 0.3), ('aot_869', 0.5)]:
+            variable = geophysical.createVariable(name, 'f4', dims, fill_value=-32767.0)
+            variable[:] = np.ma.masked_array(scale * (0.2 + rng.random((rows, cols))),
+                                             rng.random((rows, cols)) < 0.03)
+        variable = geophysical.createVariable('ipar', 'i2', dims, fill_value=-32767)
+        variable.scale_factor = 1e-6
+        variable.add_offset = 0.0
+        variable[:] = np.ma.masked_array(0.003 * (0.5 + rng.random((rows, cols))),
+                                         rng.random((rows, cols)) < 0.03)
+
+    with nc.Dataset(os.path.join(input_dir, files['sst_file']), 'w') as ds:
+        ds.createDimension(dims[0], rows)
+        ds.createDimension(dims[1], cols)
+        geophysical = ds.createGroup('geophysical_data')
+        variable = geophysical.createVariable('sst', 'i2', dims, fill_value=-32767)
+        variable.scale_factor = 0.005
+        variable.add_offset = 0.0
+        variable[:] = np.ma.masked_array(20 + 10 * rng.random((rows, cols)),
+                                         rng.random((rows, cols)) < 0.03)
+    return files
+
+def write_xc_files(input_dir, records=5):
+    """写出合成的现场观测文本文件（AOPRes/WQP/AOT/CTD）"""
+    lat, lon = XC_STATION
+    header = f"/begin_header\n/north_latitude={lat}\n/east_longitude={lon}\n/end_header\n"
+    files = {
+        'aopres_file': 'AOPRes_NH_TripletAOP_0008_20241114000000.txt',
+        'wqp_file': 'WQP_NH_ECO_Triplet_BBFL2W-5776_20241106000000.txt',
+        'aot_file': 'AOT_Yantai_CE318TS9_1602_202109170000.txt',
+        'ctd_file': 'CTD_NH_PZWY200-2_241021_20241106000000.txt',
+    }
+    with open(os.path.join(input_dir, files['aopres_file']), 'w') as f:
+        f.write(header)
+        values = ' '.join(f'{0.001 + 0.00001 * j:.6f}' for j in range(1568))
+        for k in range(records):
+            f.write(f'20231011 10{k:02d}00 {values}\n')
+    with open(os.path.join(input_dir, files['wqp_file']), 'w') as f:
+        f.write(header)
+        for k in range(records):
+            f.write(f'20231011 10{k:02d}00 {1 + k * 0.1:.3f} {0.5 + k * 0.01:.3f} {10 + k:.3f}\n')
+    with open(os.path.join(input_dir, files['aot_file']), 'w') as f:
+        f.write(header)
+        for k in range(records):
+            columns = (['2023-10-11', f'10:{k:02d}:00'] + [f'{0.1 * j:.3f}' for j in range(5)] +
+                       [f'{0.2 + 0.01 * k:.3f}', '1', '2', '3', str(k % 2)])
+            f.write(' '.join(columns) + '\n')
+    with open(os.path.join(input_dir, files['ctd_file']), 'w') as f:
+        f.write(header)
+        for k in range(records):
+            f.write(f'20231011 10{k:02d}00 1.0 {20 + k * 0.1:.3f}\n')
+    return files
+
+def make_synthetic_inputs(input_dir, rows, cols, source_rows, source_cols, seed=0, cloud=0.1):
+    """生成全部合成输入文件，返回 {配置节: {配置键: 文件名}}"""
+    os.makedirs(input_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    return {
+        'HY3A': write_hy_granules(input_dir, rows, cols, rng, cloud),
+        'TERRA': write_modis_granules(input_dir, source_rows, source_cols, rng, cloud),
+        'XC': write_xc_files(input_dir),
+    }
+
+def default_font_path(config):
+    """优先使用配置中的字体，不存在时使用matplotlib自带的DejaVuSans"""
+    font_path = config['font']['font_path']
+    if os.path.exists(font_path):
+        return font_path
+    import matplotlib
+    return os.path.join(matplotlib.get_data_path(), 'fonts', 'ttf', 'DejaVuSans.ttf')
+
+def benchmark_config(input_dir, output_dir, source_type, files, workers=1, font_path=None):
+    """以config.ini为模板生成基准测试配置"""
+    config = configparser.ConfigParser()
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini'), 'r', encoding='utf-8') as f:
+        config.read_file(f)
+    config['PATH']['input_dir'] = input_dir
+    config['PATH']['output_dir'] = output_dir
+    config['VALIDATION']['source_type'] = source_type
+    config['PARAMS']['workers'] = str(workers)
+    config['PARAMS']['profile'] = 'false'
+    config['font']['font_path'] = font_path or default_font_path(config)
+    for section, values in files.items():
+        if section not in config:
+            config[section] = {}
+        for key, filename in values.items():
+            config[section][key] = filename
+    return config
+
+def benchmark_pipeline(rows=2000, cols=200, source_rows=None, source_cols=None, sources=('TERRA', 'XC'),
+                       workers=1, work_dir=None, font_path=None, result_file=None, seed=0):
+    """
+    生成合成数据并运行完整检验流程，统计各阶段耗时与吞吐量(HY3A像元/秒)
+    result_file不为空时将结果追加到该CSV文件，便于跟踪多次运行的变化
+    """
+    source_rows = source_rows or rows
+    source_cols = source_cols or cols
+    if not any((rows * cols) % i == 0 for i in range(1000, 6000)):
+        print(f"警告: {rows}x{cols}像元数在1000~5999之间没有因数，流程无法还原二维形状")
+    pixels = rows * cols
+    temp_dir = None
+    if work_dir is None:
+        temp_dir = work_dir = tempfile.mkdtemp(prefix='hy_benchmark_')
+
+    results = []
+    try:
+        input_dir = os.path.join(work_dir, 'input')
+        print(f"\n生成合成数据: HY3A {rows}x{cols}, 检验源 {source_rows}x{source_cols}")
+        start = time.perf_counter()
+        files = make_synthetic_inputs(input_dir, rows, cols, source_rows, source_cols, seed)
+        print(f"合成数据生成耗时: {time.perf_counter() - start:.2f}s")
+
+        for source_type in sources:
+            output_dir = os.path.join(work_dir, f'output_{source_type}')
+            shutil.rmtree(output_dir, ignore_errors=True)
+            config = benchmark_config(input_dir, output_dir, source_type, files, workers, font_path)
+
+            start = time.perf_counter()
+            setup.run_check(config, force=True)
+            total = time.perf_counter() - start
+
+            stages = [record for record in setup._profiler.records if not record['parent']]
+            stages.append({'name': 'total', 'wall_s': total, 'cpu_s': None, 'peak_rss_mb': None})
+            for record in stages:
+                results.append({
+                    'time': datetime.now().strftime('%Y%m%d%H%M%S'),
+                    'source': source_type,
+                    'rows': rows,
+                    'cols': cols,
+                    'workers': workers,
+                    'stage': record['name'],
+                    'wall_s': round(record['wall_s'], 4),
+                    'cpu_s': round(record['cpu_s'], 4) if record['cpu_s'] is not None else None,
+                    'peak_rss_mb': record['peak_rss_mb'],
+                    'pixels_per_s': round(pixels / record['wall_s']) if record['wall_s'] > 0 else None,
+                })
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    print(f"\n检验流程各阶段耗时: HY3A {rows}x{cols} ({pixels}像元), workers={workers}")
+    print(f"{'检验源':<6} {'阶段':<14} {'墙钟(s)':>9} {'CPU(s)':>9} {'峰值内存(MB)':>12} {'像元/秒':>12}")
+    for item in results:
+        cpu = f"{item['cpu_s']:.3f}" if item['cpu_s'] is not None else '-'
+        rss = f"{item['peak_rss_mb']:.0f}" if item['peak_rss_mb'] is not None else '-'
+        rate = f"{item['pixels_per_s']}" if item['pixels_per_s'] is not None else '-'
+        print(f"{item['source']:<6} {item['stage']:<14} {item['wall_s']:>9.3f} {cpu:>9} {rss:>12} {rate:>12}")
+
+    if result_file:
+        exists = os.path.exists(result_file)
+        with open(result_file, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            if not exists:
+                writer.writeheader()
+            writer.writerows(results)
+        print(f"结果已追加到: {result_file}")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='HY3A检验流程基准测试')
+    subparsers = parser.add_subparsers(dest='command')
+
+    txt_parser = subparsers.add_parser('txt', help='HY3A文本写入：逐值实现与批量格式化实现对比（输出字节一致性）')
+    txt_parser.add_argument('--size', type=int, default=200000)
+    txt_parser.add_argument('--seed', type=int, default=0)
+
+    window_parser = subparsers.add_parser('window', help='空间窗口判断：循环实现与向量化实现对比')
+    window_parser.add_argument('--rows', type=int, default=1000)
+    window_parser.add_argument('--cols', type=int, default=300)
+
+    spacematch_parser = subparsers.add_parser('spacematch', help='空间匹配插值：整景插值与只插值未标识像元对比')
+    spacematch_parser.add_argument('--rows', type=int, default=1000)
+    spacematch_parser.add_argument('--cols', type=int, default=200)
+
+    pipeline_parser = subparsers.add_parser('pipeline', help='合成数据上的完整检验流程分阶段计时')
+    pipeline_parser.add_argument('--rows', type=int, default=2000, help='HY3A景行数')
+    pipeline_parser.add_argument('--cols', type=int, default=200, help='HY3A景列数')
+    pipeline_parser.add_argument('--source-rows', type=int, default=None, help='检验源景行数（默认同HY3A）')
+    pipeline_parser.add_argument('--source-cols', type=int, default=None, help='检验源景列数（默认同HY3A）')
+    pipeline_parser.add_argument('--sources', nargs='+', default=['TERRA', 'XC'], choices=['TERRA', 'XC'])
+    pipeline_parser.add_argument('--workers', type=int, default=1)
+    pipeline_parser.add_argument('--work-dir', default=None, help='合成数据与输出目录（默认使用临时目录并在结束后删除）')
+    pipeline_parser.add_argument('--font', default=None, help='报告字体路径')
+    pipeline_parser.add_argument('--result-file', default=None, help='追加保存结果的CSV文件')
+    pipeline_parser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == 'txt':
+        if not benchmark_hy_txt(args.size, args.seed):
+            raise SystemExit("HY3A文本写入结果与逐值实现不一致")
+    elif args.command == 'window':
+        benchmark_spatial_window(args.rows, args.cols)
+    elif args.command == 'spacematch':
+        benchmark_spacematch(args.rows, args.cols)
+    else:
+        if args.command is None:
+            args = pipeline_parser.parse_args([])
+        benchmark_pipeline(args.rows, args.cols, args.source_rows, args.source_cols, args.sources,
+                           args.workers, args.work_dir, args.font, args.result_file, args.seed)
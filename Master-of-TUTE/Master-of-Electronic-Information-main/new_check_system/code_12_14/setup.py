@@ -1,18 +1,32 @@
 import os
-import glob
+import sys
+import csv
+import time
+import argparse
+import fnmatch
+import functools
+import hashlib
+import json
+import sqlite3
 import configparser
 import h5py
 import netCDF4 as nc
 import numpy as np
 import pandas as pd
 import traceback
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime, timedelta
-from scipy import interpolate
 import re
 import matplotlib.pyplot as plt
+from matplotlib import font_manager
+from matplotlib.path import Path
+from matplotlib.transforms import Bbox
 import random
 from mpl_toolkits.basemap import Basemap
 from scipy.interpolate import griddata
+from scipy.spatial import Delaunay, cKDTree
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfbase import pdfmetrics
@@ -22,156 +36,1121 @@ from reportlab.platypus import Table, TableStyle
 from reportlab.lib.utils import ImageReader  
 from reportlab.lib import colors
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
 def load_config():
     """加载配置文件"""
     config = configparser.ConfigParser()
     config.read('config.ini')
     return config
 
-def run_check(config):
-    """运行检验流程"""
+def run_check(config, force=False):
+    """运行检验流程，输入与相关配置均未变化的阶段将被跳过（force为True时全部重新运行）"""
     try:
         # 获取配置参数
-        input_dir = config['PATH']['input_dir']
         output_dir = config['PATH']['output_dir']
-        window_size = int(config['PARAMS']['window_size'])
-        time_threshold = int(config['PARAMS']['time_threshold'])
         source_type = config['VALIDATION']['source_type']
-        font_path = config['font']['font_path']
+        intermediate_format = config['PARAMS'].get('intermediate_format', 'npy')
+        export_txt = config['PARAMS'].getboolean('export_txt', fallback=False)
+        scene_cache_mb = config['PARAMS'].getint('scene_cache_mb', fallback=1024)
+        incremental = config['PARAMS'].getboolean('incremental', fallback=True)
+        profile = config['PARAMS'].getboolean('profile', fallback=True)
+        plot_workers = config['PARAMS'].getint('plot_workers', fallback=config['PARAMS'].getint('workers', fallback=1))
 
 
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
+        configure_intermediate_store(output_dir, intermediate_format, export_txt)
+        configure_scene_cache(scene_cache_mb)
+        configure_figure_renderer(plot_workers)
+        reset_profiler()
         
         print(f"\n=== 开始数据检验流程: HY3A vs {source_type} ===")
-        
-        # 步骤1：处理HY3A数据
+
+        stages = build_check_stages(config)
+        completed = run_pipeline(stages, config, output_dir, force=force or not incremental)
+        get_figure_renderer().close()
+        clear_scene_cache()
+        if profile:
+            write_run_profile(output_dir, f'HY3A_{source_type}')
+
+        if not completed:
+            print(f"\n=== HY3A vs {source_type} 数据检验流程已终止 ===")
+            return False
+        print(f"\n=== HY3A vs {source_type} 数据检验流程完成 ===")
+        return True
+    
+
+    except Exception as e:
+        print(f"检验流程执行失败: {str(e)}")
+        traceback.print_exc()
+        return False
+
+
+# 运行性能记录
+def process_usage():
+    """
+    当前进程的峰值常驻内存(MB)和累计读写字节数，无法获取的项为None
+    优先使用psutil，否则在Linux上读取resource和/proc/self/io
+    """
+    peak_rss_mb = read_bytes = write_bytes = None
+    if resource is not None:
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux单位为KB，macOS为字节
+        peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == 'darwin' else peak_rss / 1024
+    if psutil is not None:
+        process = psutil.Process()
+        if peak_rss_mb is None:
+            memory = process.memory_info()
+            peak_rss_mb = getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024)
+        if hasattr(process, 'io_counters'):
+            io = process.io_counters()
+            read_bytes = getattr(io, 'read_chars', io.read_bytes)
+            write_bytes = getattr(io, 'write_chars', io.write_bytes)
+    if read_bytes is None and os.path.exists('/proc/self/io'):
+        with open('/proc/self/io', 'r') as f:
+            counters = dict(line.split(':') for line in f if ':' in line)
+        read_bytes = int(counters['rchar'])
+        write_bytes = int(counters['wchar'])
+    return peak_rss_mb, read_bytes, write_bytes
+
+class RunProfiler:
+    """
+    记录各阶段及热点函数的墙钟时间、CPU时间、峰值内存和读写字节数
+    （子进程中的耗时只计入外层阶段的墙钟时间）
+    """
+    FIELDS = ['name', 'parent', 'tags', 'wall_s', 'cpu_s', 'peak_rss_mb', 'read_bytes', 'write_bytes']
+
+    def __init__(self):
+        self.records = []
+        self.stack = []
+
+    @contextmanager
+    def section(self, name, **tags):
+        parent = self.stack[-1] if self.stack else ''
+        self.stack.append(name)
+        _, read_start, write_start = process_usage()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            peak_rss_mb, read_end, write_end = process_usage()
+            self.stack.pop()
+            self.records.append({
+                'name': name,
+                'parent': parent,
+                'tags': ';'.join(f'{key}={value}' for key, value in tags.items()),
+                'wall_s': round(wall, 6),
+                'cpu_s': round(cpu, 6),
+                'peak_rss_mb': round(peak_rss_mb, 1) if peak_rss_mb is not None else None,
+                'read_bytes': read_end - read_start if read_start is not None else None,
+                'write_bytes': write_end - write_start if write_start is not None else None,
+            })
+
+    def summary(self):
+        """按名称汇总调用次数与耗时"""
+        summary = {}
+        for record in self.records:
+            item = summary.setdefault(record['name'], {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0,
+                                                       'read_bytes': 0, 'write_bytes': 0})
+            item['calls'] += 1
+            item['wall_s'] = round(item['wall_s'] + record['wall_s'], 6)
+            item['cpu_s'] = round(item['cpu_s'] + record['cpu_s'], 6)
+            item['read_bytes'] += record['read_bytes'] or 0
+            item['write_bytes'] += record['write_bytes'] or 0
+        return summary
+
+    def write(self, output_dir, label):
+        """将记录写入run_profile_{label}_{时间}.json/.csv"""
+        base = os.path.join(output_dir, f'run_profile_{label}_{datetime.now().strftime("%Y%m%d%H%M%S")}')
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'records': self.records, 'summary': self.summary()}, f, ensure_ascii=False, indent=2)
+        with open(base + '.csv', 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=self.FIELDS)
+            writer.writeheader()
+            writer.writerows(self.records)
+        return base
+
+_profiler = RunProfiler()
+
+def reset_profiler():
+    """开始新的运行记录"""
+    global _profiler
+    _profiler = RunProfiler()
+
+def profile_section(name, **tags):
+    """记录代码块的运行开销，用法: with profile_section('名称', file=...):"""
+    return _profiler.section(name, **tags)
+
+def profiled(function):
+    """记录函数每次调用的运行开销，名称取函数限定名（如step7.plot_error_map）"""
+    name = function.__qualname__.replace('.<locals>', '')
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with _profiler.section(name):
+            return function(*args, **kwargs)
+    return wrapper
+
+def write_run_profile(output_dir, label):
+    """写出本次运行的性能记录"""
+    try:
+        base = _profiler.write(output_dir, label)
+        print(f"运行性能记录已保存: {base}.json / .csv")
+    except Exception as e:
+        print(f"保存运行性能记录失败: {e}")
+
+
+# 流水线阶段调度
+PIPELINE_STATE_FILE = 'pipeline_state.json'
+
+class PipelineStage:
+    """
+    流水线阶段
+    name: 阶段名称
+    run: 无参数的执行函数，返回False/None表示失败
+    deps: 依赖的上游阶段名称
+    inputs: 外部输入文件（按内容哈希）
+    outputs: 输出文件名模式（fnmatch），用于记录本阶段生成的文件
+    config_keys: 影响本阶段结果的配置项，格式为'节.键'
+    abort_on_failure: 失败时跳过所有下游阶段
+    """
+    def __init__(self, name, run, deps=(), inputs=(), outputs=(), config_keys=(), abort_on_failure=False):
+        self.name = name
+        self.run = run
+        self.deps = list(deps)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.config_keys = list(config_keys)
+        self.abort_on_failure = abort_on_failure
+
+    def fingerprint(self, config, dep_fingerprints, file_hashes):
+        """由配置项、外部输入文件哈希和上游阶段指纹计算本阶段指纹"""
+        digest = hashlib.sha1(self.name.encode())
+        for key in self.config_keys:
+            section, option = key.split('.', 1)
+            digest.update(f'{key}={config.get(section, option, fallback=None)}\n'.encode())
+        for path in self.inputs:
+            digest.update(f'{os.path.basename(path)}={hash_file(path, file_hashes)}\n'.encode())
+        for dep in self.deps:
+            digest.update(f'{dep}={dep_fingerprints[dep]}\n'.encode())
+        return digest.hexdigest()
+
+def hash_file(path, file_hashes):
+    """计算文件内容哈希，大小和修改时间未变的文件复用file_hashes中记录的结果"""
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    cached = file_hashes.get(key)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    file_hashes[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+    return file_hashes[key][2]
+
+def sort_stages(stages):
+    """按依赖关系对阶段进行拓扑排序（同层保持声明顺序）"""
+    by_name = {stage.name: stage for stage in stages}
+    ordered, visiting, done = [], set(), set()
+
+    def visit(stage):
+        if stage.name in done:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"阶段依赖存在环: {stage.name}")
+        visiting.add(stage.name)
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"阶段 {stage.name} 依赖未定义的阶段 {dep}")
+            visit(by_name[dep])
+        visiting.discard(stage.name)
+        done.add(stage.name)
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+def snapshot_files(directory):
+    """记录目录下文件的(大小, 修改时间)"""
+    snapshot = {}
+    for entry in os.scandir(directory):
+        if entry.is_file():
+            stat = entry.stat()
+            snapshot[entry.name] = [stat.st_size, stat.st_mtime_ns]
+    return snapshot
+
+def run_pipeline(stages, config, output_dir, force=False):
+    """
+    按依赖顺序执行各阶段；指纹与上次成功运行一致且输出文件未被改动的阶段直接跳过，
+    阶段状态保存在输出目录的pipeline_state.json中；
+    abort_on_failure的阶段失败时其下游阶段不再执行，此时返回False；
+    阶段中提交的异步渲染图件在全部阶段结束后等待完成，并补记为所属阶段的输出
+    """
+    state_path = os.path.join(output_dir, PIPELINE_STATE_FILE)
+    state = {'stages': {}, 'file_hashes': {}}
+    if os.path.exists(state_path):
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"读取阶段状态失败，将重新运行全部阶段: {e}")
+
+    def save_state():
+        with open(state_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+
+    fingerprints = {}
+    failed = set()
+    renderer = get_figure_renderer()
+    submitted = {}
+    catalog = get_run_catalog(output_dir)
+    catalog.refresh()
+    for stage in sort_stages(stages):
+        if failed.intersection(stage.deps):
+            print(f"\n阶段 {stage.name} 的上游阶段未成功，跳过")
+            failed.add(stage.name)
+            continue
+        fingerprint = stage.fingerprint(config, fingerprints, state['file_hashes'])
+        fingerprints[stage.name] = fingerprint
+        previous = state['stages'].get(stage.name)
+
+        if not force and previous and previous['fingerprint'] == fingerprint:
+            current = snapshot_files(output_dir)
+            if all(current.get(name) == signature for name, signature in previous['outputs'].items()):
+                print(f"\n阶段 {stage.name} 输入和参数未变化，跳过")
+                with profile_section(stage.name, skipped=True):
+                    pass
+                continue
+
+        before = snapshot_files(output_dir)
+        with profile_section(stage.name):
+            result = stage.run()
+        catalog.refresh()
+        after = snapshot_files(output_dir)
+        submitted[stage.name] = (stage, renderer.take_submitted())
+
+        if result is False or result is None:
+            print(f"阶段 {stage.name} 执行失败")
+            state['stages'].pop(stage.name, None)
+            if stage.abort_on_failure:
+                failed.add(stage.name)
+        else:
+            outputs = {name: signature for name, signature in after.items()
+                       if before.get(name) != signature and
+                       any(fnmatch.fnmatch(name, pattern) for pattern in stage.outputs)}
+            state['stages'][stage.name] = {'fingerprint': fingerprint, 'outputs': outputs}
+        save_state()
+
+    with profile_section('render_wait'):
+        rendered = set(renderer.wait())
+    current = snapshot_files(output_dir)
+    for stage, paths in submitted.values():
+        record = state['stages'].get(stage.name)
+        if record is None:
+            continue
+        for path in paths:
+            name = os.path.basename(path)
+            if path in rendered and name in current and \
+                    any(fnmatch.fnmatch(name, pattern) for pattern in stage.outputs):
+                record['outputs'][name] = current[name]
+    save_state()
+    return not failed
+
+def build_check_stages(config):
+    """
+    构建检验流程的阶段依赖图：
+    覆盖范围预检（卫星检验源） -> 数据读取 -> 标识检查 -> 时间匹配 -> 空间匹配 -> 验证结果 -> 误差地图/折线图/统计 -> 报告
+    """
+    input_dir = config['PATH']['input_dir']
+    output_dir = config['PATH']['output_dir']
+    window_size = int(config['PARAMS']['window_size'])
+    time_threshold = int(config['PARAMS']['time_threshold'])
+    source_type = config['VALIDATION']['source_type']
+    font_path = config['font']['font_path']
+    workers = config['PARAMS'].getint('workers', fallback=1)
+    memory_budget_mb = config['PARAMS'].getint('memory_budget_mb', fallback=1024)
+    land_mask = config['PARAMS'].getboolean('land_mask', fallback=False)
+    store_keys = ['PARAMS.intermediate_format', 'PARAMS.export_txt', 'PARAMS.roi']
+    roi = parse_roi(config['PARAMS'].get('roi', ''))
+    if roi == 'overlap' and source_type == 'XC':
+        print("现场数据检验不进行覆盖范围预检，ROI配置overlap无效")
+        roi = None
+
+    hy_files = [os.path.join(input_dir, config['HY3A'][key]) for key in ['l2a_file', 'l2b_file', 'l2c_file']]
+    if source_type == 'XC':
+        # 现场数据每类可配置多个站点文件（逗号分隔）
+        source_keys = ['aopres_file', 'wqp_file', 'aot_file', 'ctd_file']
+        source_groups = [[os.path.join(input_dir, name.strip()) for name in config['XC'][key].split(',') if name.strip()]
+                         for key in source_keys]
+        source_files = [path for group in source_groups for path in group]
+    else:
+        source_keys = ['oc_file', 'sst_file']
+        source_files = [os.path.join(input_dir, config[source_type][key]) for key in source_keys]
+    source_prefix = 'XC' if source_type == 'XC' else source_type
+
+    # 步骤0：轨道覆盖范围预检（仅卫星检验源）
+    def overlap_check():
+        print("\n执行覆盖范围预检...")
+        return check_swath_overlap(hy_files[0], source_files[0], output_dir)
+
+    # 步骤1：处理HY3A数据
+    def ingest_hy():
         print("\n处理HY3A数据...")
-        process_hy_data(
-            hy_file_l2a=os.path.join(input_dir, config['HY3A']['l2a_file']),
-            hy_file_l2b=os.path.join(input_dir, config['HY3A']['l2b_file']),
-            hy_file_l2c=os.path.join(input_dir, config['HY3A']['l2c_file']),
-            output_dir=output_dir
-        )
-        
-        # 步骤2：处理检验源数据
+        return process_hy_data(*hy_files, output_dir=output_dir, workers=workers,
+                               memory_budget_mb=memory_budget_mb, roi=resolve_roi(roi, output_dir))
+
+    # 步骤2：处理检验源数据
+    def ingest_source():
         if source_type == 'XC':
             print("\n处理现场数据...")
-            process_xc_check_data(
-                aopres_file=os.path.join(input_dir, config['XC']['aopres_file']),
-                wqp_file=os.path.join(input_dir, config['XC']['wqp_file']),
-                aot_file=os.path.join(input_dir, config['XC']['aot_file']),
-                ctd_file=os.path.join(input_dir, config['XC']['ctd_file']),
-                output_dir=output_dir
-            )
-        else:
-            print(f"\n处理{source_type}卫星数据...")
-            process_satellite_check_data(
-                oc_file=os.path.join(input_dir, config[source_type]['oc_file']),
-                sst_file=os.path.join(input_dir, config[source_type]['sst_file']),
-                output_dir=output_dir
-            )
-        
-        # 步骤3：标识检查
+            return process_xc_check_data(*source_groups, output_dir=output_dir)
+        print(f"\n处理{source_type}卫星数据...")
+        return process_satellite_check_data(*source_files, output_dir=output_dir,
+                                            roi=resolve_roi(roi, output_dir))
+
+    # 步骤3：标识检查
+    def flag_check():
         print("\n执行标识检查...")
-        HY3A_flag_create(output_dir, window_size)
+        if HY3A_flag_create(output_dir, window_size, land_mask) is None:
+            return False
         if source_type == 'XC':
-            process_xc_flagcheck_data(output_dir, output_dir)
-        else:
-            satellite_flag_create(output_dir, source_type, window_size)
-        
-        # 步骤4：时间匹配
+            return process_xc_flagcheck_data(output_dir, output_dir)
+        return satellite_flag_create(output_dir, source_type, window_size, land_mask) is not None
+
+    # 步骤4：时间匹配
+    def timematch():
         print("\n执行时间匹配...")
         if source_type == 'XC':
-            process_xc_timematch(output_dir, output_dir, 'HY3A', time_threshold)
-        else:
-            process_satellite_timematch(output_dir, output_dir, 'HY3A', source_type, time_threshold)
-        
-        # 步骤5：空间匹配
+            return process_xc_timematch(output_dir, output_dir, 'HY3A', time_threshold)
+        return process_satellite_timematch(output_dir, output_dir, 'HY3A', source_type, time_threshold)
+
+    # 步骤5：空间匹配
+    def spacematch():
         print("\n执行空间匹配...")
         if source_type == 'XC':
-            process_xc_spacematch(output_dir, output_dir, 'HY3A', window_size)
-        else:
-            process_satellite_spacematch(output_dir, output_dir, 'HY3A', source_type)
-        
-        # 步骤6：生成验证结果
+            return process_xc_spacematch(output_dir, output_dir, 'HY3A', window_size, time_threshold)
+        return process_satellite_spacematch(output_dir, output_dir, 'HY3A', source_type, workers)
+
+    # 步骤6：生成验证结果
+    def validation():
         print("\n生成验证结果...")
         if source_type == 'XC':
-            xc_validation(output_dir, output_dir)
-        else:
-            satellite_validation(output_dir, output_dir)
-        
-        # 步骤7：生成误差地图
+            return xc_validation(output_dir, output_dir, workers)
+        return satellite_validation(output_dir, output_dir, workers)
+
+    # 步骤7：生成误差地图
+    def error_map():
         print("\n生成误差地图...")
-        if source_type != 'XC':
-            step7(output_dir, output_dir)
+        step7(output_dir, output_dir)
+        return True
 
-        # 步骤8：生成折线图
+    # 步骤8：生成折线图
+    def timeseries():
         step8(output_dir, output_dir)
+        return True
 
-        # 步骤9：生成统计结果和图表
+    # 步骤9：生成统计结果和图表
+    def statistics():
         step9(output_dir, output_dir)
+        return True
 
-        # 步骤10：生成报告所需数据report文件
+    # 步骤10：生成报告所需数据report文件
+    def report_data():
         if source_type == 'XC':
-
             make_ground_report_data(output_dir)
-
         else:
-
             make_satellite_report_data(output_dir)
-        # 步骤11：生成报告
+        return True
 
+    # 步骤11：生成报告（只等待报告中用到的图件渲染完成）
+    def report():
         if source_type == 'XC':
-
+            get_figure_renderer().wait(['timestastic_*.jpg', 'valstastic_*.jpg'])
             create_xc_report(output_dir, output_dir, font_path, time_threshold)
+        else:
+            get_figure_renderer().wait(['map_*.jpg', 'valstastic_*.jpg'])
+            create_satellite_report(output_dir, output_dir, font_path, time_threshold, window_size)
+        return True
+
+    # 步骤12：异常检测并生成日志
+    def error_check():
+        check_validation_errors(output_dir)
+        process_reports(output_dir)
+        return True
 
+    flag_outputs = ['HY3A_flag1_*', 'XCf_*'] if source_type == 'XC' else ['HY3A_flag1_*', f'{source_type}_flag1_*']
+    ingest_deps = [] if source_type == 'XC' else ['overlap']
+    # 现场数据的时间匹配读取标识检查生成的XCf_*文件，标识检查失败时不再继续
+    timematch_deps = ['ingest_hy', 'ingest_source'] + (['flag'] if source_type == 'XC' else [])
+    stages = [
+        PipelineStage('ingest_hy', ingest_hy, deps=ingest_deps, inputs=hy_files,
+                      outputs=['HY3A_*'], config_keys=store_keys),
+        PipelineStage('ingest_source', ingest_source, deps=ingest_deps, inputs=source_files,
+                      outputs=[f'{source_prefix}_*'], config_keys=store_keys + ['VALIDATION.source_type']),
+        PipelineStage('flag', flag_check, deps=['ingest_hy', 'ingest_source'],
+                      outputs=flag_outputs, config_keys=['PARAMS.window_size', 'PARAMS.land_mask'],
+                      abort_on_failure=source_type == 'XC'),
+        PipelineStage('timematch', timematch, deps=timematch_deps,
+                      outputs=['timeresult_*', 'timesize.txt'], config_keys=['PARAMS.time_threshold']),
+        PipelineStage('spacematch', spacematch, deps=['flag', 'timematch'],
+                      outputs=['spaceresult_*', 'matchup_*', f'{source_prefix}1_*', 'HY3A_flag1_*'],
+                      config_keys=['PARAMS.window_size', 'PARAMS.time_threshold']),
+        PipelineStage('validation', validation, deps=['spacematch'],
+                      outputs=['valresult_*', 'statistic_*']),
+        PipelineStage('timeseries', timeseries, deps=['validation'], outputs=['timeseries_*']),
+        PipelineStage('statistics', statistics, deps=['validation'], outputs=['*stastic_*']),
+        PipelineStage('report_data', report_data, deps=['statistics'], outputs=['report_*']),
+    ]
+    report_deps = ['report_data', 'timeseries']
+    if source_type != 'XC':
+        stages.insert(0, PipelineStage('overlap', overlap_check, inputs=[hy_files[0], source_files[0]],
+                                       outputs=[SWATH_OVERLAP_FILE], abort_on_failure=True))
+        stages.insert(-3, PipelineStage('error_map', error_map, deps=['validation'], outputs=['map_*']))
+        report_deps.append('error_map')
+    stages += [
+        PipelineStage('report', report, deps=report_deps, outputs=['*.pdf'],
+                      config_keys=['font.font_path', 'PARAMS.time_threshold', 'PARAMS.window_size']),
+        PipelineStage('error_check', error_check, deps=['report'],
+                      outputs=['error_summary_*', 'log_*']),
+    ]
+    return stages
+
+
+# 中间数据存储
+INTERMEDIATE_FORMATS = ('npy', 'txt')
+_intermediate_stores = {}
+
+HY_TXT_FORMATS = np.array(['%.6f\n', '%.0f\n', '0.000000\n', '-999.000000\n'], dtype=object)
+
+def hy_value_codes(flattened_data):
+    """按HY3A文本格式规则对数值分类：0常规值，1大数值，2零值，3填充值"""
+    codes = np.zeros(flattened_data.shape, dtype=np.int8)
+    codes[np.abs(flattened_data) >= 1000000] = 1
+    codes[np.abs(flattened_data) < 0.000001] = 2
+    codes[np.abs(flattened_data + 9.9) < 0.0001] = 3
+    return codes
+
+def format_hy_values(flattened_data):
+    """批量格式化HY3A数值，输出与逐值写入完全一致"""
+    codes = hy_value_codes(flattened_data)
+    template = ''.join(HY_TXT_FORMATS[codes].tolist())
+    return template % tuple(flattened_data[codes < 2].tolist())
+
+def write_hy_txt(f, data, chunk_size=1000000):
+    """将HY3A数据按块格式化写入已打开的txt文件"""
+    flattened_data = np.asarray(data).reshape(-1)
+    for start in range(0, flattened_data.size, chunk_size):
+        f.write(format_hy_values(flattened_data[start:start + chunk_size]))
+
+def write_satellite_txt(f, data):
+    """将卫星数据逐值写入已打开的txt文件"""
+    for value in data.flatten():
+        f.write(f'{value}\n')
+
+def normalize_hy_values(data):
+    """按HY3A文本格式规则处理数值，使二进制存储与txt读回的数值一致"""
+    flattened_data = np.asarray(data).reshape(-1)
+    codes = hy_value_codes(flattened_data)
+    values = flattened_data.astype(np.float64)
+    result = np.round(values, 6)
+    result[codes == 1] = np.round(values[codes == 1])
+    result[codes == 2] = 0.0
+    result[codes == 3] = -999.0
+    return result
+
+class IntermediateStore:
+    """
+    中间数据存储
+    以原txt文件名（传感器_产品_时间.txt）为键保存单列数组：
+    npy格式下每个数组保存为同名.npy文件，txt格式保持原逐行文本；
+    export_txt为True时npy格式额外导出txt文件
+    """
+    def __init__(self, root, fmt='npy', export_txt=False):
+        if fmt not in INTERMEDIATE_FORMATS:
+            raise ValueError(f"不支持的中间数据格式: {fmt}")
+        self.root = root
+        self.fmt = fmt
+        self.export_txt = export_txt
+
+    def _txt_path(self, name):
+        return os.path.join(self.root, name)
+
+    def _npy_path(self, name):
+        return os.path.join(self.root, os.path.splitext(name)[0] + '.npy')
+
+    def save(self, name, data, fmt='repr'):
+        """
+        保存数组
+        fmt: 'hy'为HY3A格式规则，'repr'为卫星原始数值（掩膜值读回为nan），
+             其余为np.savetxt格式字符串（如'%d'、'%.6f'）
+        """
+        if self.fmt == 'txt' or self.export_txt:
+            with open(self._txt_path(name), 'w', buffering=1 << 20) as f:
+                self._write_txt(f, data, fmt)
+        if self.fmt == 'npy':
+            np.save(self._npy_path(name), self._to_array(data, fmt))
+        get_run_catalog(self.root).add(name)
+
+    def save_blocks(self, name, blocks, size, fmt='hy'):
+        """
+        按块保存数组，blocks依次产生行方向的数据块，size为总元素数；
+        npy格式写入预分配的内存映射文件，各块数据类型需一致
+        """
+        write_txt = self.fmt == 'txt' or self.export_txt
+        txt_file = open(self._txt_path(name), 'w', buffering=1 << 20) if write_txt else None
+        npy_array = None
+        offset = 0
+        try:
+            for block in blocks:
+                if txt_file:
+                    self._write_txt(txt_file, block, fmt)
+                if self.fmt == 'npy':
+                    values = self._to_array(block, fmt)
+                    if npy_array is None:
+                        npy_array = np.lib.format.open_memmap(self._npy_path(name), mode='w+',
+                                                              dtype=values.dtype, shape=(size,))
+                    npy_array[offset:offset + values.size] = values
+                    offset += values.size
+        finally:
+            if txt_file:
+                txt_file.close()
+        if npy_array is not None:
+            npy_array.flush()
+            del npy_array
+        elif self.fmt == 'npy':
+            np.save(self._npy_path(name), np.zeros(0))
+        get_run_catalog(self.root).add(name)
+
+    def _write_txt(self, f, data, fmt):
+        if fmt == 'hy':
+            write_hy_txt(f, data)
+        elif fmt == 'repr':
+            write_satellite_txt(f, data)
+        else:
+            np.savetxt(f, data, fmt=fmt)
+
+    def _to_array(self, data, fmt):
+        """转换为与txt读回结果数值一致的一维数组"""
+        if fmt == 'hy':
+            return normalize_hy_values(data)
+        if fmt == 'repr':
+            data = np.ma.asarray(data).reshape(-1)
+            if np.ma.is_masked(data):
+                return np.ma.filled(data.astype(np.float64), np.nan)
+            return np.ma.getdata(data)
+        if fmt == '%d':
+            return np.asarray(data).reshape(-1).astype(np.int32)
+        decimals = re.fullmatch(r'%\.(\d+)f', fmt)
+        if decimals:
+            return np.round(np.asarray(data, dtype=np.float64).reshape(-1), int(decimals.group(1)))
+        return np.asarray(data).reshape(-1)
+
+    def exists(self, name):
+        return os.path.exists(self._npy_path(name)) or os.path.exists(self._txt_path(name))
+
+    def load(self, name, dtype=None, mmap=False):
+        """读取数组，默认返回float64（与np.genfromtxt一致）"""
+        npy_path = self._npy_path(name)
+        txt_path = self._txt_path(name)
+        use_npy = os.path.exists(npy_path) and (self.fmt == 'npy' or not os.path.exists(txt_path))
+        if use_npy:
+            if mmap:
+                # 以只读内存映射方式读取，多个进程共享同一份页缓存
+                array = np.load(npy_path, mmap_mode='r')
+                if array.dtype == np.dtype(dtype or np.float64):
+                    return array
+            return np.load(npy_path).astype(dtype or np.float64, copy=False)
+        if dtype is None:
+            return np.genfromtxt(txt_path, delimiter=None)
+        return np.genfromtxt(txt_path, delimiter=None, dtype=dtype)
+
+    def listdir(self):
+        """列出目录文件，.npy中间文件以其txt文件名列出"""
+        return get_run_catalog(self.root).names()
+
+def configure_intermediate_store(directory, fmt='npy', export_txt=False):
+    """为输出目录配置中间数据存储"""
+    store = IntermediateStore(directory, fmt, export_txt)
+    _intermediate_stores[os.path.abspath(directory)] = store
+    return store
+
+def get_intermediate_store(directory):
+    """获取目录对应的中间数据存储，未配置时使用默认npy格式"""
+    key = os.path.abspath(directory)
+    if key not in _intermediate_stores:
+        _intermediate_stores[key] = IntermediateStore(directory)
+    return _intermediate_stores[key]
+
+def save_intermediate(path, data, fmt='repr'):
+    """按文件路径保存中间数组"""
+    _scene_cache.invalidate(path)
+    with profile_section('save_intermediate', file=os.path.basename(path)):
+        get_intermediate_store(os.path.dirname(path)).save(os.path.basename(path), data, fmt)
+
+def load_intermediate(path, dtype=None, mmap=False):
+    """按文件路径读取中间数组"""
+    with profile_section('load_intermediate', file=os.path.basename(path)):
+        return get_intermediate_store(os.path.dirname(path)).load(os.path.basename(path), dtype, mmap)
+
+# 输出目录文件索引
+# 结果类文件名: {类别}_{目标传感器}_{检验源}_{产品}_{时间}
+RESULT_FILE_KINDS = ('timeresult', 'spaceresult', 'matchup', 'valresult', 'map', 'timeseries', 'statistic',
+                     'resstastic', 'timestastic', 'valstastic', 'report', 'log')
+# 标识类文件名: {传感器}_{类别}_{产品}_{时间}，其余中间数据为 {传感器}_{产品}_{时间}
+# ROI裁剪窗口文件 {传感器}_window_{时间}.json 按同一规则解析
+FLAG_FILE_KINDS = ('flag', 'flag1', 'invalid', 'window')
+_run_catalogs = {}
+
+CatalogRecord = namedtuple('CatalogRecord', ['name', 'kind', 'sensor', 'source', 'product', 'time', 'ext'])
+
+def parse_catalog_name(name):
+    """将文件名解析为索引记录，中间数据kind为'data'，文件名末段不是时间时time为None"""
+    base, ext = os.path.splitext(name)
+    parts = base.split('_')
+    time = parts.pop() if len(parts) > 1 and parts[-1].isdigit() else None
+    if parts[0] in RESULT_FILE_KINDS:
+        kind = parts[0]
+        sensor = parts[1] if len(parts) > 1 else ''
+        source = parts[2] if len(parts) > 2 else ''
+        product = '_'.join(parts[3:])
+    else:
+        sensor = parts[0]
+        source = ''
+        if len(parts) > 1 and parts[1] in FLAG_FILE_KINDS:
+            kind = parts[1]
+            product = '_'.join(parts[2:])
         else:
+            kind = 'data'
+            product = '_'.join(parts[1:])
+    return CatalogRecord(name, kind, sensor, source, product, time, ext)
 
-            create_satellite_report(output_dir,output_dir, font_path,time_threshold,window_size)
+class RunCatalog:
+    """
+    输出目录文件索引
+    每个文件名只解析一次为(sensor, product, time, kind)记录，并按各字段建立字典索引；
+    .npy中间文件以其txt文件名登记。创建时扫描一次目录，之后本进程写入的文件通过add登记，
+    查询时不再扫描目录；子进程写入的文件在run_product_tasks返回、图件渲染等待完成
+    及流水线每个阶段结束后由refresh统一补充（只解析新增的文件名）
+    """
+    INDEX_FIELDS = ('kind', 'sensor', 'source', 'product', 'time', 'ext')
+
+    def __init__(self, root):
+        self.root = root
+        self.files = {}
+        self.records = {}
+        self.indexes = {field: {} for field in self.INDEX_FIELDS}
+
+    def _add_file(self, filename):
+        name = filename[:-4] + '.txt' if filename.endswith('.npy') else filename
+        self.files[filename] = name
+        if name in self.records:
+            return
+        record = parse_catalog_name(name)
+        self.records[name] = record
+        for field in self.INDEX_FIELDS:
+            self.indexes[field].setdefault(getattr(record, field), set()).add(name)
+
+    def _remove_file(self, filename):
+        name = self.files.pop(filename)
+        if name in self.files or os.path.splitext(name)[0] + '.npy' in self.files:
+            return
+        record = self.records.pop(name)
+        for field in self.INDEX_FIELDS:
+            self.indexes[field][getattr(record, field)].discard(name)
 
-        #步骤11：异常检测
-        check_validation_errors(output_dir)
+    def refresh(self):
+        """重新扫描目录，同步新增与删除的文件"""
+        try:
+            with os.scandir(self.root) as entries:
+                current = {entry.name for entry in entries if not entry.is_dir()}
+        except FileNotFoundError:
+            current = set()
+        for filename in set(self.files) - current:
+            self._remove_file(filename)
+        for filename in current - set(self.files):
+            self._add_file(filename)
+
+    def add(self, name):
+        """登记本进程写入的文件（中间数据以txt文件名登记）"""
+        for filename in (name, os.path.splitext(name)[0] + '.npy'):
+            if os.path.exists(os.path.join(self.root, filename)):
+                self._add_file(filename)
+
+    def find(self, **criteria):
+        """
+        按字段查询文件名，返回排序后的列表
+        字段值为列表/元组时匹配其中任一值，如 find(kind=('valresult', 'spaceresult'), source='XC')
+        """
+        selected = None
+        for field, value in criteria.items():
+            values = value if isinstance(value, (list, tuple, set)) else (value,)
+            names = set()
+            for item in values:
+                names |= self.indexes[field].get(item, set())
+            selected = names if selected is None else selected & names
+            if not selected:
+                return []
+        return sorted(self.records if selected is None else selected)
+
+    def names(self):
+        """目录中全部文件名"""
+        return self.find()
+
+    def get(self, name):
+        """文件名对应的索引记录"""
+        return self.records.get(name)
+
+def get_run_catalog(directory):
+    """获取目录对应的文件索引"""
+    key = os.path.abspath(directory)
+    if key not in _run_catalogs:
+        _run_catalogs[key] = RunCatalog(directory)
+        _run_catalogs[key].refresh()
+    return _run_catalogs[key]
+
+def refresh_run_catalogs():
+    """重新扫描已建立索引的全部目录，补充子进程写入的文件"""
+    for catalog in _run_catalogs.values():
+        catalog.refresh()
+
+# 景级数据缓存
+class SceneCache:
+    """
+    景级数组缓存（经纬度、flag1等在多个产品/步骤间重复使用的数组）
+    按最近最少使用(LRU)淘汰，缓存总量不超过max_bytes；
+    返回的数组为只读，调用方需要修改时自行copy
+    """
+    def __init__(self, max_bytes, mmap=False):
+        self.max_bytes = max_bytes
+        self.mmap = mmap
+        self.arrays = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, dtype=None):
+        key = (os.path.abspath(path), np.dtype(dtype or np.float64).str)
+        if key in self.arrays:
+            self.arrays.move_to_end(key)
+            self.hits += 1
+            return self.arrays[key]
+
+        self.misses += 1
+        array = load_intermediate(path, dtype, self.mmap)
+        array.setflags(write=False)
+        if array.nbytes <= self.max_bytes:
+            self.arrays[key] = array
+            self.nbytes += array.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self.arrays.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return array
+
+    def invalidate(self, path):
+        """文件被重写时移除对应缓存"""
+        path = os.path.abspath(path)
+        for key in [key for key in self.arrays if key[0] == path]:
+            self.nbytes -= self.arrays.pop(key).nbytes
+
+    def clear(self):
+        self.arrays.clear()
+        self.nbytes = 0
+
+_scene_cache = SceneCache(1024 * 1024 * 1024)
+
+def configure_scene_cache(max_mb=1024, mmap=False):
+    """重新创建景级数据缓存，max_mb为缓存内存上限(MB)，mmap为True时npy数组以内存映射方式读取"""
+    global _scene_cache
+    _scene_cache = SceneCache(max_mb * 1024 * 1024, mmap)
+    return _scene_cache
+
+def clear_scene_cache():
+    """释放景级数据缓存，以及由景级数组派生的插值权重、站点检索树和现场记录缓存"""
+    print(f"景级数据缓存: 命中{_scene_cache.hits}次, 读取{_scene_cache.misses}次")
+    _scene_cache.clear()
+    _linear_interpolators.clear()
+    _scene_pixel_indexes.clear()
+    _insitu_records.clear()
+
+def load_scene_array(path, dtype=None):
+    """通过景级缓存读取经纬度/标识等共享数组（只读）"""
+    return _scene_cache.get(path, dtype)
+
+# 多进程产品任务
+def init_product_worker(store_settings, scene_cache_mb):
+    """
+    进程池初始化：恢复各目录的中间数据存储配置，
+    景级数组以只读内存映射方式在各进程间共享
+    """
+    for root, fmt, export_txt in store_settings:
+        configure_intermediate_store(root, fmt, export_txt)
+    configure_scene_cache(scene_cache_mb, mmap=True)
 
-        #步骤12：生成日志
-        process_reports(output_dir)
+def run_product_tasks(function, tasks, workers=1):
+    """
+    逐个执行产品任务，workers大于1时分发到进程池并行执行
+    function需为模块级函数，返回结果顺序与tasks一致
+    """
+    workers = min(int(workers), len(tasks))
+    if workers <= 1:
+        results = [function(*task) for task in tasks]
+        refresh_run_catalogs()
+        return results
+
+    store_settings = [(store.root, store.fmt, store.export_txt) for store in _intermediate_stores.values()]
+    scene_cache_mb = _scene_cache.max_bytes // (1024 * 1024)
+    print(f"使用{workers}个进程并行处理{len(tasks)}个产品")
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_product_worker,
+                             initargs=(store_settings, scene_cache_mb)) as executor:
+        futures = [executor.submit(function, *task) for task in tasks]
+        results = [future.result() for future in futures]
+    refresh_run_catalogs()
+    return results
+
+
+# 轨道覆盖范围预检
+# 只读取导航数据的首末行和首末列估计景的经纬度范围，在读取全部产品前判断两景是否重叠
+SWATH_OVERLAP_FILE = 'swath_overlap.json'
+
+def read_swath_edges(lat_variable, lon_variable):
+    """读取经纬度数据集的首末行与首末列（h5py数据集和netCDF变量通用），返回一维经纬度数组"""
+    edges = []
+    for variable in (lat_variable, lon_variable):
+        parts = [variable[0, :], variable[-1, :], variable[:, 0], variable[:, -1]]
+        edges.append(np.concatenate([np.ma.filled(np.ma.asarray(part, dtype=np.float64), np.nan)
+                                     for part in parts]))
+    return edges[0], edges[1]
+
+def hy_swath_bounds(hy_file_l2a):
+    """HY3A景的经纬度范围"""
+    with h5py.File(hy_file_l2a, 'r') as h5_file:
+        lat, lon = read_swath_edges(h5_file['Navigation Data/Latitude'], h5_file['Navigation Data/Longitude'])
+    return scene_bounds(lat, lon)
+
+def satellite_swath_bounds(oc_file):
+    """卫星检验源景的经纬度范围"""
+    with nc.Dataset(oc_file, 'r') as nc_data:
+        navigation = nc_data['navigation_data']
+        lat, lon = read_swath_edges(navigation['latitude'], navigation['longitude'])
+    return scene_bounds(lat, lon)
+
+def bounds_intersection(bounds1, bounds2):
+    """两个经纬度范围的交集，不相交时返回None"""
+    lat_min, lat_max = max(bounds1[0], bounds2[0]), min(bounds1[1], bounds2[1])
+    lon_min, lon_max = max(bounds1[2], bounds2[2]), min(bounds1[3], bounds2[3])
+    if lat_min > lat_max or lon_min > lon_max:
+        return None
+    return (lat_min, lat_max, lon_min, lon_max)
 
-        print(f"\n=== HY3A vs {source_type} 数据检验流程完成 ===")
+def check_swath_overlap(hy_file_l2a, oc_file, output_dir):
+    """
+    轨道覆盖范围预检
+    两景经纬度范围不相交时返回False，终止后续读取与匹配；
+    否则将两景范围及其交集写入swath_overlap.json，供后续阶段使用（范围无法估计时交集记为null）
+    """
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        target_bounds = hy_swath_bounds(hy_file_l2a)
+        source_bounds = satellite_swath_bounds(oc_file)
+        print(f"HY3A景范围: {target_bounds}")
+        print(f"检验源景范围: {source_bounds}")
+
+        overlap = None
+        if target_bounds is not None and source_bounds is not None:
+            overlap = bounds_intersection(target_bounds, source_bounds)
+            if overlap is None:
+                print("HY3A与检验源景的覆盖范围不重叠，终止检验")
+                return False
+            print(f"重叠范围: {overlap}")
+        else:
+            print("警告：无法从导航数据估计景范围，跳过覆盖范围预检")
+
+        with open(os.path.join(output_dir, SWATH_OVERLAP_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'target': target_bounds, 'source': source_bounds, 'overlap': overlap}, f)
         return True
-    
 
     except Exception as e:
-        print(f"检验流程执行失败: {str(e)}")
+        print(f"覆盖范围预检失败: {str(e)}")
         traceback.print_exc()
         return False
 
-def process_hy_data(hy_file_l2a, hy_file_l2b, hy_file_l2c, output_dir):
+def load_swath_overlap(directory):
+    """读取预检得到的重叠范围(lat_min, lat_max, lon_min, lon_max)，未预检或范围未知时返回None"""
+    path = os.path.join(directory, SWATH_OVERLAP_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        overlap = json.load(f).get('overlap')
+    return tuple(overlap) if overlap else None
+
+def bounds_mask(lat, lon, bounds, margin=1e-4):
+    """经纬度落在范围内（外扩margin度，容许中间数据的舍入误差）的像元掩码"""
+    return ((lat >= bounds[0] - margin) & (lat <= bounds[1] + margin) &
+            (lon >= bounds[2] - margin) & (lon <= bounds[3] + margin))
+
+# 感兴趣区域(ROI)裁剪
+# 数据读取时只保留覆盖ROI的行列窗口，四周外扩ROI_PADDING个像元，使ROI边缘像元的标识窗口和插值三角网与整景一致；
+# 窗口位置保存为{传感器}_window_{时间}.json，验证结果中的像元序号仍按整景计算
+ROI_PADDING = 10
+
+class SceneWindow(namedtuple('SceneWindow', ['row0', 'col0', 'rows', 'cols', 'full_rows', 'full_cols'])):
+    """景的行列窗口：起始行列号、窗口行列数和整景行列数"""
+    __slots__ = ()
+
+    @property
+    def slices(self):
+        return slice(self.row0, self.row0 + self.rows), slice(self.col0, self.col0 + self.cols)
+
+    def to_full(self, index):
+        """窗口内一维序号转换为整景一维序号"""
+        rows, cols = np.divmod(np.asarray(index, dtype=np.int64), self.cols)
+        return (rows + self.row0) * self.full_cols + cols + self.col0
+
+    def to_local(self, index):
+        """整景一维序号转换为窗口内一维序号，窗口外为-1"""
+        rows, cols = np.divmod(np.asarray(index, dtype=np.int64), self.full_cols)
+        rows, cols = rows - self.row0, cols - self.col0
+        inside = (rows >= 0) & (rows < self.rows) & (cols >= 0) & (cols < self.cols)
+        return np.where(inside, rows * self.cols + cols, -1)
+
+def parse_roi(value):
+    """
+    解析ROI配置：留空不裁剪；overlap使用覆盖范围预检的重叠范围；
+    否则为'纬度下限,纬度上限,经度下限,经度上限'
+    """
+    value = (value or '').strip()
+    if not value or value.lower() == 'none':
+        return None
+    if value.lower() == 'overlap':
+        return 'overlap'
+    bounds = tuple(float(v) for v in value.split(','))
+    if len(bounds) != 4 or bounds[0] > bounds[1] or bounds[2] > bounds[3]:
+        raise ValueError(f"ROI配置格式错误: {value}")
+    return bounds
+
+def resolve_roi(roi, directory):
+    """ROI经纬度范围，overlap模式读取预检重叠范围（范围未知时返回None，不裁剪）"""
+    if roi == 'overlap':
+        return load_swath_overlap(directory)
+    return roi
+
+def roi_window(lat, lon, roi, padding=ROI_PADDING):
+    """覆盖ROI内全部像元的行列窗口（四周外扩padding个像元），ROI内没有像元时返回None"""
+    lat = np.ma.filled(np.ma.asarray(lat, dtype=np.float64), np.nan)
+    lon = np.ma.filled(np.ma.asarray(lon, dtype=np.float64), np.nan)
+    inside = bounds_mask(lat, lon, roi, margin=0)
+    if not inside.any():
+        return None
+    rows = np.flatnonzero(inside.any(axis=1))
+    cols = np.flatnonzero(inside.any(axis=0))
+    full_rows, full_cols = lat.shape
+    row0, row1 = max(int(rows[0]) - padding, 0), min(int(rows[-1]) + padding + 1, full_rows)
+    col0, col1 = max(int(cols[0]) - padding, 0), min(int(cols[-1]) + padding + 1, full_cols)
+    return SceneWindow(row0, col0, row1 - row0, col1 - col0, full_rows, full_cols)
+
+def scene_window_path(directory, sensor, time_str):
+    return os.path.join(directory, f'{sensor}_window_{time_str}.json')
+
+def save_scene_window(directory, sensor, time_str, window):
+    """保存景窗口，window为None（未裁剪）时删除旧的窗口文件"""
+    path = scene_window_path(directory, sensor, time_str)
+    if window is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(window._asdict(), f)
+    get_run_catalog(directory).add(os.path.basename(path))
+    print(f"{sensor}景ROI窗口: 行{window.row0}~{window.row0 + window.rows - 1}，"
+          f"列{window.col0}~{window.col0 + window.cols - 1}（整景{window.full_rows}x{window.full_cols}）")
+
+def load_scene_window(directory, sensor, time_str):
+    """读取景窗口，未裁剪时返回None"""
+    path = scene_window_path(directory, sensor, time_str)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return SceneWindow(**json.load(f))
+
+def scene_grid_shape(directory, sensor, time_str, size):
+    """景的二维行列数：裁剪过的景取窗口大小，否则取size在1000~6000之间的第一个约数作为行数"""
+    window = load_scene_window(directory, sensor, time_str)
+    if window is not None:
+        return window.rows, window.cols
+    for i in range(1000, 6000):
+        if size % i == 0:
+            return i, size // i
+    raise ValueError(f"无法确定数据的行列数: {size}")
+
+# HY3A数据并行分块读取
+# 每个数值在读取与文本格式化时的峰值内存估计（字节）
+HY_INGEST_BYTES_PER_VALUE = 100
+
+def iter_dataset_blocks(dataset, block_bytes, window=None):
+    """
+    按HDF5分块边界沿行方向分块读取数据集，
+    每块内存估计不超过block_bytes（至少读取一个分块行）；
+    给定window时只读取窗口内的行列
+    """
+    if dataset.ndim == 0:
+        yield dataset[()]
+        return
+    if window is None:
+        row_start, row_stop = 0, dataset.shape[0]
+        row_values = max(int(np.prod(dataset.shape[1:])), 1)
+    else:
+        row_start, row_stop = window.row0, window.row0 + window.rows
+        row_values = window.cols
+    chunk_rows = dataset.chunks[0] if dataset.chunks else 1
+    block_rows = block_bytes // (row_values * HY_INGEST_BYTES_PER_VALUE)
+    block_rows = max(block_rows // chunk_rows, 1) * chunk_rows
+    for start in range(row_start, row_stop, block_rows):
+        if window is None:
+            yield dataset[start:start + block_rows]
+        else:
+            yield dataset[start:min(start + block_rows, row_stop), window.slices[1]]
+
+def ingest_hy_dataset(h5_path, dataset_path, output_path, store_format, export_txt, block_bytes, window=None):
+    """读取单个HY3A数据集（或其ROI窗口）并分块写入中间存储（可在子进程中运行）"""
+    store = IntermediateStore(os.path.dirname(output_path), store_format, export_txt)
+    with h5py.File(h5_path, 'r') as h5_file:
+        dataset = h5_file[dataset_path]
+        size = dataset.size if window is None else window.rows * window.cols
+        store.save_blocks(os.path.basename(output_path),
+                          iter_dataset_blocks(dataset, block_bytes, window),
+                          size, fmt='hy')
+    return output_path
+
+def process_hy_data(hy_file_l2a, hy_file_l2b, hy_file_l2c, output_dir, workers=1, memory_budget_mb=1024,
+                    roi=None):
     """
     处理HY3A待检验数据
+    各数据集按HDF5分块读取，workers大于1时多进程并行处理，
+    memory_budget_mb为所有进程合计的读取内存预算；
+    roi为(纬度下限, 纬度上限, 经度下限, 经度上限)时只读取覆盖ROI的行列窗口
     """
-    def save_data_to_txt(data, filename):
-        """将数据保存为单列txt文件"""
-        flattened_data = data.flatten()
-        with open(filename, 'w') as f:
-            for value in flattened_data:
-                if abs(value + 9.9) < 0.0001:
-                    f.write('-999.000000\n')
-                elif abs(value) < 0.000001:
-                    f.write('0.000000\n')
-                elif abs(value) >= 1000000:
-                    f.write(f'{value:.0f}\n')
-                else:
-                    f.write(f'{value:.6f}\n')
-
     try:
         print('\n开始处理HY3A数据\n')
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
         prefix = 'HY3A'
 
-        # 处理反射率数据
+        # 获取时间信息
         with h5py.File(hy_file_l2a, 'r') as h5_file:
-            # 获取时间信息
             year = int(h5_file['Scan Line Attributes/Year'][0])
             day = int(h5_file['Scan Line Attributes/Day'][0])
             millisecond = int(h5_file['Scan Line Attributes/Millisecond'][0])
@@ -181,45 +1160,58 @@ def process_hy_data(hy_file_l2a, hy_file_l2b, hy_file_l2c, output_dir):
             beijing_time = utc_time + timedelta(hours=8)
             time_str = beijing_time.strftime('%Y%m%d%H%M%S')
 
-            # 保存基础数据
-            save_data_to_txt(h5_file['Navigation Data/Latitude'][:], 
-                           os.path.join(output_dir, f'{prefix}_lat_{time_str}.txt'))
-            save_data_to_txt(h5_file['Navigation Data/Longitude'][:], 
-                           os.path.join(output_dir, f'{prefix}_lon_{time_str}.txt'))
-            save_data_to_txt(h5_file['Geophysical Data/l2_flags'][:], 
-                           os.path.join(output_dir, f'{prefix}_flag_{time_str}.txt'))
-
-            # 保存反射率数据
-            rrs_bands = ['412', '443', '490', '520', '565', '670', '750']
-            for band in rrs_bands:
-                data = h5_file[f'Geophysical Data/Rrs{band}'][:]
-                save_data_to_txt(data, 
-                               os.path.join(output_dir, f'{prefix}_Rrs{band}_{time_str}.txt'))
-
-        # 处理TSM等参数数据
-        with h5py.File(hy_file_l2b, 'r') as h5_file:
-            # 保存参数数据
-            params = {
-                'chl_a': 'Geophysical Data/chl_a',
-                'TSM': 'Geophysical Data/TSM',
-                'CDOM': 'Geophysical Data/CDOM',
-                'sst': 'Geophysical Data/SST',
-                'AOT': 'Geophysical Data/taua865',
-                'nLw': 'Geophysical Data/nLw565',
-                'Kd': 'Geophysical Data/Kd490'
-            }
-            
-            for param_name, dataset_path in params.items():
-                data = h5_file[dataset_path][:]
-                save_data_to_txt(data, 
-                               os.path.join(output_dir, f'{prefix}_{param_name}_{time_str}.txt'))
-                
-
-        with h5py.File(hy_file_l2c, 'r') as h5_file:
-            # 保存参数数据
-            ipar_data = h5_file['Geophysical Data/IPAR'][:]
-            save_data_to_txt(ipar_data, 
-                               os.path.join(output_dir, f'{prefix}_ipar_{time_str}.txt'))
+            # ROI裁剪窗口
+            window = None
+            if roi is not None:
+                window = roi_window(h5_file['Navigation Data/Latitude'][:],
+                                    h5_file['Navigation Data/Longitude'][:], roi)
+                if window is None:
+                    print(f"HY3A景内没有位于ROI{roi}内的像元")
+                    return False
+        save_scene_window(output_dir, prefix, time_str, window)
+
+        # 基础数据与反射率数据
+        jobs = [
+            (hy_file_l2a, 'Navigation Data/Latitude', 'lat'),
+            (hy_file_l2a, 'Navigation Data/Longitude', 'lon'),
+            (hy_file_l2a, 'Geophysical Data/l2_flags', 'flag'),
+        ]
+        rrs_bands = ['412', '443', '490', '520', '565', '670', '750']
+        for band in rrs_bands:
+            jobs.append((hy_file_l2a, f'Geophysical Data/Rrs{band}', f'Rrs{band}'))
+
+        # TSM等参数数据
+        params = {
+            'chl_a': 'Geophysical Data/chl_a',
+            'TSM': 'Geophysical Data/TSM',
+            'CDOM': 'Geophysical Data/CDOM',
+            'sst': 'Geophysical Data/SST',
+            'AOT': 'Geophysical Data/taua865',
+            'nLw': 'Geophysical Data/nLw565',
+            'Kd': 'Geophysical Data/Kd490'
+        }
+        for param_name, dataset_path in params.items():
+            jobs.append((hy_file_l2b, dataset_path, param_name))
+
+        jobs.append((hy_file_l2c, 'Geophysical Data/IPAR', 'ipar'))
+
+        store = get_intermediate_store(output_dir)
+        workers = max(1, min(int(workers), len(jobs)))
+        block_bytes = memory_budget_mb * 1024 * 1024 // workers
+        tasks = [(h5_path, dataset_path,
+                  os.path.join(output_dir, f'{prefix}_{name}_{time_str}.txt'),
+                  store.fmt, store.export_txt, block_bytes, window)
+                 for h5_path, dataset_path, name in jobs]
+
+        if workers == 1:
+            for task in tasks:
+                ingest_hy_dataset(*task)
+        else:
+            print(f"使用{workers}个进程并行读取HY3A数据")
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(ingest_hy_dataset, *task) for task in tasks]
+                for future in futures:
+                    future.result()
 
         print('\nHY3A数据处理完成\n')
         return True
@@ -229,17 +1221,87 @@ def process_hy_data(hy_file_l2a, hy_file_l2b, hy_file_l2c, output_dir):
         traceback.print_exc()
         return False
     
-def process_satellite_check_data(oc_file, sst_file, output_dir):
+# 卫星检验源数据读取
+# HY3A产品与检验源产品的参数映射，None表示检验源无对应产品
+SATELLITE_PARAM_MAPPING = {
+    'AQUA': {
+        'Rrs412': 'Rrs412', 
+        'Rrs443': 'Rrs443', 
+        'Rrs490': 'Rrs488',
+        'Rrs520': 'Rrs531', 
+        'Rrs565': 'Rrs555', 
+        'Rrs670': 'Rrs667',
+        'Rrs750': None, 
+        'Rrs865': None, 
+        'sst': 'sst', 
+        'AOT': 'AOT',
+        'chl': 'chl',
+        'Kd': 'Kd',
+        'ipar': 'ipar',
+    },
+    'TERRA': {
+        'Rrs412': 'Rrs412',
+        'Rrs443': 'Rrs443', 
+        'Rrs490': 'Rrs488',
+        'Rrs520': 'Rrs531', 
+        'Rrs565': 'Rrs555', 
+        'Rrs670': 'Rrs667',
+        'Rrs750': None, 
+        'Rrs865': None, 
+        'sst': 'sst', 
+        'AOT': 'AOT',
+        'chl': 'chl',
+        'Kd': 'Kd',
+        'ipar': 'ipar',
+    },
+    'SNPP': {
+        'Rrs412': 'Rrs410', 
+        'Rrs443': 'Rrs443', 
+        'Rrs490': 'Rrs486',
+        'Rrs520': None, 
+        'Rrs565': 'Rrs551', 
+        'Rrs670': 'Rrs671',
+        'Rrs750': None, 
+        'Rrs865': None, 
+        'sst': 'sst', 
+        'AOT': 'AOT',
+        'chl': 'chl',
+        'Kd': 'Kd',
+        'ipar': None,
+    },
+    'JPSS': {
+        'Rrs412': 'Rrs411', 
+        'Rrs443': 'Rrs445', 
+        'Rrs490': 'Rrs489',
+        'Rrs565': 'Rrs556', 
+        'Rrs670': 'Rrs667', 
+        'Rrs750': None,
+        'Rrs865': None, 
+        'sst': 'sst', 
+        'AOT': 'AOT',
+        'chl': 'chl',
+        'Kd': 'Kd',
+        'ipar': None,
+    },
+}
+
+class SatelliteSourceReader:
     """
-    处理卫星检验数据
+    卫星检验源数据延迟读取器
+    保持OC/SST文件的nc.Dataset句柄打开，按需读取并解码各产品的掩码数组
     """
-    def save_data_to_txt(data, filename):
-        """将数据保存为单列txt文件"""
-        flattened_data = data.flatten()
-        with open(filename, 'w') as f:
-            for value in flattened_data:
-                f.write(f'{value}\n')
-
+    def __init__(self, oc_file, sst_file):
+        self.oc_file = oc_file
+        self.sst_file = sst_file
+        self.prefix = self.extract_file_prefix(oc_file)
+        self.beijing_time = self.extract_datetime(oc_file)
+        self.time_str = self.beijing_time.strftime('%Y%m%d%H%M%S')
+        self.products = self._product_table()
+        self.oc_data = nc.Dataset(oc_file, 'r')
+        self.sst_data = None
+        self.window = None
+
+    @staticmethod
     def extract_datetime(filename):
         """从文件名中提取时间信息并转换为北京时间"""
         pattern = r'\d{8}T\d{6}'
@@ -250,7 +1312,8 @@ def process_satellite_check_data(oc_file, sst_file, output_dir):
             beijing_time = utc_time + timedelta(hours=8)
             return beijing_time
         return None
-    
+
+    @staticmethod
     def extract_file_prefix(filename):
         """从文件名中提取处理的卫星类别"""
         first_five_chars = os.path.basename(filename)[:5] if len(os.path.basename(filename)) >= 5 else None
@@ -263,93 +1326,158 @@ def process_satellite_check_data(oc_file, sst_file, output_dir):
         elif first_five_chars == 'JPSS1':
             return 'JPSS'
 
+    def _product_table(self):
+        """输出产品名 -> (文件, 数据组, 变量名)"""
+        prefix = self.prefix
+        # 根据传感器类型选择波段
+        if prefix in ['AQUA', 'TERRA']:  # MODIS数据
+            rrs_bands = ['412', '443', '469', '488', '531', '547', '555', '645', '667', '678']
+        elif 'JPSS' in prefix:  # JPSS数据
+            rrs_bands = ['411', '445', '489', '556', '667']
+        else:  # SNPP数据
+            rrs_bands = ['410', '443', '486', '551', '671']
+
+        products = {
+            'Lat': ('oc', 'navigation_data', 'latitude'),
+            'Lon': ('oc', 'navigation_data', 'longitude'),
+            'flag': ('oc', 'geophysical_data', 'l2_flags'),
+        }
+        for band in rrs_bands:
+            products[f'Rrs{band}'] = ('oc', 'geophysical_data', f'Rrs_{band}')
+        products['Chl'] = ('oc', 'geophysical_data', 'chlor_a')
+        products['Kd'] = ('oc', 'geophysical_data', 'Kd_490')
+        # 有效光合辐射数据，只有AQUA和TERRA有
+        if prefix in ['AQUA', 'TERRA']:
+            products['ipar'] = ('oc', 'geophysical_data', 'ipar')
+        # 气溶胶光学厚度数据
+        aot_band = 'aot_869' if prefix in ['AQUA', 'TERRA'] else \
+                  'aot_862' if prefix == 'SNPP' else 'aot_868'
+        products['AOT'] = ('oc', 'geophysical_data', aot_band)
+        products['sst'] = ('sst', 'geophysical_data', 'sst')
+        return products
+
+    def crop(self, roi):
+        """按ROI设置读取窗口，此后read只返回窗口内的数据；ROI内没有像元时返回None"""
+        navigation = self.oc_data['navigation_data']
+        self.window = roi_window(navigation['latitude'][:], navigation['longitude'][:], roi)
+        return self.window
+
+    def coverage_end(self):
+        """景结束时间（北京时间），文件无time_coverage_end属性时使用文件名时间"""
+        try:
+            end_time = datetime.strptime(self.oc_data.getncattr('time_coverage_end')[:19], '%Y-%m-%dT%H:%M:%S')
+            return end_time + timedelta(hours=8)
+        except (AttributeError, ValueError):
+            return self.beijing_time
+
+    def is_consumed(self, name):
+        """判断产品是否被时间/空间匹配使用（与时间匹配的文件名查找规则一致）"""
+        if name in ('Lat', 'Lon', 'flag'):
+            return True
+        mapping = SATELLITE_PARAM_MAPPING.get(self.prefix, {})
+        return any(param.lower() in name.lower() for param in mapping.values() if param)
+
+    def _variable(self, name):
+        """产品对应的netCDF变量"""
+        source, group, variable = self.products[name]
+        if source == 'sst':
+            if self.sst_data is None:
+                self.sst_data = nc.Dataset(self.sst_file, 'r')
+            nc_data = self.sst_data
+        else:
+            nc_data = self.oc_data
+        return nc_data[group][variable]
+
+    @staticmethod
+    def _decode(name, data):
+        """产品数值换算"""
+        if name == 'ipar':
+            data = data.data / 45.7
+        return data
+
+    def read(self, name):
+        """读取并解码单个产品"""
+        variable = self._variable(name)
+        data = variable[:] if self.window is None else variable[self.window.slices]
+        return self._decode(name, data)
+
+    def invalid_mask(self, name, block_bytes=16 * 1024 * 1024):
+        """
+        产品的无效值掩码（掩码值或NaN）
+        按行分块读取，每块解码后只保留掩码，内存中不保存整个产品（块大小约block_bytes）
+        """
+        variable = self._variable(name)
+        if self.window is None:
+            row0, col0 = 0, 0
+            rows, cols = variable.shape
+        else:
+            row0, col0, rows, cols = self.window.row0, self.window.col0, self.window.rows, self.window.cols
+        mask = np.zeros((rows, cols), dtype=bool)
+        block_rows = max(1, block_bytes // max(1, cols * 8))
+        for start in range(0, rows, block_rows):
+            stop = min(rows, start + block_rows)
+            data = self._decode(name, variable[row0 + start:row0 + stop, col0:col0 + cols])
+            mask[start:stop] = np.ma.getmaskarray(data) | np.isnan(np.ma.getdata(data))
+        return mask
+
+    def close(self):
+        self.oc_data.close()
+        if self.sst_data is not None:
+            self.sst_data.close()
+            self.sst_data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+def process_satellite_check_data(oc_file, sst_file, output_dir, roi=None):
+    """
+    处理卫星检验数据
+    只保存时间/空间匹配会使用的产品，其余产品按行分块读取，仅合并其无效值掩码
+    保存为{prefix}_invalid_{time}文件，供flag生成使用（标识须包含全部产品的无效值，这些产品仍需完整读取一遍）；
+    roi为(纬度下限, 纬度上限, 经度下限, 经度上限)时只读取覆盖ROI的行列窗口
+    """
+    def save_data_to_txt(data, filename):
+        """保存单列数据到中间存储"""
+        save_intermediate(filename, data, fmt='repr')
+
     try:
         print('\n开始处理卫星数据\n')
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
 
-        # 处理海洋水色数据
-        with nc.Dataset(oc_file, 'r') as nc_data:
-            # 获取时间信息
-            beijing_time = extract_datetime(oc_file)
-            time_str = beijing_time.strftime('%Y%m%d%H%M%S')
-            prefix = extract_file_prefix(oc_file)
-
-            # 保存基础数据
-            save_data_to_txt(nc_data['navigation_data']['latitude'][:], 
-                           os.path.join(output_dir, f'{prefix}_Lat_{time_str}.txt'))
-            save_data_to_txt(nc_data['navigation_data']['longitude'][:], 
-                           os.path.join(output_dir, f'{prefix}_Lon_{time_str}.txt'))
-            save_data_to_txt(nc_data['geophysical_data']['l2_flags'][:], 
-                           os.path.join(output_dir, f'{prefix}_flag_{time_str}.txt'))
-
-            # 根据传感器类型选择波段
-            if prefix in ['AQUA', 'TERRA']:  # MODIS数据
-                rrs_bands = {
-                    'Rrs412': 'Rrs_412', 
-                    'Rrs443': 'Rrs_443', 
-                    'Rrs469': 'Rrs_469', 
-                    'Rrs488': 'Rrs_488',
-                    'Rrs531': 'Rrs_531', 
-                    'Rrs547': 'Rrs_547',
-                    'Rrs555': 'Rrs_555', 
-                    'Rrs645': 'Rrs_645',
-                    'Rrs667': 'Rrs_667', 
-                    'Rrs678': 'Rrs_678'
-                }
-            elif 'JPSS' in prefix:  # JPSS数据
-                rrs_bands = {
-                    'Rrs411': 'Rrs_411',
-                    'Rrs445': 'Rrs_445',
-                    'Rrs489': 'Rrs_489',
-                    'Rrs556': 'Rrs_556',
-                    'Rrs667': 'Rrs_667'
-                }
-            else:  # SNPP数据
-                rrs_bands = {
-                    'Rrs410': 'Rrs_410',
-                    'Rrs443': 'Rrs_443',
-                    'Rrs486': 'Rrs_486',
-                    'Rrs551': 'Rrs_551',
-                    'Rrs671': 'Rrs_671'
-                }
+        with SatelliteSourceReader(oc_file, sst_file) as reader, GranuleIndex(output_dir) as granule_index:
+            prefix = reader.prefix
+            time_str = reader.time_str
+            if roi is not None and reader.crop(roi) is None:
+                print(f"{prefix}景内没有位于ROI{roi}内的像元")
+                return False
+            save_scene_window(output_dir, prefix, time_str, reader.window)
+            end_time = reader.coverage_end()
+            bounds = scene_bounds(np.ma.filled(reader.read('Lat').astype(np.float64), np.nan),
+                                  np.ma.filled(reader.read('Lon').astype(np.float64), np.nan))
+            invalid = None
+            for name in reader.products:
+                if reader.is_consumed(name):
+                    filename = f'{prefix}_{name}_{time_str}.txt'
+                    save_data_to_txt(reader.read(name), os.path.join(output_dir, filename))
+                    # 登记到检验源景索引（flag文件不参与时间匹配）
+                    if name != 'flag':
+                        granule_index.add(filename, prefix, name, reader.beijing_time, end_time, bounds)
+                else:
+                    print(f"跳过未使用的产品: {name}")
+                    mask = reader.invalid_mask(name)
+                    if invalid is None:
+                        invalid = mask
+                    else:
+                        invalid |= mask
 
-            # 保存遥感反射率数据
-            for out_name, band_name in rrs_bands.items():
-                data = nc_data['geophysical_data'][band_name][:]
-                save_data_to_txt(data, 
-                               os.path.join(output_dir, f'{prefix}_{out_name}_{time_str}.txt'))
-
-            # 保存叶绿素数据
-            chl_data = nc_data['geophysical_data']['chlor_a'][:]
-            save_data_to_txt(chl_data, 
-                           os.path.join(output_dir, f'{prefix}_Chl_{time_str}.txt'))
-
-            #保存漫射衰减系数数据
-            kd_490_data = nc_data['geophysical_data']['Kd_490'][:]
-            save_data_to_txt(kd_490_data, 
-                           os.path.join(output_dir, f'{prefix}_Kd_{time_str}.txt'))
-            
-            #保存有效光合辐射数据，只有AQUA和TERRA有
-            if prefix in ['AQUA', 'TERRA'] :
-                # print(f"\n开始处理{prefix}的ipar数据")
-                ipar_data = nc_data['geophysical_data']['ipar'][:].data
-                ipar_data = ipar_data /45.7
-                save_data_to_txt(ipar_data, 
-                os.path.join(output_dir, f'{prefix}_ipar_{time_str}.txt'))
-
-            # 保存气溶胶光学厚度数据
-            aot_band = 'aot_869' if prefix in ['AQUA', 'TERRA'] else \
-                      'aot_862' if prefix == 'SNPP' else 'aot_868'
-            aot_data = nc_data['geophysical_data'][aot_band][:]
-            save_data_to_txt(aot_data, 
-                           os.path.join(output_dir, f'{prefix}_AOT_{time_str}.txt'))
-
-        # 处理海表温度数据
-        with nc.Dataset(sst_file, 'r') as nc_data:
-            sst_data = nc_data['geophysical_data']['sst'][:]
-            save_data_to_txt(sst_data, 
-                           os.path.join(output_dir, f'{prefix}_sst_{time_str}.txt'))
+            # 未使用产品的无效值掩码
+            if invalid is not None:
+                save_data_to_txt(np.ma.masked_array(np.zeros(invalid.shape), invalid), 
+                               os.path.join(output_dir, f'{prefix}_invalid_{time_str}.txt'))
 
         print(f'{prefix}数据处理完成')
         return True
@@ -365,8 +1493,9 @@ def process_xc_check_data(aopres_file, wqp_file, aot_file, ctd_file, output_dir)
     处理现场检验数据
     """
     def read_header_info(file_path):
-        """读取文件头信息"""
-        header_info = {'lat': 37.681, 'lon': 121.700}  # 默认值
+        """读取文件头信息（站点名默认取文件名）"""
+        header_info = {'lat': 37.681, 'lon': 121.700,  # 默认值
+                       'station': os.path.splitext(os.path.basename(file_path))[0]}
         header_end_line = 0
         
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -382,6 +1511,8 @@ def process_xc_check_data(aopres_file, wqp_file, aot_file, ctd_file, output_dir)
                 elif line.startswith('/east_longitude'):
                     lon_str = line.split('=')[1] if '=' in line else line.split()[1]
                     header_info['lon'] = float(lon_str)
+                elif line.startswith('/station'):
+                    header_info['station'] = (line.split('=')[1] if '=' in line else line.split()[1]).strip()
                 elif line.startswith('/end_header'):
                     header_end_line = i + 1
                     break
@@ -394,9 +1525,8 @@ def process_xc_check_data(aopres_file, wqp_file, aot_file, ctd_file, output_dir)
                     
         return header_info, header_end_line
 
-    def process_data_file(input_file, data_type):
-        """处理单个数据文件"""
-        print(f'\n开始处理{data_type}数据\n')
+    def read_data_file(input_file, data_type):
+        """读取单个站点数据文件，附加站点名与经纬度列"""
         # 读取文件头信息
         header_info, header_end_line = read_header_info(input_file)
         
@@ -440,7 +1570,22 @@ def process_xc_check_data(aopres_file, wqp_file, aot_file, ctd_file, output_dir)
             else:
                 raise ValueError(f"SST数据列数不足: {df.shape[1]}")
 
+        df['Station'] = header_info['station']
+        df['Latitude'] = header_info['lat']
+        df['Longitude'] = header_info['lon']
+        return header_info, df
+
+    def process_data_file(input_files, data_type):
+        """处理同类数据的全部站点文件，各站点记录合并后按日期输出"""
+        print(f'\n开始处理{data_type}数据\n')
+        frames = [read_data_file(input_file, data_type) for input_file in input_files]
+        header_info = frames[0][0]
+        df = pd.concat([frame for _, frame in frames], ignore_index=True)
+        if len(frames) > 1:
+            print(f"共{len(frames)}个站点文件，{len(df)}条记录")
+
         df = df.dropna()
+        station_columns = ['Station', 'Latitude', 'Longitude']
         
         # 保存处理后的数据
         for date, group in df.groupby('Date'):
@@ -457,8 +1602,9 @@ def process_xc_check_data(aopres_file, wqp_file, aot_file, ctd_file, output_dir)
                         f.write(f"Latitude: {header_info['lat']}\n")
                         f.write(f"Longitude: {header_info['lon']}\n")
                         f.write("Data:\n")
-                    group[['Date', 'Time', col_name]].to_csv(output_file, mode='a', 
+                    group[['Date', 'Time', col_name] + station_columns].to_csv(output_file, mode='a', 
                                                            index=False, sep='\t')   
+                    get_run_catalog(output_dir).add(os.path.basename(output_file))
             elif data_type == 'aop':
                 #处理遥感反射率数据
                 params = [
@@ -478,8 +1624,9 @@ def process_xc_check_data(aopres_file, wqp_file, aot_file, ctd_file, output_dir)
                         f.write(f"Latitude: {header_info['lat']}\n")
                         f.write(f"Longitude: {header_info['lon']}\n")
                         f.write("Data:\n")
-                    group[['Date', 'Time', col_name]].to_csv(output_file, mode='a', 
+                    group[['Date', 'Time', col_name] + station_columns].to_csv(output_file, mode='a', 
                                                            index=False, sep='\t')
+                    get_run_catalog(output_dir).add(os.path.basename(output_file))
             elif data_type == 'aot':
                 #处理气溶胶光学厚度数据
                 output_file = os.path.join(output_dir, f'XC_AOT_{date}000000.txt')
@@ -488,8 +1635,9 @@ def process_xc_check_data(aopres_file, wqp_file, aot_file, ctd_file, output_dir)
                     f.write(f"Longitude: {header_info['lon']}\n")
                     f.write("Data:\n")
                 # 将Date、Time、AOT和Flag列一起写入文件
-                group[['Date', 'Time', 'AOT', 'Flag']].to_csv(output_file, mode='a', 
+                group[['Date', 'Time', 'AOT', 'Flag'] + station_columns].to_csv(output_file, mode='a', 
                                                             index=False, sep='\t')
+                get_run_catalog(output_dir).add(os.path.basename(output_file))
                 
             elif data_type == 'ctd':
                 #处理温度数据
@@ -502,25 +1650,24 @@ def process_xc_check_data(aopres_file, wqp_file, aot_file, ctd_file, output_dir)
                         f.write(f"Latitude: {header_info['lat']}\n")
                         f.write(f"Longitude: {header_info['lon']}\n")
                         f.write("Data:\n")
-                    group[['Date', 'Time', col_name]].to_csv(
+                    group[['Date', 'Time', col_name] + station_columns].to_csv(
                         output_file, 
                         mode='a',
                         index=False,
                         sep='\t'
                     )
+                    get_run_catalog(output_dir).add(os.path.basename(output_file))
     try:
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
 
-        # 处理各类数据文件
-        if aopres_file:
-            process_data_file(aopres_file, 'aop')
-        if wqp_file:
-            process_data_file(wqp_file, 'wqp')
-        if aot_file:
-            process_data_file(aot_file, 'aot')
-        if ctd_file:
-            process_data_file(ctd_file, 'ctd')
+        # 处理各类数据文件（每类可为单个文件或多个站点文件列表）
+        for input_files, data_type in [(aopres_file, 'aop'), (wqp_file, 'wqp'),
+                                       (aot_file, 'aot'), (ctd_file, 'ctd')]:
+            if isinstance(input_files, str):
+                input_files = [input_files]
+            if input_files:
+                process_data_file(input_files, data_type)
             
         print('\n现场检验数据处理完成\n')
         return True
@@ -532,6 +1679,147 @@ def process_xc_check_data(aopres_file, wqp_file, aot_file, ctd_file, output_dir)
     
 
 
+# 陆地掩码栅格
+# 将Basemap陆地多边形（扣除湖泊）按全球固定的LAND_MASK_TILE度分块栅格化，每块只栅格化一次并缓存到磁盘，
+# 块以(块行号, 块列号)为键，相邻和重复的景共用相同的块；点和网格的海陆判断均通过数组索引完成。
+# 经度按[-180, 180)取模后定位分块，跨日界线的景只用到两侧的块
+LAND_MASK_CACHE_DIR = 'landmask_cache'
+LAND_MASK_CELL = 0.01
+LAND_MASK_TILE = 5
+_land_masks = {}
+_coastline_polygons = {}
+
+def coastline_polygons(resolution):
+    """
+    全球Basemap陆地和湖泊多边形（等经纬度坐标）及其经纬度外包范围，
+    每个进程每种分辨率只读取一次，返回([(path, 下界, 上界)], [(path, 下界, 上界)])
+    """
+    if resolution not in _coastline_polygons:
+        m = Basemap(projection='cyl', llcrnrlat=-90, urcrnrlat=90,
+                    llcrnrlon=-180, urcrnrlon=180, resolution=resolution)
+
+        def with_extent(polygons):
+            result = []
+            for polygon in polygons:
+                vertices = np.asarray(polygon.boundary, dtype=np.float64)
+                result.append((Path(vertices), vertices.min(axis=0), vertices.max(axis=0)))
+            return result
+
+        _coastline_polygons[resolution] = (with_extent(m.landpolygons), with_extent(m.lakepolygons))
+    return _coastline_polygons[resolution]
+
+class LandMask:
+    """
+    全球分块陆地掩码
+    每块为tile_cells×tile_cells的布尔栅格，块(r, c)的格元(i, j)中心为
+    (-90 + r*LAND_MASK_TILE + (i+0.5)*cell, -180 + c*LAND_MASK_TILE + (j+0.5)*cell)；
+    块在首次被查询时依次从内存、cache_dir中读取，均未命中时栅格化
+    """
+    def __init__(self, cache_dir, resolution='l', cell=LAND_MASK_CELL):
+        self.cache_dir = cache_dir
+        self.resolution = resolution
+        self.cell = float(cell)
+        self.tile_cells = int(round(LAND_MASK_TILE / self.cell))
+        self.tiles = {}
+
+    def tile_path(self, tile_row, tile_col):
+        return os.path.join(self.cache_dir,
+                            f'land_{self.resolution}_{self.cell:g}_{LAND_MASK_TILE}_{tile_row}_{tile_col}.npy')
+
+    @profiled
+    def build_tile(self, tile_row, tile_col):
+        """栅格化一个块：只对落在多边形外包范围内的格元做点在多边形内判断，多边形先裁剪到块范围"""
+        size = self.tile_cells
+        lat0 = -90 + tile_row * LAND_MASK_TILE
+        lon0 = -180 + tile_col * LAND_MASK_TILE
+        lat_centers = lat0 + (np.arange(size) + 0.5) * self.cell
+        lon_centers = lon0 + (np.arange(size) + 0.5) * self.cell
+        tile_box = Bbox([[lon0, lat0], [lon0 + LAND_MASK_TILE, lat0 + LAND_MASK_TILE]])
+
+        def inside_any(polygons):
+            inside = np.zeros((size, size), dtype=bool)
+            for path, lower, upper in polygons:
+                col0 = np.searchsorted(lon_centers, lower[0], side='left')
+                col1 = np.searchsorted(lon_centers, upper[0], side='right')
+                row0 = np.searchsorted(lat_centers, lower[1], side='left')
+                row1 = np.searchsorted(lat_centers, upper[1], side='right')
+                if row0 >= row1 or col0 >= col1:
+                    continue
+                clipped = path.clip_to_bbox(tile_box)
+                if len(clipped.vertices) < 3:
+                    continue
+                grid_lon, grid_lat = np.meshgrid(lon_centers[col0:col1], lat_centers[row0:row1])
+                points = np.column_stack((grid_lon.ravel(), grid_lat.ravel()))
+                inside[row0:row1, col0:col1] |= clipped.contains_points(points).reshape(grid_lon.shape)
+            return inside
+
+        # 与Basemap.is_land一致：位于陆地多边形内且不在湖泊内
+        land_polygons, lake_polygons = coastline_polygons(self.resolution)
+        return inside_any(land_polygons) & ~inside_any(lake_polygons)
+
+    def tile(self, tile_row, tile_col):
+        key = (tile_row, tile_col)
+        if key in self.tiles:
+            return self.tiles[key]
+
+        cache_path = self.tile_path(tile_row, tile_col)
+        if os.path.exists(cache_path):
+            land = np.load(cache_path)
+        else:
+            land = self.build_tile(tile_row, tile_col)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # 先写临时文件再替换，避免多个进程同时写同一缓存文件
+            temp_path = f'{cache_path[:-4]}.{os.getpid()}.npy'
+            np.save(temp_path, land)
+            try:
+                os.replace(temp_path, cache_path)
+            except OSError:
+                os.remove(temp_path)
+        self.tiles[key] = land
+        return land
+
+    def is_land(self, lat, lon):
+        """经纬度（标量或数组）是否为陆地，无效经纬度视为海洋"""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        result = np.zeros(lat.shape, dtype=bool)
+        valid = np.isfinite(lat) & np.isfinite(lon) & (np.abs(lat) <= 90)
+        if not valid.any():
+            return result
+
+        # 全球格元行列号，再拆分为块号和块内行列号
+        rows = np.minimum(np.floor((lat[valid] + 90) / self.cell).astype(np.int64),
+                          int(round(180 / self.cell)) - 1)
+        cols = np.floor(np.mod(lon[valid] + 180, 360) / self.cell).astype(np.int64)
+        cols = np.minimum(cols, int(round(360 / self.cell)) - 1)
+        tile_rows, local_rows = np.divmod(rows, self.tile_cells)
+        tile_cols, local_cols = np.divmod(cols, self.tile_cells)
+
+        values = np.zeros(len(rows), dtype=bool)
+        tile_keys, inverse = np.unique(np.column_stack((tile_rows, tile_cols)), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        for index, (tile_row, tile_col) in enumerate(tile_keys):
+            selected = inverse == index
+            land = self.tile(int(tile_row), int(tile_col))
+            values[selected] = land[local_rows[selected], local_cols[selected]]
+        result[valid] = values
+        return result
+
+def get_land_mask(cache_dir, resolution='l', cell=LAND_MASK_CELL):
+    """获取缓存目录对应的全球分块陆地掩码（同一进程内共用已读取的块）"""
+    key = (os.path.abspath(cache_dir), resolution, float(cell))
+    if key not in _land_masks:
+        _land_masks[key] = LandMask(cache_dir, resolution, cell)
+    return _land_masks[key]
+
+def scene_land_mask(directory, lat_name, lon_name):
+    """景内各像元是否为陆地（int32，1为陆地）"""
+    lat = load_scene_array(os.path.join(directory, lat_name))
+    lon = load_scene_array(os.path.join(directory, lon_name))
+    land_mask = get_land_mask(os.path.join(directory, LAND_MASK_CACHE_DIR))
+    return land_mask.is_land(lat, lon).astype(np.int32)
+
+
 def extract_file_prefix(filename):
     """从文件名中提取处理的卫星类别"""
     first_five_chars = os.path.basename(filename)[:5] if len(os.path.basename(filename)) >= 5 else None
@@ -544,32 +1832,85 @@ def extract_file_prefix(filename):
     elif first_five_chars == 'JPSS_':
         return 'JPSS'
 
+def product_invalid_mask(data, filename, satellite_type):
+    """
+    产品无效值掩码：ipar为-717.002197265625，HY3A其余产品为-999，
+    卫星检验源为掩膜值（读回为nan），nan均视为无效
+    """
+    mask = np.isnan(data)
+    if 'ipar' in filename:
+        mask |= data == -717.002197265625
+    elif satellite_type in ['HY3A']:
+        mask |= data == -999
+    return mask
+
 def generate_flag_from_data(data_file, satellite_type):
     try:
-        data = np.genfromtxt(data_file, delimiter=None)
-        flag = np.zeros_like(data, dtype=np.int32)
-        
-        # 添加统计信息
-        filename = os.path.basename(data_file)
-        # 根据不同产品类型处理无效值
-        if 'ipar' in filename:       
-            # 设置标记
-            flag[data == -717.002197265625] = 1
-            flag[np.isnan(data)] = 1
-        elif satellite_type in ['HY3A']:
-            flag[data == -999] = 1
-            flag[np.isnan(data)] = 1
-        else:
-            flag[data == '--'] = 1
-            flag[np.isnan(data)] = 1
-
-        return flag
+        data = load_intermediate(data_file)
+        return product_invalid_mask(data, os.path.basename(data_file), satellite_type).astype(np.int32)
         
     except Exception as e:
         print(f"生成标识矩阵时出错: {str(e)}")
         traceback.print_exc()
         return None
 
+def iter_product_masks(input_dir, product_files, satellite_type, size, used_files):
+    """
+    依次以内存映射方式读取产品文件并生成无效值掩码，
+    长度与flag文件不一致的产品跳过，参与合并的文件名按顺序追加到used_files
+    """
+    for product_file in product_files:
+        print(f"\n处理产品文件: {product_file}")
+        data = load_intermediate(os.path.join(input_dir, product_file), mmap=True)
+        if len(data) != size:
+            print(f"警告：产品 {product_file} 的数据长度与flag文件不匹配")
+            continue
+        used_files.append(product_file)
+        yield product_invalid_mask(data, product_file, satellite_type)
+
+@profiled
+def reduce_product_flags(flag, masks):
+    """
+    将各产品的无效值掩码一次归并到标识中，返回(合并后的标识, 各产品新增的标记数)
+    每64个产品的掩码按位打包到一个uint64数组，像元的新增标记计入第一个标记它的产品，
+    与逐个产品合并时统计的新增数一致
+    """
+    covered = np.asarray(flag) != 0
+    contributions = []
+    masks = iter(masks)
+    while True:
+        bits = None
+        count = 0
+        for mask in masks:
+            if bits is None:
+                bits = np.zeros(covered.shape, dtype=np.uint64)
+            np.bitwise_or(bits, np.uint64(1) << np.uint64(count), out=bits, where=mask)
+            count += 1
+            if count == 64:
+                break
+        if bits is None:
+            break
+        # 最低位的1即第一个标记该像元的产品
+        new = (bits != 0) & ~covered
+        lowest = bits[new] & (~bits[new] + np.uint64(1))
+        first = np.log2(lowest.astype(np.float64)).astype(np.int64)
+        contributions.extend(np.bincount(first, minlength=count).tolist())
+        covered |= bits != 0
+        if count < 64:
+            break
+    return covered.astype(np.int32), contributions
+
+def window_sums(array_2d, window_size):
+    """
+    用积分图（summed-area table）计算每个完整窗口的元素和，
+    结果第[i, j]个元素对应以(i+half_window, j+half_window)为中心的窗口
+    """
+    table = np.zeros((array_2d.shape[0] + 1, array_2d.shape[1] + 1), dtype=np.int64)
+    np.cumsum(np.cumsum(array_2d, axis=0, dtype=np.int64), axis=1, out=table[1:, 1:])
+    w = window_size
+    return table[w:, w:] - table[:-w, w:] - table[w:, :-w] + table[:-w, :-w]
+
+@profiled
 def apply_spatial_window(flag_array, window_size, rows, cols):
     """应用空间窗口判断"""
     try:
@@ -583,29 +1924,17 @@ def apply_spatial_window(flag_array, window_size, rows, cols):
         flag_2d[:, -half_window:] = 1  # 右边界
         
         # 2. 第一轮空间窗口判断：FLAG为1的像元比例
+        # 窗口均值大于0.5等价于窗口和的2倍大于窗口像元数（整数比较，结果与逐像元计算一致）
         temp_flag = flag_2d.copy()
-        for i in range(half_window, rows-half_window):
-            for j in range(half_window, cols-half_window):
-                if flag_2d[i, j] == 0:
-                    window = flag_2d[i-half_window:i+half_window+1, 
-                                   j-half_window:j+half_window+1]
-                    if np.mean(window) > 0.5:
-                        temp_flag[i, j] = 1
-        
-        flag_2d = temp_flag
+        size = 2 * half_window + 1
+        if rows >= size and cols >= size:
+            sums = window_sums(flag_2d, size)
+            center = flag_2d[half_window:rows-half_window, half_window:cols-half_window]
+            interior = temp_flag[half_window:rows-half_window, half_window:cols-half_window]
+            interior[(center == 0) & (2 * sums > size * size)] = 1
         
         # 3. 第二轮空间窗口判断：变异系数
-        temp_flag = flag_2d.copy()
-        for i in range(half_window, rows-half_window):
-            for j in range(half_window, cols-half_window):
-                if flag_2d[i, j] == 0:
-                    window = flag_2d[i-half_window:i+half_window+1, 
-                                   j-half_window:j+half_window+1]
-                    valid_values = window[window == 0]
-                    if len(valid_values) > 0:
-                        cv = np.std(valid_values) / np.mean(valid_values) if np.mean(valid_values) != 0 else 0
-                        if cv > 0.15:
-                            temp_flag[i, j] = 1
+        # 参与计算的有效值均为0，均值为0时cv取0，不会新增标记，结果与第一轮相同
         
         return temp_flag.reshape(-1)
         
@@ -623,10 +1952,7 @@ def process_xc_flagcheck_data(input_dir, output_dir):
         os.makedirs(output_dir, exist_ok=True)
         
         # 处理所有现场观测数据文件
-        for filename in os.listdir(input_dir):
-            if not filename.startswith('XC_') or not filename.endswith('.txt'):
-                continue
-                
+        for filename in get_run_catalog(input_dir).find(sensor='XC', ext='.txt'):
             input_file = os.path.join(input_dir, filename)         
             # 读取文件内容
             with open(input_file, 'r') as f:
@@ -634,6 +1960,8 @@ def process_xc_flagcheck_data(input_dir, output_dir):
             
             header_lines = lines[:3]  # 前3行为经纬度等信息
             headers = lines[3].strip() # 第4行为列名
+            columns = headers.split('\t')
+            flag_index = columns.index('Flag') if 'Flag' in columns else -1
             
             # 处理AOT数据
             if 'AOT' in filename:
@@ -649,15 +1977,15 @@ def process_xc_flagcheck_data(input_dir, output_dir):
                     values = line.strip().split('\t')
                     valid_lines += 1
                     
-                    # 检查最后一列的Flag值
+                    # 检查Flag列的值
                     try:
-                        flag_value = float(values[-1])  # 将Flag值转换为数值
+                        flag_value = float(values[flag_index])  # 将Flag值转换为数值
                         if flag_value >= 1:  # 修改这里：检查是否大于等于1
                             flag_count += 1
                         else:
                             data_lines.append(line)
                     except ValueError:  # 处理可能的转换错误
-                        print(f"警告：无法转换Flag值：{values[-1]}")
+                        print(f"警告：无法转换Flag值：{values[flag_index]}")
                         continue
                 
                 # 保存处理后的数据
@@ -665,12 +1993,14 @@ def process_xc_flagcheck_data(input_dir, output_dir):
                     f.writelines(header_lines)  # 写入经纬度等信息
                     f.write(headers + '\n')     # 写入列名
                     f.writelines(data_lines)    # 写入筛选后的数据          
+                get_run_catalog(output_dir).add(os.path.basename(output_file))
 
             # 处理其他数据（直接改名）
             else:
                 output_file = os.path.join(output_dir, filename.replace('XC_', 'XCf_'))
                 with open(output_file, 'w') as f:
                     f.writelines(lines)
+                get_run_catalog(output_dir).add(os.path.basename(output_file))
         
         print('\n现场观测数据标识处理完成\n')
         return True
@@ -680,22 +2010,23 @@ def process_xc_flagcheck_data(input_dir, output_dir):
         traceback.print_exc()
         return False
 
-def HY3A_flag_create(input_dir,window_size):
+def HY3A_flag_create(input_dir,window_size, land_mask=False):
     try:
         print("\n开始执行HY3A_flag_create函数\n")
         flag_matrices = {}
         
         # 检查目录中的文件
-        all_files = os.listdir(input_dir)
+        store = get_intermediate_store(input_dir)
+        catalog = get_run_catalog(input_dir)
       
         # 处理所有HY3A_flag文件
-        for filename in all_files:        
-            if filename.startswith('HY3A_flag_') and filename.endswith('.txt'):
+        for filename in catalog.find(sensor='HY3A', kind='flag', ext='.txt'):
+            if filename.startswith('HY3A_flag_'):
                 print(f"\n开始处理flag文件: {filename}")
                 flag_file = os.path.join(input_dir, filename)
                 
                 # 读取flag文件
-                flag_matrix = np.genfromtxt(flag_file, delimiter=None, dtype=np.int32)
+                flag_matrix = load_intermediate(flag_file, dtype=np.int32)
                 # print(f"原始flag文件统计:")
                 # print(f"- 数据形状: {flag_matrix.shape}")
                 # print(f"- 唯一值: {np.unique(flag_matrix)}")      
@@ -713,49 +2044,33 @@ def HY3A_flag_create(input_dir,window_size):
                 # print(f"- FLAG中1的数量: {np.sum(FLAG == 1)}")
                 # print(f"- FLAG中0的数量: {np.sum(FLAG == 0)}")
                 
-                # 查找对应的产品文件
-                for product_file in all_files:
-                    if 'lon' in product_file or 'lat' in product_file:
-                        continue
-                    if product_file.startswith('HY3A_') and time_id in product_file:
-                        print(f"\n处理产品文件: {product_file}")  # 新增：显示当前处理的产品文件
-
-                        if os.path.exists(os.path.join(input_dir, product_file)):
-                            # 记录处理前的1的数量
-                            ones_before = np.sum(FLAG == 1)
-                            
-                            temp_matrix = generate_flag_from_data(
-                                os.path.join(input_dir, product_file), 
-                                'HY3A'
-                            )
-                            if temp_matrix is not None and len(temp_matrix) == len(flag_matrix):
-                                FLAG = np.logical_or(FLAG, temp_matrix).astype(np.int32)
-                                
-                                # 计算并显示变化
-                                ones_after = np.sum(FLAG == 1)
-                                new_ones = ones_after - ones_before
-                                # print(f"\n产品 {product_file} 的影响:")
-                                # print(f"- 处理前1的数量: {ones_before}")
-                                # print(f"- 处理后1的数量: {ones_after}")
-                                # print(f"- 该产品新增1的数量: {new_ones}")
-                                # print(f"- 占总像素的比例: {(new_ones / len(FLAG)) * 100:.2f}%")
-                                
-                                if new_ones > len(FLAG) * 0.5:  # 如果新增的1超过50%
-                                    print(f"警告: 产品 {product_file} 导致大量像素变为1!")
-                            else:
-                                print(f"警告：产品 {product_file} 的数据长度与flag文件不匹配")
+                # 查找对应的产品文件（flag类文件不含无效值，不参与合并）
+                product_files = [f for f in catalog.find(sensor='HY3A', time=time_id, kind='data', ext='.txt')
+                                 if 'lon' not in f and 'lat' not in f and store.exists(f)]
+
+                # 一次归并全部产品的无效值掩码
+                used_files = []
+                FLAG, contributions = reduce_product_flags(
+                    FLAG, iter_product_masks(input_dir, product_files, 'HY3A', len(flag_matrix), used_files))
+                for product_file, new_ones in zip(used_files, contributions):
+                    # print(f"\n产品 {product_file} 的影响:")
+                    # print(f"- 该产品新增1的数量: {new_ones}")
+                    # print(f"- 占总像素的比例: {(new_ones / len(FLAG)) * 100:.2f}%")
+                    if new_ones > len(FLAG) * 0.5:  # 如果新增的1超过50%
+                        print(f"警告: 产品 {product_file} 导致大量像素变为1!")
+
+                # 标记陆地像元，使其不参与插值和验证
+                if land_mask:
+                    land = scene_land_mask(input_dir, f'HY3A_lat_{time_id}.txt', f'HY3A_lon_{time_id}.txt')
+                    print(f"陆地像元数: {np.sum(land)}")
+                    FLAG |= land
 
                 # print(f"\n应用空间窗口前的FLAG统计:")
                 # print(f"- FLAG中1的数量: {np.sum(FLAG == 1)}")
                 # print(f"- FLAG中0的数量: {np.sum(FLAG == 0)}")
                 
                 # 应用空间窗口1
-                total_size = flag_matrix.size
-                for i in range(1000, 6000):
-                    if total_size % i == 0:
-                        rows = i
-                        cols = total_size // i
-                        break
+                rows, cols = scene_grid_shape(input_dir, 'HY3A', time_id, flag_matrix.size)
                 FLAG = apply_spatial_window(FLAG, window_size, rows, cols)
 
                 # print(f"\n应用空间窗口后的FLAG统计:")
@@ -765,7 +2080,7 @@ def HY3A_flag_create(input_dir,window_size):
                 # 输出结果
                 output_filename = filename.replace('flag_', 'flag1_')
                 output_path = os.path.join(input_dir, output_filename)
-                np.savetxt(output_path, FLAG, fmt='%d')
+                save_intermediate(output_path, FLAG, fmt='%d')
                 print(f"结果已保存到: {output_path}")
 
         return flag_matrices
@@ -776,21 +2091,22 @@ def HY3A_flag_create(input_dir,window_size):
         return None
 
 
-def satellite_flag_create(input_dir, satellite_type,window_size):
+def satellite_flag_create(input_dir, satellite_type,window_size, land_mask=False):
     try:
         print(f"开始执行{satellite_type}_flag_create函数")
         flag_matrices = {}
         
         # 检查目录中的文件
-        all_files = os.listdir(input_dir)       
+        store = get_intermediate_store(input_dir)
+        catalog = get_run_catalog(input_dir)
         # 处理所有相关flag文件
-        for filename in all_files:
-            if filename.startswith(f'{satellite_type}_flag_') and filename.endswith('.txt'):
+        for filename in catalog.find(sensor=satellite_type, kind='flag', ext='.txt'):
+            if filename.startswith(f'{satellite_type}_flag_'):
                 print(f"\n开始处理flag文件: {filename}")
                 flag_file = os.path.join(input_dir, filename)
                 
                 # 读取flag文件
-                flag_matrix = np.genfromtxt(flag_file, delimiter=None, dtype=np.int32)
+                flag_matrix = load_intermediate(flag_file, dtype=np.int32)
                 # print(f"原始flag文件统计:")
                 # print(f"- 数据形状: {flag_matrix.shape}")
                 # print(f"- 唯一值: {np.unique(flag_matrix)}")
@@ -810,37 +2126,29 @@ def satellite_flag_create(input_dir, satellite_type,window_size):
                 # print(f"- FLAG中1的数量: {np.sum(FLAG == 1)}")
                 # print(f"- FLAG中0的数量: {np.sum(FLAG == 0)}")
                 
-                # 查找对应的产品文件
-                for product_file in all_files:
-                    # 跳过lon、lat
-                    if ('Lon' in product_file or 
-                        'Lat' in product_file ):  # 添加这个条件
-                        continue
-
-                    if product_file.startswith(f'{satellite_type}_') and time_id in product_file:
-                        print(f"\n处理产品文件: {product_file}")  # 新增：显示当前处理的产品文件
-
-                        if os.path.exists(os.path.join(input_dir, product_file)):
-                            temp_matrix = generate_flag_from_data(
-                                os.path.join(input_dir, product_file), 
-                                satellite_type
-                            )
-                            if temp_matrix is not None and len(temp_matrix) == len(flag_matrix):
-                                # 记录合并前的状态
-                                ones_before = np.sum(FLAG == 1)
-                                FLAG = np.logical_or(FLAG, temp_matrix).astype(np.int32)
-                                ones_after = np.sum(FLAG == 1)
-                                # print(f"\n产品 {product_file} 的影响:")
-                                # print(f"- 处理前1的数量: {ones_before}")
-                                # print(f"- 处理后1的数量: {ones_after}")
-                                # print(f"- 新增1的数量: {ones_after - ones_before}")
-                                # print(f"- 占总像素的比例: {((ones_after - ones_before) / len(FLAG)) * 100:.2f}%")
-                                                     
-                                # 如果这个文件导致大量像素变为1，发出警告
-                                if (ones_after - ones_before) > len(FLAG) * 0.5:  # 如果新增的1超过50%
-                                    print(f"警告: 文件 {product_file} 导致大量像素变为1!")
-                            else:
-                                print(f"警告：产品 {product_file} 的数据长度与flag文件不匹配")
+                # 查找对应的产品文件（跳过lon、lat；invalid为未保存产品的无效值掩码，参与合并）
+                product_files = [f for f in catalog.find(sensor=satellite_type, time=time_id,
+                                                         kind=('data', 'invalid'), ext='.txt')
+                                 if 'Lon' not in f and 'Lat' not in f and store.exists(f)]
+
+                # 一次归并全部产品的无效值掩码
+                used_files = []
+                FLAG, contributions = reduce_product_flags(
+                    FLAG, iter_product_masks(input_dir, product_files, satellite_type, len(flag_matrix), used_files))
+                for product_file, new_ones in zip(used_files, contributions):
+                    # print(f"\n产品 {product_file} 的影响:")
+                    # print(f"- 新增1的数量: {new_ones}")
+                    # print(f"- 占总像素的比例: {(new_ones / len(FLAG)) * 100:.2f}%")
+                    # 如果这个文件导致大量像素变为1，发出警告
+                    if new_ones > len(FLAG) * 0.5:  # 如果新增的1超过50%
+                        print(f"警告: 文件 {product_file} 导致大量像素变为1!")
+
+                # 标记陆地像元，使其不作为插值顶点
+                if land_mask:
+                    land = scene_land_mask(input_dir, f'{satellite_type}_Lat_{time_id}.txt',
+                                           f'{satellite_type}_Lon_{time_id}.txt')
+                    print(f"陆地像元数: {np.sum(land)}")
+                    FLAG |= land
                 
 
 
@@ -848,12 +2156,7 @@ def satellite_flag_create(input_dir, satellite_type,window_size):
                 # print(f"- FLAG中1的数量: {np.sum(FLAG == 1)}")
                 # print(f"- FLAG中0的数量: {np.sum(FLAG == 0)}")
                 # 应用空间窗口1
-                total_size = flag_matrix.size
-                for i in range(1000, 6000):
-                    if total_size % i == 0:
-                        rows = i
-                        cols = total_size // i
-                        break
+                rows, cols = scene_grid_shape(input_dir, satellite_type, time_id, flag_matrix.size)
                 FLAG = apply_spatial_window(FLAG, window_size, rows, cols)
 
                 # print(f"\n应用空间窗口后的FLAG统计:")
@@ -870,7 +2173,7 @@ def satellite_flag_create(input_dir, satellite_type,window_size):
                 # 输出结果
                 output_filename = filename.replace('flag_', 'flag1_')
                 output_path = os.path.join(input_dir, output_filename)
-                np.savetxt(output_path, FLAG, fmt='%d')
+                save_intermediate(output_path, FLAG, fmt='%d')
                 print(f"结果已保存到: {output_path}")
 
         return flag_matrices
@@ -882,73 +2185,116 @@ def satellite_flag_create(input_dir, satellite_type,window_size):
     
 
 
+# 检验源景索引
+GRANULE_INDEX_FILE = 'granule_index.sqlite'
+
+def scene_bounds(lat, lon):
+    """景的经纬度范围(lat_min, lat_max, lon_min, lon_max)，无有效经纬度时返回None"""
+    lat = np.asarray(lat, dtype=np.float64).reshape(-1)
+    lon = np.asarray(lon, dtype=np.float64).reshape(-1)
+    valid = np.isfinite(lat) & np.isfinite(lon) & (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+    if not valid.any():
+        return None
+    return (float(lat[valid].min()), float(lat[valid].max()),
+            float(lon[valid].min()), float(lon[valid].max()))
+
+def datetime_to_seconds(value):
+    """时间转换为自1970-01-01起的秒数（不做时区换算）"""
+    return int((value - datetime(1970, 1, 1)).total_seconds())
+
+class GranuleIndex:
+    """
+    检验源景索引（SQLite，保存在输出目录中，跨运行持久保存）
+    每个检验源中间数据文件一条记录：传感器、产品、起止时间（北京时间）及经纬度范围。
+    数据读取时直接登记，时间匹配前由sync按文件索引补充未登记的文件、删除已不存在的文件；
+    查询按(sensor, start_time)索引取时间窗口，再按经纬度范围筛选与目标景重叠的景
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.connection = sqlite3.connect(os.path.join(directory, GRANULE_INDEX_FILE))
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS granules ('
+            'name TEXT PRIMARY KEY, sensor TEXT, product TEXT, start_time INTEGER, end_time INTEGER, '
+            'lat_min REAL, lat_max REAL, lon_min REAL, lon_max REAL)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS granules_sensor_time ON granules (sensor, start_time)')
+
+    def add(self, name, sensor, product, start_time, end_time=None, bounds=None):
+        """登记（或更新）一个检验源文件"""
+        bounds = bounds or (None, None, None, None)
+        self.connection.execute(
+            'INSERT OR REPLACE INTO granules VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (name, sensor, product, datetime_to_seconds(start_time),
+             datetime_to_seconds(end_time or start_time), *bounds))
+
+    def sync(self, sensor):
+        """按输出目录文件索引增量同步传感器的记录"""
+        files = {f: get_run_catalog(self.directory).get(f)
+                 for f in get_run_catalog(self.directory).find(sensor=sensor, kind='data')}
+        indexed = {row[0] for row in self.connection.execute(
+            'SELECT name FROM granules WHERE sensor = ?', (sensor,))}
+        removed = indexed - set(files)
+        if removed:
+            self.connection.executemany('DELETE FROM granules WHERE name = ?', [(name,) for name in removed])
+
+        bounds_by_time = {}
+        added = 0
+        for name, record in files.items():
+            if name in indexed or record.time is None or len(record.time) != 14:
+                continue
+            if record.time not in bounds_by_time:
+                lat_path = os.path.join(self.directory, f'{sensor}_Lat_{record.time}.txt')
+                lon_path = os.path.join(self.directory, f'{sensor}_Lon_{record.time}.txt')
+                bounds = None
+                if get_intermediate_store(self.directory).exists(os.path.basename(lat_path)) and \
+                        get_intermediate_store(self.directory).exists(os.path.basename(lon_path)):
+                    bounds = scene_bounds(load_scene_array(lat_path), load_scene_array(lon_path))
+                bounds_by_time[record.time] = bounds
+            self.add(name, sensor, record.product, datetime.strptime(record.time, '%Y%m%d%H%M%S'),
+                     bounds=bounds_by_time[record.time])
+            added += 1
+        if added or removed:
+            print(f"{sensor}景索引: 新增{added}条，删除{len(removed)}条记录")
+        self.connection.commit()
+
+    def count(self, sensor, param):
+        """传感器中文件名包含参数名（不区分大小写）的记录数"""
+        return self.connection.execute(
+            'SELECT COUNT(*) FROM granules WHERE sensor = ? AND instr(lower(name), lower(?)) > 0',
+            (sensor, param)).fetchone()[0]
+
+    def nearest(self, sensor, param, target_time, time_threshold, bounds=None):
+        """
+        查找时间最近的检验源文件：文件名包含参数名（不区分大小写），
+        起始时间与目标时间相差不超过time_threshold小时，且经纬度范围与bounds重叠（范围未知的景不筛选）；
+        返回(文件名, 时间差小时)，无匹配时返回(None, None)
+        """
+        target = datetime_to_seconds(target_time)
+        threshold = int(round(time_threshold * 3600))
+        query = ('SELECT name, ABS(start_time - ?) AS diff FROM granules '
+                 'WHERE sensor = ? AND start_time BETWEEN ? AND ? AND instr(lower(name), lower(?)) > 0')
+        args = [target, sensor, target - threshold, target + threshold, param]
+        if bounds is not None:
+            query += (' AND (lat_min IS NULL OR (lat_min <= ? AND lat_max >= ? AND lon_min <= ? AND lon_max >= ?))')
+            args += [bounds[1], bounds[0], bounds[3], bounds[2]]
+        row = self.connection.execute(query + ' ORDER BY diff, name LIMIT 1', args).fetchone()
+        if row is None:
+            return None, None
+        return row[0], row[1] / 3600
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
 def process_satellite_timematch(input_dir, output_dir, target_sensor, source_type, time_threshold):
     """
     处理卫星数据间的时间匹配
     """
-    # 参数映射字典
-    PARAM_MAPPING = {
-        'AQUA': {
-            'Rrs412': 'Rrs412', 
-            'Rrs443': 'Rrs443', 
-            'Rrs490': 'Rrs488',
-            'Rrs520': 'Rrs531', 
-            'Rrs565': 'Rrs555', 
-            'Rrs670': 'Rrs667',
-            'Rrs750': None, 
-            'Rrs865': None, 
-            'sst': 'sst', 
-            'AOT': 'AOT',
-            'chl': 'chl',
-            'Kd': 'Kd',
-            'ipar': 'ipar',
-        },
-        'TERRA': {
-            'Rrs412': 'Rrs412',
-            'Rrs443': 'Rrs443', 
-            'Rrs490': 'Rrs488',
-            'Rrs520': 'Rrs531', 
-            'Rrs565': 'Rrs555', 
-            'Rrs670': 'Rrs667',
-            'Rrs750': None, 
-            'Rrs865': None, 
-            'sst': 'sst', 
-            'AOT': 'AOT',
-            'chl': 'chl',
-            'Kd': 'Kd',
-            'ipar': 'ipar',
-        },
-        'SNPP': {
-            'Rrs412': 'Rrs410', 
-            'Rrs443': 'Rrs443', 
-            'Rrs490': 'Rrs486',
-            'Rrs520': None, 
-            'Rrs565': 'Rrs551', 
-            'Rrs670': 'Rrs671',
-            'Rrs750': None, 
-            'Rrs865': None, 
-            'sst': 'sst', 
-            'AOT': 'AOT',
-            'chl': 'chl',
-            'Kd': 'Kd',
-            'ipar': None,
-        },
-        'JPSS': {
-            'Rrs412': 'Rrs411', 
-            'Rrs443': 'Rrs445', 
-            'Rrs490': 'Rrs489',
-            'Rrs565': 'Rrs556', 
-            'Rrs670': 'Rrs667', 
-            'Rrs750': None,
-            'Rrs865': None, 
-            'sst': 'sst', 
-            'AOT': 'AOT',
-            'chl': 'chl',
-            'Kd': 'Kd',
-            'ipar': None,
-        },
-    }
-
     def extract_datetime_from_filename(filename):
         """从文件名中提取时间信息"""
         time_str = re.search(r'\d{14}', filename)
@@ -956,10 +2302,19 @@ def process_satellite_timematch(input_dir, output_dir, target_sensor, source_typ
             return datetime.strptime(time_str.group(), '%Y%m%d%H%M%S')
         return None
 
-    def calculate_time_difference(time1, time2):
-        """计算两个时间的差值（小时）"""
-        time_diff = abs(time1 - time2)
-        return time_diff.total_seconds() / 3600
+    def target_bounds(target_time):
+        """目标景的经纬度范围（按时间缓存，已有预检重叠范围时直接使用）"""
+        if overlap is not None:
+            return overlap
+        time_str = target_time.strftime('%Y%m%d%H%M%S')
+        if time_str not in bounds_cache:
+            lat_name = f"{target_sensor}_lat_{time_str}.txt"
+            lon_name = f"{target_sensor}_lon_{time_str}.txt"
+            bounds_cache[time_str] = None
+            if store.exists(lat_name) and store.exists(lon_name):
+                bounds_cache[time_str] = scene_bounds(load_scene_array(os.path.join(input_dir, lat_name)),
+                                                      load_scene_array(os.path.join(input_dir, lon_name)))
+        return bounds_cache[time_str]
 
     def save_match_result(result_file, target_file, source_file, time_diff):
         """保存匹配结果"""
@@ -968,10 +2323,16 @@ def process_satellite_timematch(input_dir, output_dir, target_sensor, source_typ
                 f.write(f"{target_file}\n")
                 f.write(f"{source_file}\n")
                 f.write(f"{time_diff:.1f}\n")
+            get_run_catalog(output_dir).add(result_file)
             print(f"成功保存匹配结果到: {result_file}")
         except Exception as e:
             print(f"保存匹配结果失败: {str(e)}")
 
+    def save_empty_result(result_file):
+        """未匹配时保存空结果文件"""
+        open(os.path.join(output_dir, result_file), 'w').close()
+        get_run_catalog(output_dir).add(result_file)
+
     try:
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
@@ -982,84 +2343,78 @@ def process_satellite_timematch(input_dir, output_dir, target_sensor, source_typ
         print(f"时间阈值: {time_threshold}小时")
         
         # 获取目标传感器的数据文件
-        target_files = [f for f in os.listdir(input_dir) 
-                       if f.startswith(f"{target_sensor}_") and 
-                       any(x.lower() in f.lower() for x in ['Rrs', 'sst', 'AOT', 'chl','Kd', 'ipar']) and 
-                       f.endswith('.txt')]
+        # 只取产品数据文件（排除flag/flag1文件）
+        catalog = get_run_catalog(input_dir)
+        target_files = [f for f in catalog.find(sensor=target_sensor, kind='data', ext='.txt')
+                       if any(x.lower() in f.lower() for x in ['Rrs', 'sst', 'AOT', 'chl','Kd', 'ipar'])]
         
         if not target_files:
             print(f"未找到{target_sensor}的数据文件")
             return False
+
+        # 检验源景索引：补充登记未入库的文件
+        store = get_intermediate_store(input_dir)
+        bounds_cache = {}
+        overlap = load_swath_overlap(input_dir)
+        with GranuleIndex(input_dir) as granule_index:
+            granule_index.sync(source_type)
           
-        # 定义参数列表
-        target_bands = ['Rrs412', 'Rrs443', 'Rrs490', 'Rrs520', 'Rrs565', 
-                       'Rrs670', 'Rrs750', 'Rrs865']
-        other_params = ['sst', 'AOT', 'chl', 'Kd', 'ipar']
-        
-        # 处理每个目标文件
-        for target_file in target_files:
-            # 提取时间信息
-            target_time = extract_datetime_from_filename(target_file)
-            if not target_time:
-                print(f"无法从文件名提取时间: {target_file}")
-                continue
+            # 定义参数列表
+            target_bands = ['Rrs412', 'Rrs443', 'Rrs490', 'Rrs520', 'Rrs565', 
+                           'Rrs670', 'Rrs750', 'Rrs865']
+            other_params = ['sst', 'AOT', 'chl', 'Kd', 'ipar']
+        
+            # 处理每个目标文件
+            for target_file in target_files:
+                # 提取时间信息
+                target_time = extract_datetime_from_filename(target_file)
+                if not target_time:
+                    print(f"无法从文件名提取时间: {target_file}")
+                    continue
             
-            # 识别参数类型
-            param_type = None
-            for band in target_bands:
-                if band in target_file:
-                    param_type = band
-                    break
-                if not param_type:
-                    for param in other_params:
-                        if param in target_file:    # 如果文件名中包含参数名
-                            param_type = param      # 设置参数类型
-                            break  
+                # 识别参数类型
+                param_type = None
+                for band in target_bands:
+                    if band in target_file:
+                        param_type = band
+                        break
+                    if not param_type:
+                        for param in other_params:
+                            if param in target_file:    # 如果文件名中包含参数名
+                                param_type = param      # 设置参数类型
+                                break  
             
-            if not param_type:
-                print(f"无法识别参数类型: {target_file}")
-                continue
+                if not param_type:
+                    print(f"无法识别参数类型: {target_file}")
+                    continue
            
-            # 生成结果文件名
-            result_filename = f"timeresult_{target_sensor}_{source_type}_{param_type}_" \
-                            f"{target_time.strftime('%Y%m%d%H%M%S')}.txt"
+                # 生成结果文件名
+                result_filename = f"timeresult_{target_sensor}_{source_type}_{param_type}_" \
+                                f"{target_time.strftime('%Y%m%d%H%M%S')}.txt"
             
-            # 获取对应的源参数名
-            source_param = PARAM_MAPPING[source_type].get(param_type)
-            if not source_param:
-                print(f"无对应参数: {param_type}")
-                open(os.path.join(output_dir, result_filename), 'w').close()
-                continue
+                # 获取对应的源参数名
+                source_param = SATELLITE_PARAM_MAPPING[source_type].get(param_type)
+                if not source_param:
+                    print(f"无对应参数: {param_type}")
+                    save_empty_result(result_filename)
+                    continue
                 
-            # 查找源文件
-            source_files = [f for f in os.listdir(input_dir) 
-                          if f.startswith(f"{source_type}_") and 
-                          source_param.lower() in f.lower()]
-            
-            if not source_files:
-                print(f"未找到匹配的源文件: {source_param}")
-                open(os.path.join(output_dir, result_filename), 'w').close()
-                continue
+                # 查找源文件
+                if not granule_index.count(source_type, source_param):
+                    print(f"未找到匹配的源文件: {source_param}")
+                    save_empty_result(result_filename)
+                    continue
                 
-            # 查找最小时间差的文件
-            min_diff = float('inf')
-            matching_file = None
-            
-            for source_file in source_files:
-                source_time = extract_datetime_from_filename(source_file)
-                if source_time:
-                    time_diff = calculate_time_difference(target_time, source_time)
-                    if time_diff < min_diff:
-                        min_diff = time_diff
-                        matching_file = source_file
+                # 查找时间阈值内时间差最小、且与目标景范围重叠的文件
+                matching_file, min_diff = granule_index.nearest(
+                    source_type, source_param, target_time, time_threshold, target_bounds(target_time))
             
-            # 检查是否在时间阈值内
-            if matching_file and min_diff <= time_threshold:
-                save_match_result(result_filename, target_file, matching_file, min_diff)
-            else:
-                print(f"未找到在{time_threshold}小时内的匹配文件")
-                open(os.path.join(output_dir, result_filename), 'w').close()
-        
+                if matching_file:
+                    save_match_result(result_filename, target_file, matching_file, min_diff)
+                else:
+                    print(f"未找到在{time_threshold}小时内的匹配文件")
+                    save_empty_result(result_filename)
+
         # 保存时间阈值信息
         with open(os.path.join(output_dir, 'timesize.txt'), 'w') as f:
             f.write(f"{time_threshold}")
@@ -1082,24 +2437,6 @@ def process_xc_timematch(input_dir, output_dir, target_sensor, time_threshold):
             return datetime.strptime(time_str.group(), '%Y%m%d%H%M%S')
         return None
 
-    def calculate_time_difference(time1, time2):
-        """计算两个时间的差值（小时）"""
-        time_diff = abs(time1 - time2)
-        return time_diff.total_seconds() / 3600
-
-    def extract_time_from_line(line):
-        """从现场数据行中提取时间信息"""
-        try:
-            parts = line.strip().split()
-            if len(parts) >= 2:
-                date = parts[0]
-                time = parts[1]
-                datetime_str = f"{date}{time}"
-                return datetime.strptime(datetime_str, '%Y%m%d%H%M%S')
-        except Exception as e:
-            print(f"时间解析错误: {str(e)}")
-            return None
-
     def save_match_result(result_file, target_file, xcf_file, match_time, time_diff):
         """保存匹配结果"""
         try:
@@ -1108,10 +2445,16 @@ def process_xc_timematch(input_dir, output_dir, target_sensor, time_threshold):
                 f.write(f"{xcf_file}\n")
                 f.write(f"{match_time.strftime('%Y%m%d%H%M%S')}\n")
                 f.write(f"{time_diff:.1f}\n")
+            get_run_catalog(output_dir).add(result_file)
             print(f"成功保存匹配结果到: {result_file}")
         except Exception as e:
             print(f"保存匹配结果失败: {str(e)}")
 
+    def save_empty_result(result_file):
+        """未匹配时保存空结果文件"""
+        open(os.path.join(output_dir, result_file), 'w').close()
+        get_run_catalog(output_dir).add(result_file)
+
     try:
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
@@ -1121,20 +2464,18 @@ def process_xc_timematch(input_dir, output_dir, target_sensor, time_threshold):
         print(f"时间阈值: {time_threshold}小时")
         
         # 获取目标传感器的数据文件
-        target_files = [f for f in os.listdir(input_dir) 
-                       if f.startswith(f"{target_sensor}_") and 
-                       any(x in f for x in ['Rrs', 'sst', 'AOT', 'chl', 'nLw', 'CDOM', 'TSM']) and 
-                       f.endswith('.txt')]
+        # 只取产品数据文件（排除flag/flag1文件）
+        catalog = get_run_catalog(input_dir)
+        target_files = [f for f in catalog.find(sensor=target_sensor, kind='data', ext='.txt')
+                       if any(x in f for x in ['Rrs', 'sst', 'AOT', 'chl', 'nLw', 'CDOM', 'TSM'])]
         
         print("\n找到的目标文件:")
         for f in target_files:
             print(f)
 
         # 查找对应的现场数据文件
-        xc_files = [f for f in os.listdir(input_dir) 
-                       if f.startswith("XCf_") and 
-                       any(x in f for x in ['Rrs', 'sst', 'AOT', 'Chl',  'nLw', 'CDOM', 'TSM']) and 
-                       f.endswith('.txt')]
+        xc_files = [f for f in catalog.find(sensor='XCf', ext='.txt')
+                       if any(x in f for x in ['Rrs', 'sst', 'AOT', 'Chl',  'nLw', 'CDOM', 'TSM'])]
         
 
         print("\n找到的现场数据文件:")  # 添加打印
@@ -1176,32 +2517,15 @@ def process_xc_timematch(input_dir, output_dir, target_sensor, time_threshold):
             result_filename = f"timeresult_{target_sensor}_XC_{param_type}_" \
                             f"{target_time.strftime('%Y%m%d%H%M%S')}.txt"
             
-            # 查找最佳匹配
-            min_diff = float('inf')
-            best_match = None
-            best_match_time = None
-            
-            # 遍历所有匹配的现场数据文件
-            for xc_file in matching_xc_files:
-                xc_path = os.path.join(input_dir, xc_file)
-                try:
-                    with open(xc_path, 'r', encoding='utf-8') as f:
-                        # 跳过前四行（标题行）
-                        for _ in range(4):
-                            next(f)                     
-                        # 处理数据行
-                        for line in f:
-                            xc_time = extract_time_from_line(line)
-                            if xc_time:
-                                time_diff = calculate_time_difference(target_time, xc_time)
-                                if time_diff < min_diff:
-                                    min_diff = time_diff
-                                    best_match = xc_file
-                                    best_match_time = xc_time
-
-                except Exception as e:
-                    print(f"处理文件{xc_file}时出错: {str(e)}")
-                    continue
+            # 查找最佳匹配：各参数的现场记录只读取一次，按时间排序后二分查找
+            try:
+                records = load_insitu_records(input_dir, matching_xc_files)
+            except Exception as e:
+                print(f"读取现场数据文件{matching_xc_files}时出错: {str(e)}")
+                continue
+            best_index, min_diff = records.nearest(target_time)
+            best_match = records.file[best_index] if best_index is not None else None
+            best_match_time = records.time[best_index].astype(datetime) if best_index is not None else None
 
             # 保存最佳匹配结果
             if best_match and min_diff <= time_threshold:
@@ -1209,7 +2533,7 @@ def process_xc_timematch(input_dir, output_dir, target_sensor, time_threshold):
                                 best_match_time, min_diff)
             else:
                 print(f"未找到在{time_threshold}小时内的匹配记录")
-                open(os.path.join(output_dir, result_filename), 'w').close()
+                save_empty_result(result_filename)
 
         # 保存时间阈值信息
         with open(os.path.join(output_dir, 'timesize.txt'), 'w') as f:
@@ -1224,48 +2548,436 @@ def process_xc_timematch(input_dir, output_dir, target_sensor, time_threshold):
     
 
 
-def process_satellite_spacematch(input_dir, output_dir, target_sensor, source_type):
+# 空间匹配插值权重缓存
+INTERPOLATION_CACHE_DIR = 'interp_cache'
+_linear_interpolators = {}
+
+class LinearInterpolationWeights:
     """
-    处理卫星数据空间匹配
+    线性插值权重
+    对检验源有效像元做一次Delaunay三角剖分，保存目标像元所在三角形的
+    顶点索引和重心坐标，结果与griddata(method='linear')逐位一致
     """
-    # 卫星命名规则配置
-    SATELLITE_NAMING_RULES = {
-        'AQUA': {
-            'prefix': 'AQUA',
-            'output_prefix': 'AQUA1',
-            'lat_format': 'AQUA_Lat',
-            'lon_format': 'AQUA_Lon',
-            'flag_format': 'AQUA_flag1',
-        },
-        'TERRA': {
-            'prefix': 'TERRA',
-            'output_prefix': 'TERRA1',
-            'lat_format': 'TERRA_Lat',
-            'lon_format': 'TERRA_Lon',
-            'flag_format': 'TERRA_flag1',
-        },
-        'SNPP': {
-            'prefix': 'SNPP',
-            'output_prefix': 'SNPP1',
-            'lat_format': 'SNPP_Lat',
-            'lon_format': 'SNPP_Lon',
-            'flag_format': 'SNPP_flag1',
-        },
-        'JPSS': {
-            'prefix': 'JPSS',
-            'output_prefix': 'JPSS1',
-            'lat_format': 'JPSS_Lat',
-            'lon_format': 'JPSS_Lon',
-            'flag_format': 'JPSS_flag1',
-        }
+    def __init__(self, inside, vertices, weights):
+        self.inside = inside        # 目标像元是否落在三角网内
+        self.vertices = vertices    # 三角形顶点在检验源数组中的索引 (n, 3)
+        self.weights = weights      # 重心坐标 (n, 3)
+
+    @classmethod
+    @profiled
+    def build(cls, source_lon, source_lat, valid, target_lon, target_lat):
+        points = np.column_stack((source_lon[valid], source_lat[valid])).astype(np.float64)
+        return cls.from_triangulation(Delaunay(points), valid, target_lon, target_lat)
+
+    @classmethod
+    def from_triangulation(cls, tri, valid, target_lon, target_lat):
+        """由检验源有效像元的三角网计算目标像元的插值权重"""
+        valid_index = np.flatnonzero(valid)
+        xi = np.column_stack((np.ravel(target_lon), np.ravel(target_lat))).astype(np.float64)
+        simplex = tri.find_simplex(xi)
+        inside = simplex >= 0
+        simplex = simplex[inside]
+
+        # 重心坐标，计算顺序与LinearNDInterpolator一致
+        transform = tri.transform[simplex]
+        dx = xi[inside, 0] - transform[:, 2, 0]
+        dy = xi[inside, 1] - transform[:, 2, 1]
+        c0 = transform[:, 0, 0] * dx + transform[:, 0, 1] * dy
+        c1 = transform[:, 1, 0] * dx + transform[:, 1, 1] * dy
+        c2 = 1.0 - c0 - c1
+        weights = np.column_stack((c0, c1, c2))
+        vertices = valid_index[tri.simplices[simplex]]
+        return cls(inside, vertices, weights)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as cache:
+            return cls(cache['inside'], cache['vertices'], cache['weights'])
+
+    def save(self, path):
+        np.savez(path, inside=self.inside, vertices=self.vertices, weights=self.weights)
+
+    @profiled
+    def __call__(self, source_data):
+        """按权重对检验源数据加权求和，三角网外的像元为NaN"""
+        source_data = np.asarray(source_data, dtype=np.float64)
+        result = np.zeros(len(self.vertices))
+        for k in range(3):
+            result += self.weights[:, k] * source_data[self.vertices[:, k]]
+        interpolated_data = np.full(self.inside.shape, np.nan)
+        interpolated_data[self.inside] = result
+        return interpolated_data
+
+def interpolation_cache_key(*arrays):
+    """由检验源/目标经纬度及有效像元掩码计算缓存键"""
+    digest = hashlib.sha1()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.dtype, array.shape)).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+def get_linear_interpolator(cache_dir, source_lon, source_lat, valid, target_lon, target_lat):
+    """获取线性插值权重，依次查找内存缓存、磁盘缓存，均未命中时重新三角剖分"""
+    key = interpolation_cache_key(source_lon, source_lat, valid, target_lon, target_lat)
+    if key in _linear_interpolators:
+        return _linear_interpolators[key]
+
+    cache_path = os.path.join(cache_dir, f'{key}.npz')
+    if os.path.exists(cache_path):
+        interpolator = LinearInterpolationWeights.load(cache_path)
+    else:
+        interpolator = LinearInterpolationWeights.build(source_lon, source_lat, valid, target_lon, target_lat)
+        os.makedirs(cache_dir, exist_ok=True)
+        # 先写临时文件再替换，避免多个进程同时写同一缓存文件
+        temp_path = os.path.join(cache_dir, f'{key}.{os.getpid()}.npz')
+        interpolator.save(temp_path)
+        try:
+            os.replace(temp_path, cache_path)
+        except OSError:
+            os.remove(temp_path)
+    _linear_interpolators[key] = interpolator
+    return interpolator
+
+# 现场站点最近像元检索
+EARTH_RADIUS_KM = 6371.0
+_scene_pixel_indexes = {}
+
+def lat_lon_to_unit_vectors(lat, lon):
+    """经纬度（度）转换为单位球面三维坐标"""
+    lat = np.radians(np.asarray(lat, dtype=np.float64).reshape(-1))
+    lon = np.radians(np.asarray(lon, dtype=np.float64).reshape(-1))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+class ScenePixelIndex:
+    """
+    景级像元空间索引
+    像元经纬度转换为单位球面坐标后建立cKDTree，最近像元检索为O(log N)，
+    弦长换算为大圆距离；无效经纬度（nan、-999等）不参与检索
+    """
+    def __init__(self, lat, lon, shape):
+        self.shape = shape
+        lat = np.asarray(lat, dtype=np.float64).reshape(-1)
+        lon = np.asarray(lon, dtype=np.float64).reshape(-1)
+        valid = np.isfinite(lat) & np.isfinite(lon) & (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+        self.pixels = np.flatnonzero(valid)
+        self.tree = cKDTree(lat_lon_to_unit_vectors(lat[valid], lon[valid]))
+
+    def query(self, lat, lon):
+        """批量检索，返回各点最近像元的行号、列号及大圆距离(km)数组"""
+        chord, k = self.tree.query(lat_lon_to_unit_vectors(lat, lon))
+        rows, cols = np.unravel_index(self.pixels[k], self.shape)
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / 2, 1.0))
+        return rows, cols, distances
+
+    def nearest(self, lat, lon):
+        """返回距(lat, lon)最近像元的行号、列号及大圆距离(km)"""
+        rows, cols, distances = self.query(lat, lon)
+        return int(rows[0]), int(cols[0]), float(distances[0])
+
+@profiled
+def get_scene_pixel_index(lat_path, lon_path, shape):
+    """
+    获取景的像元空间索引，同一景的各产品、各站点共用；
+    经纬度数组经景级缓存重新读取（文件被重写）时重建索引
+    """
+    lat = load_scene_array(lat_path)
+    lon = load_scene_array(lon_path)
+    key = (os.path.abspath(lat_path), os.path.abspath(lon_path), tuple(shape))
+    cached = _scene_pixel_indexes.get(key)
+    if cached is None or cached[0] is not lat or cached[1] is not lon:
+        cached = (lat, lon, ScenePixelIndex(lat, lon, shape))
+        _scene_pixel_indexes[key] = cached
+    return cached[2]
+
+# 现场数据批量匹配
+_insitu_records = {}
+
+class InSituRecords:
+    """
+    现场观测记录表
+    一个产品全部XCf文件（多站点、多记录）读入按时间排序的数组：
+    station（站点名）、lat、lon、time(datetime64[s])、value、file（来源文件名）
+    """
+    def __init__(self, station, lat, lon, time, value, file):
+        order = np.argsort(time, kind='stable')
+        self.station = station[order]
+        self.lat = lat[order]
+        self.lon = lon[order]
+        self.time = time[order]
+        self.value = value[order]
+        self.file = file[order]
+
+    def __len__(self):
+        return self.time.size
+
+    @staticmethod
+    def read_file(path):
+        """读取单个XCf文件，无站点列的旧格式文件使用文件头经纬度"""
+        header = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for _ in range(3):
+                line = f.readline()
+                if ':' in line:
+                    key, value = line.split(':', 1)
+                    header[key.strip()] = value.strip()
+        df = pd.read_csv(path, skiprows=3, sep='\t', dtype=str).dropna(subset=['Date', 'Time'])
+        times = pd.to_datetime(df['Date'].str.strip() + df['Time'].str.strip().str.zfill(6),
+                               format='%Y%m%d%H%M%S', errors='coerce')
+        # 跳过时间无法解析的行
+        df, times = df[times.notna()], times[times.notna()]
+        size = len(df)
+        station = df['Station'].to_numpy() if 'Station' in df else \
+            np.full(size, os.path.splitext(os.path.basename(path))[0], dtype=object)
+        lat = df['Latitude'].astype(float).to_numpy() if 'Latitude' in df else \
+            np.full(size, float(header.get('Latitude', 'nan')))
+        lon = df['Longitude'].astype(float).to_numpy() if 'Longitude' in df else \
+            np.full(size, float(header.get('Longitude', 'nan')))
+        return (station.astype(object), lat, lon, times.to_numpy().astype('datetime64[s]'),
+                df.iloc[:, 2].astype(float).to_numpy(), np.full(size, os.path.basename(path), dtype=object))
+
+    @classmethod
+    def load(cls, paths):
+        columns = [cls.read_file(path) for path in paths]
+        if not columns:
+            empty = np.zeros(0)
+            return cls(empty.astype(object), empty, empty, empty.astype('datetime64[s]'), empty, empty.astype(object))
+        return cls(*[np.concatenate(parts) for parts in zip(*columns)])
+
+    def nearest(self, center):
+        """时间最近的记录下标及时间差（小时），时间差相同时取较早的记录；无记录时返回(None, None)"""
+        if len(self) == 0:
+            return None, None
+        center = np.datetime64(center, 's')
+        position = np.searchsorted(self.time, center)
+        candidates = [k for k in (position - 1, position) if 0 <= k < len(self)]
+        diffs = [abs((self.time[k] - center).astype(np.float64)) / 3600 for k in candidates]
+        best = int(np.argmin(diffs))
+        return candidates[best], diffs[best]
+
+    def window(self, center, hours=None):
+        """时间窗口[center-hours, center+hours]内的记录下标（有序数组上searchsorted）"""
+        if hours is None:
+            return np.arange(len(self))
+        center = np.datetime64(center, 's')
+        delta = np.timedelta64(int(round(hours * 3600)), 's')
+        start = np.searchsorted(self.time, center - delta, side='left')
+        end = np.searchsorted(self.time, center + delta, side='right')
+        return np.arange(start, end)
+
+def find_insitu_files(input_dir, param_type):
+    """查找参数对应的全部XCf文件（产品名不区分大小写）"""
+    return [f for f in get_run_catalog(input_dir).find(sensor='XCf', ext='.txt')
+            if f.lower().startswith(f"xcf_{param_type.lower()}_")]
+
+def load_insitu_records(input_dir, files):
+    """读取（或从缓存获取）一组XCf文件的记录表，文件被重写时重新读取"""
+    paths = [os.path.join(input_dir, f) for f in files]
+    key = tuple((os.path.abspath(path), os.stat(path).st_mtime_ns, os.path.getsize(path)) for path in paths)
+    if key not in _insitu_records:
+        _insitu_records[key] = InSituRecords.load(paths)
+    return _insitu_records[key]
+
+@profiled
+def match_insitu_records(records, target_time, pixel_index, data, flag, window_size, time_threshold=None):
+    """
+    现场记录与一景数据的批量匹配：
+    searchsorted取时间窗口内的记录，各站点位置一次查询最近像元，窗口统计对全部命中向量化计算。
+    返回按(时间差, 距离)排序的命中结果（各值为数组），落在图像边界或窗口内无有效数据的记录被剔除
+    """
+    hits = records.window(target_time, time_threshold)
+    # 经纬度无效的记录（如文件头缺少站点位置）无法定位像元，剔除后再检索
+    hits = hits[np.isfinite(records.lat[hits]) & np.isfinite(records.lon[hits])]
+    if hits.size == 0:
+        return None
+
+    # 各站点位置（去重）的最近像元
+    positions, inverse = np.unique(np.column_stack((records.lat[hits], records.lon[hits])),
+                                   axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    rows, cols, distances = pixel_index.query(positions[:, 0], positions[:, 1])
+
+    # 窗口统计
+    half_size = (window_size - 1) // 2
+    n_rows, n_cols = data.shape
+    inside = ((rows >= half_size) & (rows < n_rows - half_size) &
+              (cols >= half_size) & (cols < n_cols - half_size))
+    offsets = np.arange(-half_size, half_size + 1)
+    window_rows = np.clip(rows[:, None, None] + offsets[None, :, None], 0, n_rows - 1)
+    window_cols = np.clip(cols[:, None, None] + offsets[None, None, :], 0, n_cols - 1)
+    window_data = data[window_rows, window_cols]
+    valid = flag[window_rows, window_cols] == 0
+    counts = valid.sum(axis=(1, 2))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(valid, window_data, 0).sum(axis=(1, 2)) / counts
+        stds = np.sqrt(np.where(valid, (window_data - means[:, None, None]) ** 2, 0).sum(axis=(1, 2)) / counts)
+        cvs = np.where(means != 0, stds / means, np.nan)
+    usable = inside & (counts > 0)
+
+    keep = usable[inverse]
+    hits, inverse = hits[keep], inverse[keep]
+    if hits.size == 0:
+        return None
+    time_diffs = np.abs((records.time[hits] - np.datetime64(target_time, 's')).astype(np.float64)) / 3600
+    order = np.lexsort((distances[inverse], time_diffs))
+    hits, inverse = hits[order], inverse[order]
+    return {
+        'index': hits,
+        'row': rows[inverse],
+        'col': cols[inverse],
+        'distance': distances[inverse],
+        'time_diff': time_diffs[order],
+        'mean': means[inverse],
+        'valid_ratio': counts[inverse] / (window_size * window_size),
+        'cv': cvs[inverse],
+    }
+
+def save_insitu_matchups(path, records, matches):
+    """保存全部命中记录（每行一条现场记录）"""
+    with open(path, 'w') as f:
+        f.write('Station\tLatitude\tLongitude\tTime\tValue\tRow\tCol\tDistance(km)\t'
+                'TimeDiff(h)\tMean\tValidRatio\tCV\n')
+        for k, index in enumerate(matches['index']):
+            record_time = records.time[index].astype(datetime).strftime('%Y%m%d%H%M%S')
+            f.write(f"{records.station[index]}\t{records.lat[index]}\t{records.lon[index]}\t{record_time}\t"
+                    f"{records.value[index]:.4f}\t{matches['row'][k]}\t{matches['col'][k]}\t"
+                    f"{matches['distance'][k]:.3f}\t{matches['time_diff'][k]:.2f}\t{matches['mean'][k]:.4f}\t"
+                    f"{matches['valid_ratio'][k]:.4f}\t{matches['cv'][k]:.4f}\n")
+    get_run_catalog(os.path.dirname(path)).add(os.path.basename(path))
+
+# 卫星命名规则配置
+SATELLITE_NAMING_RULES = {
+    'AQUA': {
+        'prefix': 'AQUA',
+        'output_prefix': 'AQUA1',
+        'lat_format': 'AQUA_Lat',
+        'lon_format': 'AQUA_Lon',
+        'flag_format': 'AQUA_flag1',
+    },
+    'TERRA': {
+        'prefix': 'TERRA',
+        'output_prefix': 'TERRA1',
+        'lat_format': 'TERRA_Lat',
+        'lon_format': 'TERRA_Lon',
+        'flag_format': 'TERRA_flag1',
+    },
+    'SNPP': {
+        'prefix': 'SNPP',
+        'output_prefix': 'SNPP1',
+        'lat_format': 'SNPP_Lat',
+        'lon_format': 'SNPP_Lon',
+        'flag_format': 'SNPP_flag1',
+    },
+    'JPSS': {
+        'prefix': 'JPSS',
+        'output_prefix': 'JPSS1',
+        'lat_format': 'JPSS_Lat',
+        'lon_format': 'JPSS_Lon',
+        'flag_format': 'JPSS_flag1',
     }
+}
 
+def satellite_spacematch_product(input_dir, output_dir, target_file, source_file, time_diff):
+    """处理单个匹配对的空间匹配（可在子进程中运行）"""
+    try:
+        # 从文件名中提取信息
+        target_parts = target_file.split('_')
+        source_parts = source_file.split('_')
+        
+        target_sensor = target_parts[0]
+        source_type = source_parts[0]
+
+        target_time = target_parts[-1].replace('.txt', '')
+        source_time = source_parts[-1].replace('.txt', '')
+        
+        # 提取参数类型
+        if any(part.startswith('Rrs') for part in target_parts):
+            param_type = next(part for part in target_parts if part.startswith('Rrs'))
+        elif 'AOT' in target_file:
+            param_type = 'AOT'
+        elif 'chl' in target_file.lower():
+            param_type = 'chl'
+        elif 'sst' in target_file.lower():
+            param_type = 'sst'
+        elif 'ipar' in target_file.lower():
+            param_type = 'ipar'
+        elif 'Kd' in target_file:
+            param_type = 'Kd'
+        else:
+            print(f"无法识别的参数类型: {target_file}")
+            return False
+            
+        print(f"\n处理文件对: {target_file} - {source_file}")
+        print(f"参数类型: {param_type}")
+        
+        # 读取数据
+        target_lat = load_scene_array(os.path.join(input_dir, f"{target_sensor}_lat_{target_time}.txt"))
+        target_lon = load_scene_array(os.path.join(input_dir, f"{target_sensor}_lon_{target_time}.txt"))
+        target_flag = load_scene_array(os.path.join(input_dir, f"{target_sensor}_flag1_{target_time}.txt")).copy()
+        
+        naming_rule = SATELLITE_NAMING_RULES[source_type]
+        source_lat = load_scene_array(os.path.join(input_dir, f"{naming_rule['lat_format']}_{source_time}.txt"))
+        source_lon = load_scene_array(os.path.join(input_dir, f"{naming_rule['lon_format']}_{source_time}.txt"))
+        source_flag = load_scene_array(os.path.join(input_dir, f"{naming_rule['flag_format']}_{source_time}.txt"))
+        source_data = load_intermediate(os.path.join(input_dir, source_file))
+        
+        # 处理无效值和插值
+        source_data[source_flag == 1] = np.nan
+        valid = ~np.isnan(source_data)
+        if not np.any(valid):
+            print("警告：没有有效的源数据点进行插值")
+            return False
+            
+        # 只对未被标识、且落在预检重叠范围内的目标像元插值（范围外必然位于检验源三角网之外），
+        # 其余像元的插值结果随后都会被置为NaN，直接保留NaN
+        query = target_flag == 0
+        overlap = load_swath_overlap(input_dir)
+        if overlap is not None:
+            query &= bounds_mask(target_lat, target_lon, overlap)
+
+        # 同一检验源景的各产品共用三角剖分和插值权重
+        interpolator = get_linear_interpolator(
+            os.path.join(output_dir, INTERPOLATION_CACHE_DIR),
+            source_lon, source_lat, valid, target_lon[query], target_lat[query]
+        )
+        interpolated_data = np.full(target_lat.shape, np.nan)
+        interpolated_data[query] = interpolator(source_data)
+        
+        # 更新标识
+        mask = (target_flag == 1) | (np.isnan(interpolated_data))
+        interpolated_data[mask] = np.nan
+        target_flag[mask] = 1
+        
+        # 保存结果
+        interpolated_filename = f"{naming_rule['output_prefix']}_{param_type}_{source_time}.txt"
+        flag_filename = f"{target_sensor}_flag1_{param_type}_{target_time}.txt"
+        result_filename = f"spaceresult_{target_sensor}_{source_type}_{param_type}_{target_time}.txt"
+        
+        save_intermediate(os.path.join(output_dir, interpolated_filename), interpolated_data, fmt='%.6f')
+        save_intermediate(os.path.join(output_dir, flag_filename), target_flag, fmt='%d')
+        
+        with open(os.path.join(output_dir, result_filename), 'w') as f:
+            f.write(f"{target_file}\n")
+            f.write(f"{source_file}\n")
+            f.write(f"{time_diff:.1f}\n")
+        get_run_catalog(output_dir).add(result_filename)
+            
+        return True
+        
+    except Exception as e:
+        print(f"处理匹配对失败: {e}")
+        return False
 
+def process_satellite_spacematch(input_dir, output_dir, target_sensor, source_type, workers=1):
+    """
+    处理卫星数据空间匹配
+    """
     def read_timeresult():
         """读取时间匹配结果文件"""
         # 获取所有匹配的时间结果文件
-        timeresult_files = [f for f in os.listdir(input_dir)
-                        if f.startswith(f'timeresult_{target_sensor}_{source_type}_')]
+        timeresult_files = get_run_catalog(input_dir).find(kind='timeresult', sensor=target_sensor,
+                                                           source=source_type)
         
         if not timeresult_files:
             print(f"未找到{target_sensor}和{source_type}的时间匹配结果文件")
@@ -1295,90 +3007,6 @@ def process_satellite_spacematch(input_dir, output_dir, target_sensor, source_ty
         print(f"成功读取 {len(match_results)} 个匹配结果")
         return match_results if match_results else None
 
-    def process_single_match(target_file, source_file, time_diff):
-        """处理单个匹配对的空间匹配"""
-        try:
-            # 从文件名中提取信息
-            target_parts = target_file.split('_')
-            source_parts = source_file.split('_')
-            
-            target_sensor = target_parts[0]
-            source_type = source_parts[0]
-
-            target_time = target_parts[-1].replace('.txt', '')
-            source_time = source_parts[-1].replace('.txt', '')
-            
-            # 提取参数类型
-            if any(part.startswith('Rrs') for part in target_parts):
-                param_type = next(part for part in target_parts if part.startswith('Rrs'))
-            elif 'AOT' in target_file:
-                param_type = 'AOT'
-            elif 'chl' in target_file.lower():
-                param_type = 'chl'
-            elif 'sst' in target_file.lower():
-                param_type = 'sst'
-            elif 'ipar' in target_file.lower():
-                param_type = 'ipar'
-            elif 'Kd' in target_file:
-                param_type = 'Kd'
-            else:
-                print(f"无法识别的参数类型: {target_file}")
-                return False
-                
-            print(f"\n处理文件对: {target_file} - {source_file}")
-            print(f"参数类型: {param_type}")
-            
-            # 读取数据
-            target_lat = np.genfromtxt(os.path.join(input_dir, f"{target_sensor}_lat_{target_time}.txt"))
-            target_lon = np.genfromtxt(os.path.join(input_dir, f"{target_sensor}_lon_{target_time}.txt"))
-            target_flag = np.genfromtxt(os.path.join(input_dir, f"{target_sensor}_flag1_{target_time}.txt"))
-            
-            naming_rule = SATELLITE_NAMING_RULES[source_type]
-            source_lat = np.genfromtxt(os.path.join(input_dir, f"{naming_rule['lat_format']}_{source_time}.txt"))
-            source_lon = np.genfromtxt(os.path.join(input_dir, f"{naming_rule['lon_format']}_{source_time}.txt"))
-            source_flag = np.genfromtxt(os.path.join(input_dir, f"{naming_rule['flag_format']}_{source_time}.txt"))
-            source_data = np.genfromtxt(os.path.join(input_dir, source_file))
-            
-            # 处理无效值和插值
-            source_data[source_flag == 1] = np.nan
-            valid = ~np.isnan(source_data)
-            if not np.any(valid):
-                print("警告：没有有效的源数据点进行插值")
-                return False
-                
-            interpolated_data = interpolate.griddata(
-                points=(source_lon[valid], source_lat[valid]),
-                values=source_data[valid],
-                xi=(target_lon, target_lat),
-                method='linear',
-                fill_value=np.nan
-            )
-            
-            # 更新标识
-            mask = (target_flag == 1) | (np.isnan(interpolated_data))
-            interpolated_data[mask] = np.nan
-            target_flag[mask] = 1
-            
-            # 保存结果
-            interpolated_filename = f"{naming_rule['output_prefix']}_{param_type}_{source_time}.txt"
-            flag_filename = f"{target_sensor}_flag1_{param_type}_{target_time}.txt"
-            result_filename = f"spaceresult_{target_sensor}_{source_type}_{param_type}_{target_time}.txt"
-            
-            np.savetxt(os.path.join(output_dir, interpolated_filename), interpolated_data, fmt='%.6f')
-            np.savetxt(os.path.join(output_dir, flag_filename), target_flag, fmt='%d')
-            
-            with open(os.path.join(output_dir, result_filename), 'w') as f:
-                f.write(f"{target_file}\n")
-                f.write(f"{source_file}\n")
-                f.write(f"{time_diff:.1f}\n")
-                
-            return True
-            
-        except Exception as e:
-            print(f"处理匹配对失败: {e}")
-            return False
-        
-
     try:
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
@@ -1389,10 +3017,12 @@ def process_satellite_spacematch(input_dir, output_dir, target_sensor, source_ty
             return False
             
         # 处理每个匹配结果
-        success_count = 0
-        for result in match_results:
-            if process_single_match(**result):
-                success_count += 1
+        # 首个匹配对在主进程中处理，使其三角剖分权重先写入磁盘缓存，供其余进程复用
+        tasks = [(input_dir, output_dir, result['target_file'], result['source_file'], result['time_diff'])
+                 for result in match_results]
+        results = run_product_tasks(satellite_spacematch_product, tasks[:1])
+        results += run_product_tasks(satellite_spacematch_product, tasks[1:], workers)
+        success_count = sum(1 for result in results if result)
                 
         print(f"\n处理完成:")
         
@@ -1404,9 +3034,11 @@ def process_satellite_spacematch(input_dir, output_dir, target_sensor, source_ty
         return False
 
 
-def process_xc_spacematch(input_dir, output_dir, target_sensor, window_size):
+def process_xc_spacematch(input_dir, output_dir, target_sensor, window_size, time_threshold=None):
     """
     处理现场数据空间匹配
+    参数对应的全部站点、全部记录一次完成匹配（time_threshold为时间窗口，小时，None表示不限）；
+    全部命中写入matchup文件，时间差最小的命中写入spaceresult文件
     """
     def process_single_match(target_file, source_file, time_diff):
         """处理单个匹配对"""
@@ -1414,85 +3046,69 @@ def process_xc_spacematch(input_dir, output_dir, target_sensor, window_size):
             # 提取基本信息
             target_parts = target_file.split('_')
             target_time = target_parts[-1].replace('.txt', '')
+            param_type = target_parts[1]
             
             # 读取目标数据
-            target_data = np.genfromtxt(os.path.join(input_dir, target_file))
-            target_lat = np.genfromtxt(os.path.join(input_dir, f"{target_sensor}_lat_{target_time}.txt"))
-            target_lon = np.genfromtxt(os.path.join(input_dir, f"{target_sensor}_lon_{target_time}.txt"))
-            target_flag = np.genfromtxt(os.path.join(input_dir, f"{target_sensor}_flag1_{target_time}.txt"))
+            target_data = load_intermediate(os.path.join(input_dir, target_file))
+            lat_path = os.path.join(input_dir, f"{target_sensor}_lat_{target_time}.txt")
+            lon_path = os.path.join(input_dir, f"{target_sensor}_lon_{target_time}.txt")
+            target_flag = load_scene_array(os.path.join(input_dir, f"{target_sensor}_flag1_{target_time}.txt"))
             
             # 重塑数据为二维数组
-            total_size = target_data.size
-            for i in range(1000, 6000):
-                if total_size % i == 0:
-                    rows = i
-                    cols = total_size // i
-                    break
+            rows, cols = scene_grid_shape(input_dir, target_sensor, target_time, target_data.size)
             
             target_data = target_data.reshape(rows, cols)
-            target_lat = target_lat.reshape(rows, cols)
-            target_lon = target_lon.reshape(rows, cols)
             target_flag = target_flag.reshape(rows, cols)
             
-            # 读取现场数据文件
-            with open(os.path.join(input_dir, source_file), 'r') as f:
-                for line in f:
-                    if line.startswith('Latitude:'):
-                        xcf_lat = float(line.split(':')[1])
-                    elif line.startswith('Longitude:'):
-                        xcf_lon = float(line.split(':')[1])
-                    elif line and not line.startswith(('Data:', 'Date')):
-                        parts = line.split()
-                        if len(parts) >= 3:
-                            xcf_time = datetime.strptime(f"{parts[0]}{parts[1]}", '%Y%m%d%H%M%S')
-                            xcf_value = float(parts[2])
-                            break
+            # 读取该参数全部站点的现场记录
+            xcf_files = find_insitu_files(input_dir, param_type) or [source_file]
+            records = load_insitu_records(input_dir, xcf_files)
             
-            # 找到最近的像元
-            distances = np.sqrt((target_lat - xcf_lat)**2 + (target_lon - xcf_lon)**2)
-            min_idx = np.unravel_index(np.argmin(distances), distances.shape)
-            center_row, center_col = min_idx[0], min_idx[1]
-                   
-            # 检查是否在边界
-            half_size = (window_size - 1) // 2
-            if (center_row < half_size or 
-                center_row >= rows - half_size or
-                center_col < half_size or 
-                center_col >= cols - half_size):
-                print(f"匹配点在图像边界，跳过处理")
+            # 全部记录批量匹配（大圆距离最近像元）
+            pixel_index = get_scene_pixel_index(lat_path, lon_path, (rows, cols))
+            overpass_time = datetime.strptime(target_time, '%Y%m%d%H%M%S')
+            matches = match_insitu_records(records, overpass_time, pixel_index, target_data,
+                                           target_flag, window_size, time_threshold)
+            if matches is None:
+                print(f"时间窗口内没有可用的现场记录（记录可能位于图像边界或窗口内没有有效数据）")
                 return False
+            print(f"{param_type}: {len(records)}条现场记录，{len(matches['index'])}条命中")
+
+            # ROI裁剪过的景，行列号换算为整景行列号
+            window = load_scene_window(input_dir, target_sensor, target_time)
+            if window is not None:
+                matches['row'] = matches['row'] + window.row0
+                matches['col'] = matches['col'] + window.col0
             
-            # 计算窗口统计值
-            window_data = target_data[center_row-half_size:center_row+half_size+1, 
-                                    center_col-half_size:center_col+half_size+1]
-            window_flag = target_flag[center_row-half_size:center_row+half_size+1, 
-                                    center_col-half_size:center_col+half_size+1]
-            
-            # 获取有效数据
-            valid_data = window_data[window_flag == 0]
-            
-            if len(valid_data) == 0:
-                print(f"窗口内没有有效数据")
-                return False
+            # 保存全部命中记录
+            matchup_filename = f"matchup_{target_sensor}_XC_{param_type}_{target_time}.txt"
+            save_insitu_matchups(os.path.join(output_dir, matchup_filename), records, matches)
             
-            # 计算统计值
-            mean_value = np.mean(valid_data)
-            valid_ratio = len(valid_data) / (window_size * window_size)
-            cv = np.std(valid_data) / mean_value if mean_value != 0 else None
+            # 时间差最小的命中作为检验结果
+            best = matches['index'][0]
+            center_row, center_col = matches['row'][0], matches['col'][0]
+            mean_value = matches['mean'][0]
+            valid_ratio = matches['valid_ratio'][0]
+            cv = matches['cv'][0]
+            xcf_time = records.time[best].astype(datetime)
+            xcf_value = records.value[best]
+            print(f"站点{records.station[best]}最近像元: 行{center_row} 列{center_col}，"
+                  f"距离{matches['distance'][0]:.3f}km")
             
             # 保存结果
-            result_filename = f"spaceresult_{target_sensor}_XC_{target_parts[1]}_{target_time}.txt"
+            result_filename = f"spaceresult_{target_sensor}_XC_{param_type}_{target_time}.txt"
             with open(os.path.join(output_dir, result_filename), 'w') as f:
                 f.write(f"{target_file}\n")                    # 第1行：待检验数据文件名
-                f.write(f"{source_file}\n")                    # 第2行：检验源数据文件名
+                f.write(f"{records.file[best]}\n")            # 第2行：检验源数据文件名
                 f.write(f"{center_row}\n")                     # 第3行：匹配位置行号
                 f.write(f"{center_col}\n")                     # 第4行：匹配位置列号
                 f.write(f"{mean_value:.4f}\n")                # 第5行：区域平均值
                 f.write(f"{valid_ratio:.4f}\n")               # 第6行：有效像元比例
-                f.write(f"{cv:.4f}\n" if cv is not None else "nan\n")  # 第7行：CV值
+                f.write(f"{cv:.4f}\n")                        # 第7行：CV值（均值为0时为nan）
                 f.write(f"{xcf_time.strftime('%Y%m%d%H%M%S')}\n")  # 第8行：检验源观测时间
                 f.write(f"{xcf_value:.4f}\n")                 # 第9行：检验源观测值
-                f.write(f"{time_diff:.1f}\n")                 # 第10行：时间差
+                f.write(f"{matches['time_diff'][0]:.1f}\n")   # 第10行：时间差
+            get_run_catalog(output_dir).add(result_filename)
             
             return True
             
@@ -1506,8 +3122,7 @@ def process_xc_spacematch(input_dir, output_dir, target_sensor, window_size):
         os.makedirs(output_dir, exist_ok=True)
         
         # 读取时间匹配结果
-        timeresult_files = [f for f in os.listdir(input_dir) 
-                          if f.startswith(f'timeresult_{target_sensor}_XC_')]
+        timeresult_files = get_run_catalog(input_dir).find(kind='timeresult', sensor=target_sensor, source='XC')
         
         if not timeresult_files:
             print("未找到现场数据的时间匹配结果文件")
@@ -1541,19 +3156,39 @@ def process_xc_spacematch(input_dir, output_dir, target_sensor, window_size):
     
 
 
-def satellite_validation(input_path, output_path):
+# 卫星检验验证结果
+VALRESULT_ROW_FORMAT = '%d\t%.4f\t%.4f\t%.2f\n'
+
+def validation_matchups(hy_values, source_values, flag, absolute=False):
     """
-    步骤6：生成验证结果和统计结果文件
-    
-    参数:
-        input_path: 输入文件路径
-        output_path: 输出文件路径
+    有效匹配像元：flag为0且检验源值不为-999和0
+    返回每行为[像元序号, HY值, 检验源值, 差值]的二维数组，差值为绝对差（absolute）或相对误差(%)；
+    没有有效像元时返回None
     """
+    hy_values = np.asarray(hy_values, dtype=np.float64)
+    source_values = np.asarray(source_values, dtype=np.float64)
+    index = np.flatnonzero((np.asarray(flag) == 0) & (source_values != -999) & (source_values != 0))
+    if index.size == 0:
+        return None
+    x = hy_values[index]
+    y = source_values[index]
+    diff = np.abs(x - y) if absolute else np.abs((x - y) / y) * 100
+    return np.column_stack((index, x, y, diff))
+
+def write_valresult_rows(f, data, chunk_size=100000):
+    """按块写出验证结果数据行（序号从1开始），每块用一次字符串格式化完成"""
+    rows = data.copy()
+    rows[:, 0] += 1
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        f.write((VALRESULT_ROW_FORMAT * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+def satellite_validation_product(input_path, output_path, space_file):
+    """处理单个space结果文件，生成验证结果和统计结果文件（可在子进程中运行）"""
     def read_data(filepath):
         """读取数据文件"""
         try:
-            with open(filepath, 'r') as f:
-                return np.array([float(line.strip()) for line in f])
+            return load_intermediate(filepath)
         except Exception as e:
             print(f"读取文件 {filepath} 时出错: {str(e)}")
             return None
@@ -1576,138 +3211,145 @@ def satellite_validation(input_path, output_path):
         return product
 
     try:
-        print("\n=== 执行步骤6：生成验证结果和统计结果文件 ===")
-        
-        # 获取输入文件列表
-        input_files = os.listdir(input_path)
+        # 从文件名解析参数
+        parts = space_file.replace('spaceresult_', '').replace('.txt', '').split('_')
+        if len(parts) < 4:
+            return False
         
-        # 查找所有space结果文件
-        space_files = [f for f in input_files if f.startswith('spaceresult_')]
+        HY, source, product, timeHY = parts
+    
+        # 获取实际的产品文件名部分
+        product_filename = get_product_filename(product)
+    
+        # 读取space结果获取时间差
+        space_path = os.path.join(input_path, space_file)
+        with open(space_path, 'r') as f:
+            for _ in range(2):
+                next(f)
+            timedif = float(f.readline().strip())
+    
+        # 获取source时间
+        timesource = None
+        for f in get_run_catalog(input_path).find(sensor=f'{source}1', product=product, ext='.txt'):
+            timesource = f.split('_')[-1].replace('.txt', '')
+            break
+    
+        if not timesource:
+            return False
+    
+        # 读取数据文件（使用修改后的产品名称）
+        Rrs2_path = os.path.join(input_path, f'{source}1_{product}_{timesource}.txt')
+        flag1_path = os.path.join(input_path, f'{HY}_flag1_{product}_{timeHY}.txt')
+        Rrs1_path = os.path.join(input_path, f'{HY}_{product_filename}_{timeHY}.txt')
+    
+        Rrs2 = read_data(Rrs2_path)
+        flag1 = read_data(flag1_path)
+        Rrs1 = read_data(Rrs1_path)
+    
+        if Rrs2 is None or flag1 is None or Rrs1 is None:
+            return False
+    
+        # 处理数据
+        data = validation_matchups(Rrs1, Rrs2, flag1, absolute=product.lower() == 'sst')
+        if data is None:
+            return False
         
-        for space_file in space_files:
-            # 从文件名解析参数
-            parts = space_file.replace('spaceresult_', '').replace('.txt', '').split('_')
-            if len(parts) < 4:
-                continue
-                
-            HY, source, product, timeHY = parts
-            
-            # 获取实际的产品文件名部分
-            product_filename = get_product_filename(product)
-            
-            # 读取space结果获取时间差
-            space_path = os.path.join(input_path, space_file)
-            with open(space_path, 'r') as f:
-                for _ in range(2):
-                    next(f)
-                timedif = float(f.readline().strip())
-            
-            # 获取source时间
-            timesource = None
-            for f in input_files:
-                if f.startswith(f'{source}1_{product}_') and f.endswith('.txt'):
-                    timesource = f.split('_')[-1].replace('.txt', '')
-                    break
-            
-            if not timesource:
-                continue
-            
-            # 读取数据文件（使用修改后的产品名称）
-            Rrs2_path = os.path.join(input_path, f'{source}1_{product}_{timesource}.txt')
-            flag1_path = os.path.join(input_path, f'{HY}_flag1_{product}_{timeHY}.txt')
-            Rrs1_path = os.path.join(input_path, f'{HY}_{product_filename}_{timeHY}.txt')
-            
-            Rrs2 = read_data(Rrs2_path)
-            flag1 = read_data(flag1_path)
-            Rrs1 = read_data(Rrs1_path)
-            
-            if Rrs2 is None or flag1 is None or Rrs1 is None:
-                continue
-            
-            # 处理数据
-            data = []
-            for i in range(len(Rrs1)):
-                if flag1[i] == 0 and Rrs2[i] != -999 and Rrs2[i] != 0:
-                    if product.lower() == 'sst':
-                        diff = abs(Rrs1[i] - Rrs2[i])
-                    else:
-                        diff = abs((Rrs1[i] - Rrs2[i]) / Rrs2[i]) * 100
-                    data.append([i, Rrs1[i], Rrs2[i], diff])
+        ave = np.mean(data[:, 3])
+
+        # ROI裁剪过的景，像元序号换算为整景序号
+        window = load_scene_window(input_path, HY, timeHY)
+        if window is not None:
+            data[:, 0] = window.to_full(data[:, 0].astype(np.int64))
+
+        # 计算统计值
+        X = data[:, 1]
+        Y = data[:, 2]
+        bias = np.mean(X - Y)
+        STD = np.std(X - Y, ddof=1)
+        RMS = np.sqrt(np.mean((X - Y) ** 2))
+        R = np.corrcoef(X, Y)[0, 1]
+
+        # 写入验证结果文件
+        val_path = os.path.join(output_path, f'valresult_{HY}_{source}_{product}_{timeHY}.txt')
+        with open(val_path, 'w') as f:
+            f.write('/begin header\n')
+            f.write(f'/HY satellite={HY}\n')
+            f.write(f'/Validation source={source}\n')
+            f.write(f'/product={product}\n')
+            f.write(f'/HY time={timeHY}\n')
+            f.write(f'/On-site time={timesource}\n')
+            f.write(f'/HY file={HY}_{product_filename}_{timeHY}.txt\n')
+            f.write(f'/On-site file={source}_{product}_{timesource}.txt\n')
+            f.write(f'/Time difference={timedif:.2f}h\n')
+            f.write(f'/Effective pixel count={len(data)}\n')
+            f.write(f'/Total pixel count={len(Rrs1)}\n')
+            f.write(f'/validation result={ave:.2f}%\n')
+            f.write(f'/fields=number\t{product}_HY  {product}_{source}\tdifference\n')
+            f.write(f'/unites=NA\t{get_units(product)}\t{get_units(product)}\t%\n')
+            f.write('/end header\n')
+        
+            write_valresult_rows(f, data)
+
+        # 写入统计结果文件
+        sta_path = os.path.join(output_path, f'statistic_{HY}_{source}_{product}_{timeHY}.txt')
+        with open(sta_path, 'w') as f:
+            f.write('/begin header\n')
+            f.write(f'/HY satellite={HY}\n')
+            f.write(f'/staidation source={source}\n')
+            f.write(f'/product={product}\n')
+            f.write(f'/HY time={timeHY}\n')
+            f.write(f'/On-site time={timesource}\n')
+            f.write(f'/HY file={HY}_{product_filename}_{timeHY}.txt\n')
+            f.write(f'/On-site file={source}_{product}_{timesource}.txt\n')
+            f.write(f'/Time difference={timedif:.2f}h\n')
+            f.write(f'/Effective pixel count={len(data)}\n')
+            f.write(f'/Total pixel count={len(Rrs1)}\n')
+            f.write(f'/validation result={ave:.2f}%\n')
+            f.write('/fields=bias\tSTD\tRMS\tR\n')
+            f.write(f'/unites={get_units(product)}\t{get_units(product)}\t{get_units(product)}\tNA\n')
+            f.write('/end header\n')
+            f.write(f'{bias:.4f}\t{STD:.4f}\t{RMS:.4f}\t{R:.4f}')
+        catalog = get_run_catalog(output_path)
+        catalog.add(os.path.basename(val_path))
+        catalog.add(os.path.basename(sta_path))
+    
+        print(f"已处理 {HY}_{source}_{product}_{timeHY}")
 
-            if not data:
-                continue
-                
-            data = np.array(data)
-            ave = np.mean(data[:, 3])
-
-            # 计算统计值
-            X = data[:, 1]
-            Y = data[:, 2]
-            bias = np.mean(X - Y)
-            STD = np.std(X - Y, ddof=1)
-            RMS = np.sqrt(np.mean((X - Y) ** 2))
-            R = np.corrcoef(X, Y)[0, 1]
-
-            # 写入验证结果文件
-            val_path = os.path.join(output_path, f'valresult_{HY}_{source}_{product}_{timeHY}.txt')
-            with open(val_path, 'w') as f:
-                f.write('/begin header\n')
-                f.write(f'/HY satellite={HY}\n')
-                f.write(f'/Validation source={source}\n')
-                f.write(f'/product={product}\n')
-                f.write(f'/HY time={timeHY}\n')
-                f.write(f'/On-site time={timesource}\n')
-                f.write(f'/HY file={HY}_{product_filename}_{timeHY}.txt\n')
-                f.write(f'/On-site file={source}_{product}_{timesource}.txt\n')
-                f.write(f'/Time difference={timedif:.2f}h\n')
-                f.write(f'/Effective pixel count={len(data)}\n')
-                f.write(f'/Total pixel count={len(Rrs1)}\n')
-                f.write(f'/validation result={ave:.2f}%\n')
-                f.write(f'/fields=number\t{product}_HY  {product}_{source}\tdifference\n')
-                f.write(f'/unites=NA\t{get_units(product)}\t{get_units(product)}\t%\n')
-                f.write('/end header\n')
-                
-                for row in data:
-                    f.write(f'{int(row[0]+1)}\t{row[1]:.4f}\t{row[2]:.4f}\t{row[3]:.2f}\n')
-
-            # 写入统计结果文件
-            sta_path = os.path.join(output_path, f'statistic_{HY}_{source}_{product}_{timeHY}.txt')
-            with open(sta_path, 'w') as f:
-                f.write('/begin header\n')
-                f.write(f'/HY satellite={HY}\n')
-                f.write(f'/staidation source={source}\n')
-                f.write(f'/product={product}\n')
-                f.write(f'/HY time={timeHY}\n')
-                f.write(f'/On-site time={timesource}\n')
-                f.write(f'/HY file={HY}_{product_filename}_{timeHY}.txt\n')
-                f.write(f'/On-site file={source}_{product}_{timesource}.txt\n')
-                f.write(f'/Time difference={timedif:.2f}h\n')
-                f.write(f'/Effective pixel count={len(data)}\n')
-                f.write(f'/Total pixel count={len(Rrs1)}\n')
-                f.write(f'/validation result={ave:.2f}%\n')
-                f.write('/fields=bias\tSTD\tRMS\tR\n')
-                f.write(f'/unites={get_units(product)}\t{get_units(product)}\t{get_units(product)}\tNA\n')
-                f.write('/end header\n')
-                f.write(f'{bias:.4f}\t{STD:.4f}\t{RMS:.4f}\t{R:.4f}')
-            
-            print(f"已处理 {HY}_{source}_{product}_{timeHY}")
-        
         return True
-        
+
     except Exception as e:
-        print(f"步骤6执行失败: {str(e)}")
+        print(f"处理 {space_file} 失败: {str(e)}")
         traceback.print_exc()
         return False
 
 
-def xc_validation(input_path, output_path):
+def satellite_validation(input_path, output_path, workers=1):
     """
-    基于现场数据的遥感反射率检验
+    步骤6：生成验证结果和统计结果文件
     
     参数:
         input_path: 输入文件路径
         output_path: 输出文件路径
     """
+    try:
+        print("\n=== 执行步骤6：生成验证结果和统计结果文件 ===")
+        
+        # 查找所有space结果文件
+        space_files = get_run_catalog(input_path).find(kind='spaceresult')
+        
+        tasks = [(input_path, output_path, space_file) for space_file in space_files]
+        run_product_tasks(satellite_validation_product, tasks, workers)
+        
+        return True
+        
+    except Exception as e:
+        print(f"步骤6执行失败: {str(e)}")
+        traceback.print_exc()
+        return False
+
+
+def xc_validation_product(input_path, output_path, space_file):
+    """处理单个现场数据space结果文件，生成验证结果文件（可在子进程中运行）"""
     def read_space_file(filepath):
         """读取space结果文件"""
         try:
@@ -1730,80 +3372,99 @@ def xc_validation(input_path, output_path):
             return None
 
     try:
-        print("\n=== 执行现场数据遥感反射率检验 ===")
-        
-        # 获取输入文件列表
-        input_files = os.listdir(input_path)
-        
-        # 获取所有space结果文件
-        space_files = [f for f in input_files if f.startswith('spaceresult_')]
+        # 解析space文件名
+        parts = space_file.replace('spaceresult_', '').replace('.txt', '').split('_')
+        if len(parts) < 4:
+            return False
         
-        for space_file in space_files:
-            # 解析space文件名
-            parts = space_file.replace('spaceresult_', '').replace('.txt', '').split('_')
-            if len(parts) < 4:
-                continue
-                
-            HY, source, product, timeHY = parts
-            
-            # 读取space结果文件
-            space_data = read_space_file(os.path.join(input_path, space_file))
-            if not space_data:
-                continue
-            
-            if product.lower() == 'sst':
-                # SST产品直接计算绝对差值
-                diff = abs(space_data['mean_value'] - space_data['onsite_value'])
+        HY, source, product, timeHY = parts
+    
+        # 读取space结果文件
+        space_data = read_space_file(os.path.join(input_path, space_file))
+        if not space_data:
+            return False
+    
+        if product.lower() == 'sst':
+            # SST产品直接计算绝对差值
+            diff = abs(space_data['mean_value'] - space_data['onsite_value'])
+        else:
+            # 其他产品计算相对误差
+            if space_data['onsite_value'] != 0:
+                diff = abs((space_data['mean_value'] - space_data['onsite_value']) / 
+                        space_data['onsite_value'] * 100)
             else:
-                # 其他产品计算相对误差
-                if space_data['onsite_value'] != 0:
-                    diff = abs((space_data['mean_value'] - space_data['onsite_value']) / 
-                            space_data['onsite_value'] * 100)
-                else:
-                    print(f"警告：{space_file} 现场观测值为0，跳过计算")
-                    continue
-            
-            # 写入验证结果文件
-            val_path = os.path.join(output_path, 
-                      f'valresult_{HY}_XC_{product}_{timeHY}.txt')
-            with open(val_path, 'w') as f:
-                f.write('/begin header\n')
-                f.write(f'/HY satellite={HY}\n')
-                f.write(f'/Validation source=On-site data\n')
-                f.write(f'/product={product}\n')
-                f.write(f'/HY time={timeHY}\n')
-                f.write(f'/On-site time={space_data["onsite_time"]}\n')
-                f.write(f'/HY file={space_data["hy_file"]}\n')
-                f.write(f'/On-site file={space_data["xc_file"]}\n')
-                f.write(f'/line={space_data["line"]}\n')
-                f.write(f'/row={space_data["row"]}\n')
-                f.write(f'/Time difference={space_data["time_diff"]:.4f}h\n')
-                f.write(f'/fields={product}_HY\t{product}_On site\tdifference\n')
-                f.write('/unites=1/sr\t1/sr\t%\n')
-                f.write('/end header\n')
-                f.write(f'{space_data["mean_value"]:.4f}\t{space_data["onsite_value"]:.4f}\t{diff:.2f}\n')
-            
-            
+                print(f"警告：{space_file} 现场观测值为0，跳过计算")
+                return False
+    
+        # 写入验证结果文件
+        val_path = os.path.join(output_path, 
+                  f'valresult_{HY}_XC_{product}_{timeHY}.txt')
+        with open(val_path, 'w') as f:
+            f.write('/begin header\n')
+            f.write(f'/HY satellite={HY}\n')
+            f.write(f'/Validation source=On-site data\n')
+            f.write(f'/product={product}\n')
+            f.write(f'/HY time={timeHY}\n')
+            f.write(f'/On-site time={space_data["onsite_time"]}\n')
+            f.write(f'/HY file={space_data["hy_file"]}\n')
+            f.write(f'/On-site file={space_data["xc_file"]}\n')
+            f.write(f'/line={space_data["line"]}\n')
+            f.write(f'/row={space_data["row"]}\n')
+            f.write(f'/Time difference={space_data["time_diff"]:.4f}h\n')
+            f.write(f'/fields={product}_HY\t{product}_On site\tdifference\n')
+            f.write('/unites=1/sr\t1/sr\t%\n')
+            f.write('/end header\n')
+            f.write(f'{space_data["mean_value"]:.4f}\t{space_data["onsite_value"]:.4f}\t{diff:.2f}\n')
+    
+    
+
+
+        # sta_path = os.path.join(output_path, f'statistic_{HY}_XC_{product}_{timeHY}.txt')
+        sta_path = os.path.join(output_path, f'statistic_{HY}_XC_{product}_{timeHY}.txt')
+        open(sta_path, 'w').close()
+        # with open(sta_path, 'w') as f:
+        #     f.write('/begin header\n')
+        #     f.write(f'/HY satellite={HY}\n')
+        #     f.write(f'/staidation source=On-site data\n')
+        #     f.write(f'/product={product}\n')
+        #     f.write(f'/HY time={timeHY}\n')
+        #     f.write(f'/On-site time={space_data["onsite_time"]}\n')
+        #     f.write(f'/HY file={space_data["hy_file"]}\n')
+        #     f.write(f'/On-site file={space_data["xc_file"]}\n')
+        #     f.write(f'/Time difference={space_data["time_diff"]:.4f}h\n')
+        #     f.write('/fields=bias\tSTD\tRMS\tR\n')
+        #     f.write('/unites=1/sr\t1/sr\t1/sr\tNA\n')
+        #     f.write('/end header\n')
+        catalog = get_run_catalog(output_path)
+        catalog.add(os.path.basename(val_path))
+        catalog.add(os.path.basename(sta_path))
+
+        print(f"已处理 {HY}_XC_{product}_{timeHY}")
+
+        return True
+
+    except Exception as e:
+        print(f"处理 {space_file} 失败: {str(e)}")
+        traceback.print_exc()
+        return False
 
 
-            # sta_path = os.path.join(output_path, f'statistic_{HY}_XC_{product}_{timeHY}.txt')
-            sta_path = os.path.join(output_path, f'statistic_{HY}_XC_{product}_{timeHY}.txt')
-            open(sta_path, 'w').close()
-            # with open(sta_path, 'w') as f:
-            #     f.write('/begin header\n')
-            #     f.write(f'/HY satellite={HY}\n')
-            #     f.write(f'/staidation source=On-site data\n')
-            #     f.write(f'/product={product}\n')
-            #     f.write(f'/HY time={timeHY}\n')
-            #     f.write(f'/On-site time={space_data["onsite_time"]}\n')
-            #     f.write(f'/HY file={space_data["hy_file"]}\n')
-            #     f.write(f'/On-site file={space_data["xc_file"]}\n')
-            #     f.write(f'/Time difference={space_data["time_diff"]:.4f}h\n')
-            #     f.write('/fields=bias\tSTD\tRMS\tR\n')
-            #     f.write('/unites=1/sr\t1/sr\t1/sr\tNA\n')
-            #     f.write('/end header\n')
-
-            print(f"已处理 {HY}_XC_{product}_{timeHY}")
+def xc_validation(input_path, output_path, workers=1):
+    """
+    基于现场数据的遥感反射率检验
+    
+    参数:
+        input_path: 输入文件路径
+        output_path: 输出文件路径
+    """
+    try:
+        print("\n=== 执行现场数据遥感反射率检验 ===")
+        
+        # 获取所有space结果文件
+        space_files = get_run_catalog(input_path).find(kind='spaceresult')
+        
+        tasks = [(input_path, output_path, space_file) for space_file in space_files]
+        run_product_tasks(xc_validation_product, tasks, workers)
         
         return True
         
@@ -1815,15 +3476,225 @@ def xc_validation(input_path, output_path):
 
 
 
+# 图件渲染服务
+# 误差地图、时间序列图和统计饼图由各步骤整理好数据后提交为渲染任务（模块级绘图函数及其参数），
+# 在Agg后端的进程池中并行渲染，每个渲染进程只在启动时初始化一次后端和中文字体；
+# 报告阶段只等待其用到的图件，其余图件在流程结束前等待完成
+PLOT_FONT_FAMILY = ['SimHei']
+
+def init_plot_worker():
+    """渲染进程初始化：切换到Agg后端并预先加载中文字体"""
+    plt.switch_backend('Agg')
+    font_manager.findfont(font_manager.FontProperties(family=PLOT_FONT_FAMILY))
+
+def render_plot(function, args):
+    """执行一个绘图任务，任务内对rcParams的修改不影响后续任务；返回生成的图件路径，失败时返回None"""
+    try:
+        with plt.rc_context():
+            return function(*args)
+    except Exception as e:
+        print(f"渲染图件时出错: {e}")
+        traceback.print_exc()
+        return None
+
+class FigureRenderer:
+    """
+    图件渲染服务
+    submit提交绘图任务，function需为模块级函数并返回生成的图件路径；
+    workers大于1时任务在进程池中异步渲染，否则在提交时于本进程中立即渲染；
+    wait按图件文件名模式(fnmatch)等待对应任务完成
+    """
+    def __init__(self, workers=1):
+        self.workers = max(1, int(workers))
+        self.executor = None
+        self.jobs = []
+        self.taken = 0
+
+    def submit(self, output_path, function, *args):
+        if self.workers <= 1:
+            future = Future()
+            future.set_result(render_plot(function, args))
+            if future.result():
+                get_run_catalog(os.path.dirname(output_path)).add(os.path.basename(output_path))
+        else:
+            if self.executor is None:
+                print(f"使用{self.workers}个进程并行渲染图件")
+                self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_plot_worker)
+            future = self.executor.submit(render_plot, function, args)
+        self.jobs.append((output_path, future))
+        return future
+
+    def wait(self, patterns=None):
+        """等待文件名匹配patterns（None为全部）的任务完成，返回成功生成的图件路径，并刷新图件所在目录的文件索引"""
+        rendered = []
+        for output_path, future in self.jobs:
+            name = os.path.basename(output_path)
+            if patterns is not None and not any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                continue
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"渲染图件 {name} 失败: {e}")
+                continue
+            if result:
+                rendered.append(output_path)
+        for directory in {os.path.dirname(path) for path in rendered}:
+            get_run_catalog(directory).refresh()
+        return rendered
+
+    def take_submitted(self):
+        """返回自上次调用以来提交的任务的图件路径"""
+        paths = [output_path for output_path, _ in self.jobs[self.taken:]]
+        self.taken = len(self.jobs)
+        return paths
+
+    def close(self):
+        """等待全部任务完成，关闭进程池并释放缓存的底图"""
+        rendered = self.wait()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        self.jobs = []
+        self.taken = 0
+        _map_backgrounds.clear()
+        return rendered
+
+_figure_renderer = FigureRenderer()
+
+def configure_figure_renderer(workers=1):
+    """重新创建图件渲染服务，workers为渲染进程数"""
+    global _figure_renderer
+    _figure_renderer.close()
+    _figure_renderer = FigureRenderer(workers)
+    return _figure_renderer
+
+def get_figure_renderer():
+    """获取当前的图件渲染服务"""
+    return _figure_renderer
+
+def render_time_series(series, title, output_file):
+    """绘制时间序列散点图，series为[(标签, 时间, 误差, 颜色)]"""
+    plt.figure(figsize=(12, 6))
+    all_errors = []
+    for label, times, errors, color in series:
+        plt.scatter(times, errors, color=color, s=20, label=label)
+        all_errors.extend(errors)
+
+    plt.title(title)
+    plt.xlabel('Time')
+    plt.ylabel('Error (%)')
+    # plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+
+    # 根据实际数据范围设置y轴范围，留出10%的边距
+    if all_errors:
+        ymin = min(all_errors)
+        ymax = max(all_errors)
+        margin = (ymax - ymin) * 0.1
+        plt.ylim(ymin - margin, ymax + margin)
+
+    plt.gcf().autofmt_xdate()
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+
+    plt.savefig(output_file, bbox_inches='tight')
+    plt.close()
+    return output_file
+
+def render_pie_chart(sizes, labels, title, output_file):
+    """绘制统计饼图（中文标题与标签使用SimHei字体）"""
+    plt.rcParams['font.sans-serif'] = PLOT_FONT_FAMILY
+    plt.rcParams['axes.unicode_minus'] = False
+    plt.figure(figsize=(10, 8))
+    plt.pie(sizes, labels=labels, autopct='%1.1f%%')
+    plt.title(title)
+    plt.savefig(output_file)
+    plt.close()
+    return output_file
+
+
+# 误差地图底图缓存
+# 同一经纬度范围的误差地图共用一个Figure：Basemap投影及海岸线、陆地填色、经纬网只在首次使用时绘制，
+# 之后每个产品只叠加误差网格、色标和标题，保存后移除叠加的图元
+class MapBackgroundCache:
+    """按经纬度范围缓存已绘制底图的(fig, ax, m)，按最近最少使用淘汰，最多保留max_size个Figure"""
+    def __init__(self, max_size=4):
+        self.max_size = max_size
+        self.backgrounds = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, bounds):
+        key = tuple(float(value) for value in bounds)
+        if key in self.backgrounds:
+            self.backgrounds.move_to_end(key)
+            self.hits += 1
+            return self.backgrounds[key]
+
+        self.misses += 1
+        min_lat, max_lat, min_lon, max_lon = key
+        fig = plt.figure(figsize=(10, 8))
+        ax = fig.add_subplot(111)
+        m = Basemap(projection='cyl', llcrnrlat=min_lat, urcrnrlat=max_lat,
+                    llcrnrlon=min_lon, urcrnrlon=max_lon, resolution='l', ax=ax)
+        m.drawcoastlines(color='gray')
+        m.fillcontinents(color='burlywood', lake_color='lightblue')
+        m.drawparallels(np.arange(round(min_lat), round(max_lat)+1, 2), 
+                        labels=[1,0,0,0], 
+                        fmt='%.1f°N', 
+                        fontsize=8)
+        m.drawmeridians(np.arange(round(min_lon), round(max_lon)+1, 2), 
+                        labels=[0,0,0,1], 
+                        fmt='%.1f°E', 
+                        fontsize=8)
+        self.backgrounds[key] = (fig, ax, m)
+        while len(self.backgrounds) > self.max_size:
+            _, (evicted, _, _) = self.backgrounds.popitem(last=False)
+            plt.close(evicted)
+        return self.backgrounds[key]
+
+    def clear(self):
+        for fig, _, _ in self.backgrounds.values():
+            plt.close(fig)
+        self.backgrounds.clear()
+
+_map_backgrounds = MapBackgroundCache()
+
+@profiled
+def render_error_map(bounds, grid_lon, grid_lat, grid_errors, vmin, vmax, title, output_path):
+    """在缓存的底图上叠加误差网格、色标和标题并保存"""
+    fig, ax, m = _map_backgrounds.get(bounds)
+
+    cmap = plt.cm.jet
+    cmap.set_bad('white', alpha=0)
+
+    im = m.pcolormesh(grid_lon, grid_lat, grid_errors, 
+                    cmap=cmap, 
+                    alpha=0.7,
+                    vmin=vmin, vmax=vmax,
+                    shading='auto')
+    
+    cbar = fig.colorbar(im, ax=ax, orientation='vertical', pad=0.05)
+    cbar.set_label('Error (%)')
+    
+    ax.set_title(title)
+    try:
+        fig.savefig(output_path, dpi=300, bbox_inches='tight')
+    finally:
+        # 移除本产品的叠加图元，底图留给同一范围的下一个产品
+        cbar.remove()
+        im.remove()
+        ax.set_title('')
+    return output_path
+
+
 def step7(input_dir, output_dir):
     """
     处理验证结果文件并生成误差地图
     """
-    def find_file_with_prefix(input_path, prefix):
-        """查找以指定前缀开头的文件"""
-        file_pattern = os.path.join(input_path, f'{prefix}*.txt')
-        files = glob.glob(file_pattern)
-        return files[0] if files else None
+    def find_scene_file(input_path, sensor, product):
+        """查找指定传感器与产品的中间数据文件"""
+        files = get_run_catalog(input_path).find(sensor=sensor, kind='data', product=product, ext='.txt')
+        return os.path.join(input_path, files[0]) if files else None
 
     def read_valresult(file_path):
         """读取valresult文件"""
@@ -1857,13 +3728,7 @@ def step7(input_dir, output_dir):
         """读取lat文件"""
         try:
             print(f"正在读取文件: {file_path}")
-            with open(file_path, 'r') as f:
-                rows = []
-                for line in f:
-                    values = [float(x) for x in line.strip().split('\t') if x]
-                    if values:
-                        rows.append(values)
-            return np.array(rows)
+            return load_scene_array(file_path).reshape(-1, 1)
         except Exception as e:
             print(f"读取lat文件失败: {e}")
             return None
@@ -1872,13 +3737,7 @@ def step7(input_dir, output_dir):
         """读取lon文件"""
         try:
             print(f"正在读取文件: {file_path}")
-            with open(file_path, 'r') as f:
-                rows = []
-                for line in f:
-                    values = [float(x) for x in line.strip().split('\t') if x]
-                    if values:
-                        rows.append(values)
-            return np.array(rows)
+            return load_scene_array(file_path).reshape(-1, 1)
         except Exception as e:
             print(f"读取lon文件失败: {e}")
             return None
@@ -1963,6 +3822,7 @@ def step7(input_dir, output_dir):
             with open(output_file, 'w') as f:
                 for entry in matched_data:
                     f.write(f"{entry[0]}\t{entry[1]}\t{entry[2]}\n")
+            get_run_catalog(os.path.dirname(output_file)).add(os.path.basename(output_file))
             return True
         except Exception as e:
             print(f"写入输出文件时出错：{e}")
@@ -1987,10 +3847,22 @@ def step7(input_dir, output_dir):
         
         return zip(*filtered_points) if filtered_points else ([], [], [])
 
+    def far_from_points_mask(grid_lon, grid_lat, longitudes, latitudes, max_distance):
+        """
+        网格点到最近匹配点的距离是否大于max_distance（度）
+        用cKDTree为每个网格点检索最近匹配点，再按原公式计算到该点的距离，
+        结果与逐点计算全网格距离相同，耗时基本不随匹配点数增长
+        """
+        points = np.column_stack((np.asarray(longitudes, dtype=np.float64),
+                                  np.asarray(latitudes, dtype=np.float64)))
+        _, nearest = cKDTree(points).query(np.column_stack((grid_lon.ravel(), grid_lat.ravel())))
+        nearest = nearest.reshape(grid_lon.shape)
+        dist = np.sqrt((grid_lon - points[nearest, 0])**2 + (grid_lat - points[nearest, 1])**2)
+        return dist > max_distance
+
+    @profiled
     def plot_error_map(latitudes, longitudes, errors, title, output_path):
         """绘制误差地图"""
-        plt.figure(figsize=(10, 8))
-        
         product_type = title.lower()
         if 'sst' in product_type or 'ipar' in product_type:
 
@@ -2025,14 +3897,10 @@ def step7(input_dir, output_dir):
         min_lat, max_lat = min(latitudes), max(latitudes)
         min_lon, max_lon = min(longitudes), max(longitudes)
         
-        m = Basemap(projection='cyl', llcrnrlat=min_lat, urcrnrlat=max_lat,
-                    llcrnrlon=min_lon, urcrnrlon=max_lon, resolution='l')
+        land_mask = get_land_mask(os.path.join(output_dir, LAND_MASK_CACHE_DIR))
         
-        valid_points = []
-        for lat, lon, err in zip(latitudes, longitudes, errors):
-            x, y = m(lon, lat)
-            if not m.is_land(x, y):
-                valid_points.append((lat, lon, err))
+        on_land = land_mask.is_land(latitudes, longitudes)
+        valid_points = [point for point, land in zip(zip(latitudes, longitudes, errors), on_land) if not land]
         
         if not valid_points:
             return
@@ -2046,19 +3914,6 @@ def step7(input_dir, output_dir):
         if not latitudes:
             return
         
-        m.drawcoastlines(color='gray')
-        m.fillcontinents(color='burlywood', lake_color='lightblue')
-        m.drawparallels(np.arange(round(min_lat), round(max_lat)+1, 2), 
-                        labels=[1,0,0,0], 
-                        fmt='%.1f°N', 
-                        fontsize=8)
-        m.drawmeridians(np.arange(round(min_lon), round(max_lon)+1, 2), 
-                        labels=[0,0,0,1], 
-                        fmt='%.1f°E', 
-                        fontsize=8)
-        
-        x, y = m(longitudes, latitudes)
-        
         grid_lon, grid_lat = np.meshgrid(
             np.linspace(min_lon, max_lon, 200),
             np.linspace(min_lat, max_lat, 200)
@@ -2074,20 +3929,12 @@ def step7(input_dir, output_dir):
             fill_value=np.nan
         )
         
-        mask = np.ones_like(grid_errors, dtype=bool)
-        for i in range(len(latitudes)):
-            dist = np.sqrt((grid_lon - longitudes[i])**2 + (grid_lat - latitudes[i])**2)
-            mask = mask & (dist > max_distance)
+        mask = far_from_points_mask(grid_lon, grid_lat, longitudes, latitudes, max_distance)
         
-        grid_x, grid_y = m(grid_lon, grid_lat)
-        land_mask = np.vectorize(m.is_land)(grid_x, grid_y)
-        mask = mask | land_mask
+        mask = mask | land_mask.is_land(grid_lat, grid_lon)
         
         grid_errors[mask] = np.nan
         
-        cmap = plt.cm.jet
-        cmap.set_bad('white', alpha=0)
-        
         if 'sst' in product_type:
             # 使用实际数据的最小值和最大值
             vmin = max(0, error_min)  # 确保最小值不小于0
@@ -2098,18 +3945,8 @@ def step7(input_dir, output_dir):
         else:
             vmin, vmax = 0, 100
         
-        im = m.pcolormesh(grid_lon, grid_lat, grid_errors, 
-                        cmap=cmap, 
-                        alpha=0.7,
-                        vmin=vmin, vmax=vmax,
-                        shading='auto')
-        
-        cbar = plt.colorbar(im, orientation='vertical', pad=0.05)
-        cbar.set_label('Error (%)')
-        
-        plt.title(title)
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        get_figure_renderer().submit(output_path, render_error_map, (min_lat, max_lat, min_lon, max_lon),
+                                     grid_lon, grid_lat, grid_errors, vmin, vmax, title, output_path)
 
     def process_error_map(input_file, final_output_path):
         """处理单个误差地图"""
@@ -2139,15 +3976,16 @@ def step7(input_dir, output_dir):
         os.makedirs(output_dir)
 
     # 处理所有valresult文件
-    valresult_files = glob.glob(os.path.join(input_dir, 'valresult*.txt'))
+    valresult_files = [os.path.join(input_dir, f)
+                       for f in get_run_catalog(input_dir).find(kind='valresult', ext='.txt')]
     
     for valresult_file in valresult_files:
         print(f"正在处理文件: {valresult_file}")
         
         # 读取数据
         valresult_data, _ = read_valresult(valresult_file)
-        lat_file = find_file_with_prefix(input_dir, 'HY3A_lat')
-        lon_file = find_file_with_prefix(input_dir, 'HY3A_lon')
+        lat_file = find_scene_file(input_dir, 'HY3A', 'lat')
+        lon_file = find_scene_file(input_dir, 'HY3A', 'lon')
         
         if not all([valresult_data, lat_file, lon_file]):
             print("缺少必要的输入文件或数据读取失败")
@@ -2159,6 +3997,13 @@ def step7(input_dir, output_dir):
         if not all([lat is not None, lon is not None]):
             print("lat或lon数据读取失败")
             continue
+
+        # 验证结果按整景像元序号记录，ROI裁剪过的景换算为窗口内序号
+        window = load_scene_window(input_dir, 'HY3A', parse_catalog_name(os.path.basename(lat_file)).time)
+        if window is not None:
+            local_index = window.to_local([int(round(row[0])) - 1 for row in valresult_data])
+            valresult_data = [[local + 1, row[1], row[2]]
+                              for row, local in zip(valresult_data, local_index) if local >= 0]
         
         # 匹配坐标
         matched_data = match_coordinates(valresult_data, lat, lon, os.path.basename(valresult_file))
@@ -2182,7 +4027,6 @@ def step7(input_dir, output_dir):
             print("生成误差地图失败")
 
 
-
 def step8(input_directory, output_directory):
     """
     第八步：处理时间序列数据和绘制时间序列图
@@ -2193,9 +4037,9 @@ def step8(input_directory, output_directory):
         deviations = []
         file_paths = []
         
-        pattern = os.path.join(input_directory, f'valresult_HY3A_XC_{product}_*.txt')
-        matching_files = glob.glob(pattern)
-        file_paths.extend(sorted(matching_files))
+        matching_files = get_run_catalog(input_directory).find(kind='valresult', sensor='HY3A', source='XC',
+                                                               product=product, ext='.txt')
+        file_paths.extend(os.path.join(input_directory, f) for f in matching_files)
         
         print(f"\n处理现场验证{product}产品数据...")
         print(f"找到{len(file_paths)}个匹配的文件")
@@ -2241,9 +4085,9 @@ def step8(input_directory, output_directory):
         # 支持所有可能的卫星类型
         satellites = ['TERRA', 'AQUA', 'SNPP', 'JPSS']
         for satellite in satellites:
-            pattern = os.path.join(input_directory, f'valresult_HY3A_{satellite}_{product}_*.txt')
-            matching_files = glob.glob(pattern)
-            file_paths.extend(sorted(matching_files))
+            matching_files = get_run_catalog(input_directory).find(kind='valresult', sensor='HY3A', source=satellite,
+                                                                   product=product, ext='.txt')
+            file_paths.extend(os.path.join(input_directory, f) for f in matching_files)
         
         # print(f"找到{len(file_paths)}个匹配的文件:")
         for f in file_paths:
@@ -2325,6 +4169,7 @@ def step8(input_directory, output_directory):
         with open(output_path, 'w') as file:
             for time, deviation in zip(times, deviations):
                 file.write(f"{time}\t{deviation:.4f}\n")
+        get_run_catalog(output_directory).add(output_filename)
         
         return output_path
 
@@ -2345,12 +4190,11 @@ def step8(input_directory, output_directory):
                     product_files[product] = []
                 product_files[product].append(input_file)
         
-        # 为每个产品绘制图形
+        # 为每个产品提交绘图任务
         for product, files in product_files.items():
-            plt.figure(figsize=(12, 6))
             colors = ['b', 'r', 'g', 'c', 'm', 'y', 'k']
             all_times = []
-            all_errors = []  # 添加这行来收集所有误差值
+            series = []
             
             for i, input_file in enumerate(files):
                 print(f"\n处理文件进行绘图: {input_file}")
@@ -2363,13 +4207,12 @@ def step8(input_directory, output_directory):
                 print(df.head())
                 
                 all_times.extend(df['time'])
-                all_errors.extend(df['error'])  # 收集所有误差值
                 
                 file_name = os.path.basename(input_file)
                 label = file_name.replace('timeseries_', '').replace('.txt', '')
                 
                 color = colors[i % len(colors)]
-                plt.scatter(df['time'], df['error'], color=color, s=20, label=label)
+                series.append((label, df['time'], df['error'].tolist(), color))
                 print(f"绘制了 {len(df)} 个数据点")
             
             if all_times:
@@ -2381,25 +4224,9 @@ def step8(input_directory, output_directory):
                 title = output_filename.replace('figure_', '').replace('.jpg', '')
                 if len(title) > 14:  # 确保字符串足够长
                     title = title[:-14]  # 移除最后14位（时间戳）
-                plt.title(title)
-                plt.xlabel('Time')
-                plt.ylabel('Error (%)')
-                # plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-                
-                # 根据实际数据范围设置y轴范围，留出10%的边距
-                if all_errors:
-                    ymin = min(all_errors)
-                    ymax = max(all_errors)
-                    margin = (ymax - ymin) * 0.1
-                    plt.ylim(ymin - margin, ymax + margin)
-                
-                plt.gcf().autofmt_xdate()
-                plt.xticks(rotation=45)
-                plt.tight_layout()
                 
                 output_file = os.path.join(output_dir, output_filename)
-                plt.savefig(output_file, bbox_inches='tight')
-                plt.close()
+                get_figure_renderer().submit(output_file, render_time_series, series, title, output_file)
 
     try:
         os.makedirs(output_directory, exist_ok=True)
@@ -2587,7 +4414,7 @@ def analyze_star_check(valresults, spaceresults, input_directory):
     
     file_prefix = product_file_mapping.get(product)
     if file_prefix:
-        for filename in os.listdir(input_directory):
+        for filename in get_run_catalog(input_directory).find(sensor='HY3A'):
             if filename.startswith(file_prefix) and not filename.startswith(file_prefix + 'flag1'):
                 hy3a_file = os.path.join(input_directory, filename)
                 break
@@ -2598,22 +4425,11 @@ def analyze_star_check(valresults, spaceresults, input_directory):
     
     # 读取HY3A文件并计算有效值个数
     try:
-        with open(hy3a_file, 'r') as file:
-            total_lines = 0
-            invalid_count = 0
-            for line in file:
-                total_lines += 1
-                try:
-                    value = float(line.strip())
-                    if (abs(value + 999.000000) < 0.000001 or
-                        abs(value + 999.0) < 0.000001 or
-                        abs(value + 999) < 0.000001 or
-                        value < -900):
-                        invalid_count += 1
-                except ValueError:
-                    invalid_count += 1
-            
-            total_pixels = total_lines - invalid_count
+        values = load_intermediate(hy3a_file)
+        total_lines = values.size
+        invalid_count = int(np.sum((np.abs(values + 999) < 0.000001) | (values < -900)))
+        
+        total_pixels = total_lines - invalid_count
     except Exception as e:
         print(f"读取HY3A文件失败: {e}")
         return None, None, None, None, None
@@ -2730,6 +4546,7 @@ def generate_satellite_statistics_file(filename, total_pixels, valid_pixels,
             f.write("检验结果情况：\n")
             for key, value in difference_counts.items():
                 f.write(f"{key}：{value}\n")
+        get_run_catalog(os.path.dirname(filename)).add(os.path.basename(filename))
         
         print(f"{product_name}统计文件生成成功")
     except Exception as e:
@@ -2737,9 +4554,8 @@ def generate_satellite_statistics_file(filename, total_pixels, valid_pixels,
 
 def generate_satellite_plots(valid_pixels, total_pixels, time_diff_counts, 
                         difference_counts, output_directory, product, satellite_type, timestamp=None):
-    """生成卫星交叉验证统计图"""
-    plt.rcParams['font.sans-serif'] = ['SimHei']
-    plt.rcParams['axes.unicode_minus'] = False
+    """生成卫星交叉验证统计图（提交到图件渲染服务）"""
+    renderer = get_figure_renderer()
     
     product_names = {
         'AOT': '气溶胶光学厚度',
@@ -2760,56 +4576,44 @@ def generate_satellite_plots(valid_pixels, total_pixels, time_diff_counts,
     base_name = f"HY3A_{satellite_type}_{product}_{timestamp}"
     
     # 1. 有效检验像元比例饼图
-    plt.figure(figsize=(10, 8))
     invalid_pixels = max(0, total_pixels - valid_pixels)
     valid_pixels = max(0, valid_pixels)
     
     if total_pixels > 0:
         sizes = [valid_pixels, invalid_pixels]
         labels = ['有效检验像元数', '无效像元数']
-        plt.pie(sizes, labels=labels, autopct='%1.1f%%')
-        plt.title(f"{product_name}有效检验像元比例")
         pixel_output = os.path.join(output_directory, f"pixelstastic_{base_name}.jpg")
-        plt.savefig(pixel_output)
-        plt.close()
+        renderer.submit(pixel_output, render_pie_chart, sizes, labels,
+                        f"{product_name}有效检验像元比例", pixel_output)
         print(f"生成卫星 {product} 有效像元比例图")
     else:
         print(f"警告: {product} 没有有效的像元数据")
-        plt.close()
     
     # 2. 时间差分布饼图
     if any(time_diff_counts.values()):
-        plt.figure(figsize=(10, 8))
         sizes = list(time_diff_counts.values())
         sizes = [max(0, size) for size in sizes]
         if sum(sizes) > 0:
             labels = list(time_diff_counts.keys())
-            plt.pie(sizes, labels=labels, autopct='%1.1f%%')
-            plt.title(f"{product_name}时间差分布情况")
             time_output = os.path.join(output_directory, f"timestastic_{base_name}.jpg")
-            plt.savefig(time_output)
-            plt.close()
+            renderer.submit(time_output, render_pie_chart, sizes, labels,
+                            f"{product_name}时间差分布情况", time_output)
             print(f"生成卫星 {product} 时间差分布图")
         else:
             print(f"警告: {product} 没有有效的时间差数据")
-            plt.close()
     
     # 3. 检验结果分布饼图
     if any(difference_counts.values()):
-        plt.figure(figsize=(10, 8))
         sizes = list(difference_counts.values())
         sizes = [max(0, size) for size in sizes]
         if sum(sizes) > 0:
             labels = list(difference_counts.keys())
-            plt.pie(sizes, labels=labels, autopct='%1.1f%%')
-            plt.title(f"{product_name}检验结果情况")
             val_output = os.path.join(output_directory, f"valstastic_{base_name}.jpg")
-            plt.savefig(val_output)
-            plt.close()
+            renderer.submit(val_output, render_pie_chart, sizes, labels,
+                            f"{product_name}检验结果情况", val_output)
             print(f"生成卫星 {product} 检验结果分布图")
         else:
             print(f"警告: {product} 没有有效的检验结果数据")
-            plt.close()
 
 def step9_satellite(input_directory, output_directory):
     """处理星星检验数据"""
@@ -2817,10 +4621,11 @@ def step9_satellite(input_directory, output_directory):
         satellite_data = {}
         
         # 读取并分类所有文件
-        for filename in os.listdir(input_directory):
+        catalog = get_run_catalog(input_directory)
+        for filename in catalog.find(kind=('valresult', 'spaceresult')):
             file_path = os.path.join(input_directory, filename)
             
-            if (filename.startswith('valresult_') or filename.startswith('spaceresult_')) and 'XC' not in filename:
+            if 'XC' not in filename:
                 parts = filename.split('_')
                 if len(parts) >= 4:
                     product = parts[3].split('.')[0]
@@ -2840,7 +4645,7 @@ def step9_satellite(input_directory, output_directory):
                             satellite_data[product]['spaceresults'].append(result)
         
         # 获取时间戳
-        timestamp = extract_timestamp_from_files(os.listdir(input_directory))
+        timestamp = extract_timestamp_from_files(catalog.names())
         
         # 处理每个产品的数据
         for product, data in satellite_data.items():
@@ -3124,6 +4929,7 @@ def generate_ground_statistics_file(filename, valid_images, time_diff_counts,
             f.write("检验结果情况：\n")
             for key, value in difference_counts.items():
                 f.write(f"{key}%：{value}\n")
+        get_run_catalog(os.path.dirname(filename)).add(os.path.basename(filename))
         
         print(f"{product_name}现场验证统计文件生成成功")
     except Exception as e:
@@ -3131,9 +4937,8 @@ def generate_ground_statistics_file(filename, valid_images, time_diff_counts,
 
 def generate_ground_plots(time_diff_counts, valid_ratio_counts, cv_value_counts, 
                      difference_counts, output_directory, product, timestamp=None):
-    """生成现场验证统计图"""
-    plt.rcParams['font.sans-serif'] = ['SimHei']
-    plt.rcParams['axes.unicode_minus'] = False
+    """生成现场验证统计图（提交到图件渲染服务）"""
+    renderer = get_figure_renderer()
     
     product_names = {
         'AOT': '气溶胶光学厚度',
@@ -3172,20 +4977,16 @@ def generate_ground_plots(time_diff_counts, valid_ratio_counts, cv_value_counts,
 
     # 1. 时间差分布饼图
     if any(time_diff_counts.values()):
-        plt.figure(figsize=(10, 8))
         # 生成随机分布的时间差数据
         sizes = generate_random_distribution()
         labels = list(time_diff_counts.keys())
-        plt.pie(sizes, labels=labels, autopct='%1.1f%%')
-        plt.title(f"{product_name}时间差分布情况")
         time_output = os.path.join(output_directory, f"timestastic_{base_name}.jpg")
-        plt.savefig(time_output)
-        plt.close()
+        renderer.submit(time_output, render_pie_chart, sizes, labels,
+                        f"{product_name}时间差分布情况", time_output)
         print(f"生成现场 {product} 时间差分布图")
     
     # 2. 检验结果分布饼图
     if any(difference_counts.values()):
-        plt.figure(figsize=(10, 8))
         # 生成随机分布的检验结果数据
         if product == 'sst':
             # 对于SST产品使用5个区间
@@ -3194,11 +4995,9 @@ def generate_ground_plots(time_diff_counts, valid_ratio_counts, cv_value_counts,
             # 对于其他产品使用预定义的5个区间
             sizes = generate_random_distribution()
         labels = list(difference_counts.keys())
-        plt.pie(sizes, labels=labels, autopct='%1.1f%%')
-        plt.title(f"{product_name}检验结果情况")
         val_output = os.path.join(output_directory, f"valstastic_{base_name}.jpg")
-        plt.savefig(val_output)
-        plt.close()
+        renderer.submit(val_output, render_pie_chart, sizes, labels,
+                        f"{product_name}检验结果情况", val_output)
         print(f"生成现场 {product} 检验结果分布图")
 
     # 在generate_ground_plots函数���添加调试信息
@@ -3212,7 +5011,8 @@ def step9_ground(input_directory, output_directory):
         ground_data = {}
         
         # 读取并分类所有文件
-        for filename in os.listdir(input_directory):
+        catalog = get_run_catalog(input_directory)
+        for filename in catalog.find(kind=('valresult', 'spaceresult')):
             if 'XC' in filename:  # 只处理现场验证数据
                 file_path = os.path.join(input_directory, filename)
                 parts = filename.split('_')
@@ -3234,7 +5034,7 @@ def step9_ground(input_directory, output_directory):
                             ground_data[product]['spaceresults'].append(result)
         
         # 获取时间戳
-        timestamp = extract_timestamp_from_files(os.listdir(input_directory))
+        timestamp = extract_timestamp_from_files(catalog.names())
         
         # 处理每个产品的数据
         for product, data in ground_data.items():
@@ -3297,7 +5097,7 @@ def step9(input_directory, output_directory):
 
 def make_satellite_report_data(input_dir):
     # 处理valresult文件
-    for f in [f for f in os.listdir(input_dir) if f.startswith("valresult_")]:
+    for f in get_run_catalog(input_dir).find(kind='valresult'):
         output_filename = f.replace("valresult_", "report_")
         
         # 尝试不同的编码
@@ -3336,6 +5136,7 @@ def make_satellite_report_data(input_dir):
                     with open(os.path.join(input_dir, output_filename), 'w', encoding='utf-8') as outfile:
                         for key, value in report_data.items():
                             outfile.write(f"{key}={value}\n")
+                    get_run_catalog(input_dir).add(output_filename)
                 break
             except UnicodeDecodeError:
                 if encoding == encodings[-1]:  # 如果是最后一个编码尝试
@@ -3346,7 +5147,7 @@ def make_satellite_report_data(input_dir):
                 break
 
     # 处理statistic文件
-    for f in [f for f in os.listdir(input_dir) if f.startswith("statistic_")]:
+    for f in get_run_catalog(input_dir).find(kind='statistic'):
         report_filename = f.replace("statistic_", "report_")
         
         for encoding in encodings:
@@ -3374,7 +5175,7 @@ def make_satellite_report_data(input_dir):
                 break
 
     # 添加处理resstastic文件的部分
-    for f in [f for f in os.listdir(input_dir) if f.startswith("resstastic_")]:
+    for f in get_run_catalog(input_dir).find(kind='resstastic'):
         report_filename = f.replace("resstastic_", "report_")
         
         for encoding in encodings:
@@ -3406,7 +5207,7 @@ def make_satellite_report_data(input_dir):
 def make_ground_report_data(input_dir):
     encodings = ['utf-8', 'gbk', 'gb2312', 'gb18030', 'latin1']
     
-    for f in [f for f in os.listdir(input_dir) if f.startswith("valresult_")]:
+    for f in get_run_catalog(input_dir).find(kind='valresult'):
         output_filename = f.replace("valresult_", "report_")
         
         for encoding in encodings:
@@ -3475,6 +5276,7 @@ def make_ground_report_data(input_dir):
                         # 最后写入相对偏差
                         if relative_bias is not None:
                             outfile.write(f"/Relative Bias={relative_bias}\n")
+                    get_run_catalog(input_dir).add(output_filename)
                 break
             except UnicodeDecodeError:
                 if encoding == encodings[-1]:
@@ -3501,7 +5303,7 @@ def calculate_image_dimensions(original_width, original_height, max_width, max_h
 def read_report_data(input_dir):
     report_data_list = []
     
-    for f in [f for f in os.listdir(input_dir) if f.startswith("report_")]:
+    for f in get_run_catalog(input_dir).find(kind='report'):
         try:
             with open(os.path.join(input_dir, f), 'r', encoding='utf-8') as file:
                 lines = file.readlines()
@@ -3523,7 +5325,7 @@ def read_report_data(input_dir):
     return report_data_list
 
 def extract_info_from_filenames(input_dir):
-    files = os.listdir(input_dir)
+    files = get_run_catalog(input_dir).find(kind='report')
     pattern = r"report_(\w+)_(\w+)_(\w+)_(\w+)"
     
     # 设置默认值
@@ -3566,6 +5368,7 @@ def calculate_first_page_layout(c, A4, labels, values, table_data):
     }
 
 
+@profiled
 def create_satellite_report(input_path, output_dir, font_path, time_size, space_size):
     """创建卫星产品检验报告PDF"""
     # 基础设置
@@ -3765,12 +5568,9 @@ def create_satellite_report(input_path, output_dir, font_path, time_size, space_
         current_y -= line_height
 
         # 处理第一张图片
-        map_image_name = f"map_{satellite_info}_{source_data}_{product}_"
-        map_image_path = None
-        for file in os.listdir(input_path):
-            if file.startswith(map_image_name):
-                map_image_path = os.path.join(input_path, file)
-                break
+        map_image_files = get_run_catalog(input_path).find(kind='map', sensor=satellite_info, source=source_data,
+                                                           product=product, ext='.jpg')
+        map_image_path = os.path.join(input_path, map_image_files[0]) if map_image_files else None
 
         if map_image_path and os.path.exists(map_image_path):
             img = ImageReader(map_image_path)
@@ -3799,12 +5599,9 @@ def create_satellite_report(input_path, output_dir, font_path, time_size, space_
             c.setFont('SimSun', 12)
             current_y = A4[1] - 3 * cm
 
-        pixel_image_name = f"valstastic_{satellite_info}_{source_data}_{product}_"
-        pixel_image_path = None
-        for file in os.listdir(input_path):
-            if file.startswith(pixel_image_name):
-                pixel_image_path = os.path.join(input_path, file)
-                break
+        pixel_image_files = get_run_catalog(input_path).find(kind='valstastic', sensor=satellite_info, source=source_data,
+                                                             product=product, ext='.jpg')
+        pixel_image_path = os.path.join(input_path, pixel_image_files[0]) if pixel_image_files else None
 
         if pixel_image_path and os.path.exists(pixel_image_path):
             img = ImageReader(pixel_image_path)
@@ -3828,6 +5625,7 @@ def create_satellite_report(input_path, output_dir, font_path, time_size, space_
         current_y -= 3 * cm
 
     c.save()
+@profiled
 def create_xc_report(input_path, output_dir, font_path, time_size):
     """创建星地检验报告PDF"""
     # 基础设置
@@ -3977,12 +5775,9 @@ def create_xc_report(input_path, output_dir, font_path, time_size):
         current_y -= line_height
 
         # 处理时间差分布图
-        time_image_name = f"timestastic_HY3A_XC_{product}_"
-        time_image_path = None
-        for file in os.listdir(input_path):
-            if file.startswith(time_image_name):
-                time_image_path = os.path.join(input_path, file)
-                break
+        time_image_files = get_run_catalog(input_path).find(kind='timestastic', sensor='HY3A', source='XC',
+                                                            product=product, ext='.jpg')
+        time_image_path = os.path.join(input_path, time_image_files[0]) if time_image_files else None
 
         if time_image_path and os.path.exists(time_image_path):
             img = ImageReader(time_image_path)
@@ -3998,12 +5793,9 @@ def create_xc_report(input_path, output_dir, font_path, time_size):
             current_y -= (img_height + image_margin)
 
         # 处理检验结果分布图
-        val_image_name = f"valstastic_HY3A_XC_{product}_"
-        val_image_path = None
-        for file in os.listdir(input_path):
-            if file.startswith(val_image_name):
-                val_image_path = os.path.join(input_path, file)
-                break
+        val_image_files = get_run_catalog(input_path).find(kind='valstastic', sensor='HY3A', source='XC',
+                                                           product=product, ext='.jpg')
+        val_image_path = os.path.join(input_path, val_image_files[0]) if val_image_files else None
 
         if val_image_path and os.path.exists(val_image_path):
             img = ImageReader(val_image_path)
@@ -4032,10 +5824,10 @@ def check_validation_errors(input_dir):
             return
 
         # 获取所有相关文件
-        all_files = os.listdir(input_dir)
-        valresult_files = [f for f in all_files if f.startswith('valresult_')]
-        timeresult_files = [f for f in all_files if f.startswith('timeresult_')]
-        spaceresult_files = [f for f in all_files if f.startswith('spaceresult_')]
+        catalog = get_run_catalog(input_dir)
+        valresult_files = catalog.find(kind='valresult')
+        timeresult_files = catalog.find(kind='timeresult')
+        spaceresult_files = catalog.find(kind='spaceresult')
         
         print(f"找到 {len(valresult_files)} 个valresult文件")
         print(f"找到 {len(timeresult_files)} 个timeresult文件")
@@ -4123,7 +5915,7 @@ def process_reports(input_dir):
     first_file = True
     
     # 查找所有report_开头的文件
-    report_files = glob.glob(os.path.join(input_dir, "report_*.txt"))
+    report_files = [os.path.join(input_dir, f) for f in get_run_catalog(input_dir).find(kind='report', ext='.txt')]
     
     # 获取第一个文件的时间信息用于生成输出文件名
     first_report = report_files[0]
@@ -4188,9 +5980,17 @@ def process_reports(input_dir):
     # 写入新文件
     with open(os.path.join(input_dir, output_filename), 'w') as f:
         f.writelines(output_lines)
+    get_run_catalog(input_dir).add(output_filename)
 
 
 def main():
+    parser = argparse.ArgumentParser(description='HY3A数据检验')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='并行进程数，覆盖config.ini中[PARAMS]的workers')
+    parser.add_argument('--force', action='store_true',
+                        help='忽略阶段指纹，重新运行全部阶段')
+    args = parser.parse_args()
+
     # 优先使用环境变量中指定的配置文件路径
     config_path = os.environ.get('CONFIG_PATH')
     if not config_path:
@@ -4207,9 +6007,12 @@ def main():
         print(f"错误：读取配置文件失败 {config_path}")
         print(f"错误信息: {str(e)}")
         return
+
+    if args.workers is not None:
+        config['PARAMS']['workers'] = str(args.workers)
     
     # 运行检验
-    run_check(config)
+    run_check(config, force=args.force)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file